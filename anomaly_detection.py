@@ -0,0 +1,242 @@
+"""
+Price Anomaly Detection
+
+Streaming checks on every incoming price. Each symbol keeps a few numbers of
+running state: its last accepted price, an exponentially weighted (EWMA)
+mean and variance of its daily log returns, and a two-sided CUSUM of its
+returns in units of the EWMA volatility. Scoring a new price is O(1) and history is never
+rescanned.
+
+Missing prices are skipped, and so are repeats of the last accepted price:
+monthly series carried forward across days only move when they change.
+
+A price is flagged as
+- invalid: zero or negative.
+- spike: its return from the last accepted price is more than Z_THRESHOLD
+  EWMA standard deviations from the EWMA mean. The price is not accepted,
+  so one mis-parsed value neither shifts the baseline nor flags the next day.
+- level_shift: the SHIFT_RUN-th consecutive spike in the same direction.
+  The new level becomes the baseline.
+- regime_shift: the CUSUM crossed CUSUM_LIMIT, i.e. the price has trended
+  in one direction for longer than a random walk plausibly would. The
+  reference is a zero mean return, not the EWMA mean, which would follow
+  the trend. The CUSUM restarts.
+
+Rows of a batch are scored in rounds: round j holds each symbol's j-th new
+row, and a round is one set of NumPy operations over the symbols in it. A
+day's batch for every symbol is a single round.
+
+Run with: python anomaly_detection.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from price_index import DEFAULT_VALUE_COLUMN
+
+# EWMA span of the return mean and variance, in observations
+EWMA_SPAN = 30
+ALPHA = 2 / (EWMA_SPAN + 1)
+
+# Returns seen before a symbol's prices are flagged
+WARMUP = 10
+Z_THRESHOLD = 6.0
+SHIFT_RUN = 3
+
+# CUSUM allowance and decision limit, in standard deviations
+CUSUM_K = 0.25
+CUSUM_LIMIT = 10.0
+
+# Volatility floor, so pegged or flat series do not divide by zero
+MIN_SIGMA = 1e-4
+
+FLAGS = ['', 'invalid', 'spike', 'level_shift', 'regime_shift']
+INVALID, SPIKE, LEVEL_SHIFT, REGIME_SHIFT = 1, 2, 3, 4
+
+TABLE_COLUMNS = ['date', 'symbol', 'price', 'z_score', 'cusum', 'flag']
+
+
+# ============================================================================
+# STREAMING DETECTOR
+# ============================================================================
+
+class AnomalyDetector:
+    """Per-symbol EWMA and CUSUM state held in arrays, one slot per symbol"""
+
+    _STATE = ['last', 'mean', 'var', 'n', 'run', 'cusum_pos', 'cusum_neg']
+
+    def __init__(self):
+        self.slots = {}
+        self.last = np.empty(0)
+        self.mean = np.empty(0)
+        self.var = np.empty(0)
+        self.n = np.empty(0, dtype=np.int64)
+        self.run = np.empty(0, dtype=np.int64)  # signed count of consecutive spikes
+        self.cusum_pos = np.empty(0)
+        self.cusum_neg = np.empty(0)
+
+    def copy(self):
+        detector = AnomalyDetector()
+        detector.slots = dict(self.slots)
+        for name in self._STATE:
+            setattr(detector, name, getattr(self, name).copy())
+        return detector
+
+    def _slots_for(self, symbols):
+        """Slot of each symbol, adding state for symbols not seen before"""
+        new = [s for s in dict.fromkeys(symbols) if s not in self.slots]
+        if new:
+            grow, base = len(new), len(self.slots)
+            self.slots.update((s, base + i) for i, s in enumerate(new))
+            self.last = np.r_[self.last, np.full(grow, np.nan)]
+            for name in ['mean', 'var', 'cusum_pos', 'cusum_neg']:
+                setattr(self, name, np.r_[getattr(self, name), np.zeros(grow)])
+            for name in ['n', 'run']:
+                setattr(self, name, np.r_[getattr(self, name), np.zeros(grow, dtype=np.int64)])
+        return np.array([self.slots[s] for s in symbols], dtype=np.int64)
+
+    def score(self, symbols, prices, rank=None):
+        """
+        Score rows and fold them into the state. Returns (z, cusum, flag)
+        arrays in row order.
+
+        Each symbol's rows must be in date order. `rank` is each row's
+        position among its symbol's rows; it is computed when not given.
+        """
+        slots = self._slots_for(list(symbols))
+        prices = np.asarray(prices, dtype=float)
+        if rank is None:
+            order = np.argsort(slots, kind='stable')
+            starts = np.r_[0, np.flatnonzero(np.diff(slots[order])) + 1]
+            counts = np.diff(np.r_[starts, len(order)])
+            rank = np.empty(len(slots), dtype=np.int64)
+            rank[order] = np.arange(len(order)) - np.repeat(starts, counts)
+
+        z = np.full(len(slots), np.nan)
+        cusum = np.zeros(len(slots))
+        flag = np.zeros(len(slots), dtype=np.int8)
+
+        by_round = np.argsort(rank, kind='stable')
+        bounds = np.searchsorted(rank[by_round], np.arange(rank.max() + 2) if len(rank) else [0])
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            rows = by_round[start:stop]
+            z[rows], cusum[rows], flag[rows] = self._step(slots[rows], prices[rows])
+        return z, cusum, flag
+
+    def _step(self, s, p):
+        """One new price for each of the (distinct) slots `s`"""
+        last, mean, var, n, run = self.last[s], self.mean[s], self.var[s], self.n[s], self.run[s]
+
+        invalid = p <= 0
+        valid = (p > 0) & (p != last)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.log(p / last)
+        sigma = np.sqrt(np.maximum(var, MIN_SIGMA ** 2))
+        z = np.where(valid, (r - mean) / sigma, np.nan)
+        warm = n >= WARMUP
+
+        spike = valid & warm & (np.abs(z) > Z_THRESHOLD)
+        direction = np.sign(np.nan_to_num(z)).astype(np.int64)
+        run = np.where(spike, np.where(np.sign(run) == direction, run + direction, direction),
+                       np.where(valid, 0, run))
+        shift = spike & (np.abs(run) >= SHIFT_RUN)
+        accepted = valid & ~spike
+        update = accepted & np.isfinite(r)
+
+        # EWMA starts as a plain running mean/variance until it has EWMA_SPAN returns
+        alpha = np.maximum(ALPHA, 1 / (n + 1))
+        delta = np.where(update, r - mean, 0.0)
+        self.mean[s] = mean + alpha * delta
+        self.var[s] = np.where(update, (1 - alpha) * (var + alpha * delta ** 2), var)
+        self.n[s] = n + update
+
+        zc = np.where(update & warm, np.clip(r / sigma, -Z_THRESHOLD, Z_THRESHOLD), 0.0)
+        pos = np.maximum(0.0, self.cusum_pos[s] + zc - CUSUM_K * (update & warm))
+        neg = np.maximum(0.0, self.cusum_neg[s] - zc - CUSUM_K * (update & warm))
+        cusum = np.maximum(pos, neg)
+        regime = update & warm & (cusum > CUSUM_LIMIT)
+        restart = regime | shift
+        self.cusum_pos[s] = np.where(restart, 0.0, pos)
+        self.cusum_neg[s] = np.where(restart, 0.0, neg)
+
+        self.run[s] = np.where(shift, 0, run)
+        self.last[s] = np.where(accepted | shift, p, last)
+
+        flag = np.select([invalid, shift, spike, regime], [INVALID, LEVEL_SHIFT, SPIKE, REGIME_SHIFT], 0)
+        return z, cusum, flag
+
+
+# ============================================================================
+# FLAGGED ROWS OF THE PRICE TABLE
+# ============================================================================
+
+def flagged_table(dates, symbols, prices, z, cusum, flag):
+    """Rows with a flag, in the layout of PriceAnomalies.table"""
+    keep = flag > 0
+    return pd.DataFrame({
+        'date': np.asarray(dates)[keep],
+        'symbol': np.asarray(symbols, dtype=object)[keep],
+        'price': np.asarray(prices, dtype=float)[keep],
+        'z_score': z[keep],
+        'cusum': cusum[keep],
+        'flag': np.asarray(FLAGS, dtype=object)[flag[keep]],
+    }, columns=TABLE_COLUMNS)
+
+
+class PriceAnomalies:
+    """Detector state after every price in the table, and the rows it flagged"""
+
+    def __init__(self, price_index, column=DEFAULT_VALUE_COLUMN):
+        self.column = column
+        self.detector = AnomalyDetector()
+
+        # The index is sorted by (symbol, date): each row's rank is its offset in its symbol's slice
+        symbols = np.empty(len(price_index), dtype=object)
+        rank = np.empty(len(price_index), dtype=np.int64)
+        for symbol, (start, stop) in price_index.offsets.items():
+            symbols[start:stop] = symbol
+            rank[start:stop] = np.arange(stop - start)
+        prices = price_index.column(column)
+        scores = self.detector.score(symbols, prices, rank)
+        self.table = flagged_table(price_index.column('date'), symbols, prices, *scores)
+
+    def appended(self, df_new):
+        """New PriceAnomalies with rows dated after each symbol's last row scored in"""
+        df_new = df_new.sort_values(['symbol', 'date'], kind='stable')
+        symbols = df_new['symbol'].astype(str).to_numpy()
+        prices = df_new[self.column].to_numpy(dtype=float)
+
+        result = PriceAnomalies.__new__(PriceAnomalies)
+        result.column = self.column
+        result.detector = self.detector.copy()
+        scores = result.detector.score(symbols, prices)
+        flagged = flagged_table(df_new['date'].to_numpy(), symbols, prices, *scores)
+        result.table = pd.concat([self.table, flagged], ignore_index=True) if len(flagged) else self.table
+        return result
+
+    def recent(self, since=None):
+        """Flagged rows, newest first, optionally only those on or after `since`"""
+        table = self.table if since is None else self.table[self.table['date'] >= pd.Timestamp(since)]
+        return table.sort_values(['date', 'symbol'], ascending=[False, True], ignore_index=True)
+
+    def for_symbol(self, symbol):
+        return self.table[self.table['symbol'] == symbol]
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    import time
+
+    from data_store import load_dataset
+    from price_index import PriceIndex
+
+    price_index = PriceIndex(load_dataset('prices'))
+    start = time.perf_counter()
+    anomalies = PriceAnomalies(price_index)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(price_index):,} prices in {elapsed * 1000:.1f} ms "
+          f"({elapsed / max(len(price_index), 1) * 1e6:.2f} µs per row)")
+    print(anomalies.recent().to_string(index=False) if len(anomalies.table) else "No anomalies")
@@ -0,0 +1,277 @@
+"""
+Forecast & Metrics API
+
+Headless JSON API over the same data layer as the dashboard: the live
+datasets (with incremental refresh), the per-symbol price index and
+statistics, and the multi-horizon forecaster. No Streamlit script runs.
+
+Rendered responses are kept in an LRU keyed by (path, query, data version)
+and carry an ETag derived from that key, so repeated polls are answered
+from memory and clients sending If-None-Match get a bodiless 304.
+
+Endpoints:
+    GET /health
+    GET /prices                      latest statistics for every symbol
+    GET /prices/{symbol}?start=&end= price series for one symbol
+    GET /forecast?horizons=1,7,30    latest multi-horizon forecast
+    GET /metrics/walk_forward        walk-forward validation metrics
+    GET /metrics/multi_step          per-horizon backtest summary
+
+Run with: uvicorn api:app --port 8000
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.routing import Route
+
+from downsampling import date_window
+from figure_cache import FigureCache
+from forecast_engine import load_forecaster
+from shared_store import open_live_datasets
+
+# Seconds between checks of the data files for changes
+REFRESH_INTERVAL_S = 1.0
+RESPONSE_CACHE_ENTRIES = 1024
+
+
+class ApiError(Exception):
+    """Error returned to the client as a JSON body with an HTTP status"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+# ============================================================================
+# SHARED STATE
+# ============================================================================
+
+class ApiState:
+    """Lazily created datasets, forecaster and response cache for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._live = None
+        self._forecaster = None
+        self._checked_at = 0.0
+        self.responses = FigureCache(max_entries=RESPONSE_CACHE_ENTRIES)
+
+    def snapshot(self):
+        """Current data snapshot, checking the files at most every REFRESH_INTERVAL_S"""
+        with self._lock:
+            if self._live is None:
+                self._live = open_live_datasets()
+        now = time.monotonic()
+        if now - self._checked_at >= REFRESH_INTERVAL_S:
+            self._checked_at = now
+            snapshot = self._live.refresh()
+            self.responses.retain(snapshot['version'])
+            return snapshot
+        return self._live.snapshot()
+
+    def forecaster(self, df_prices):
+        with self._lock:
+            if self._forecaster is None:
+                self._forecaster = load_forecaster(df_prices)
+            return self._forecaster
+
+
+state = ApiState()
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _json_default(value):
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).date().isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _encode(payload):
+    return json.dumps(payload, default=_json_default, allow_nan=False).encode()
+
+
+def _finite(value):
+    """Float, or None for NaN/inf (JSON has no NaN)"""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+async def cached_json(request, build):
+    """
+    JSON response for `build(snapshot)`, served from the response cache and
+    answered with 304 when the client's ETag is current.
+    """
+    snapshot = await run_in_threadpool(state.snapshot)
+    query = tuple(sorted(request.query_params.multi_items()))
+    key = (request.url.path, query)
+
+    def render():
+        try:
+            body, status = _encode(build(snapshot)), 200
+        except ApiError as exc:
+            body, status = _encode({'error': exc.message}), exc.status_code
+        digest = hashlib.sha1(repr((key, snapshot['version'])).encode()).hexdigest()[:16]
+        return body, status, f'"{digest}"'
+
+    body, status, etag = await run_in_threadpool(state.responses.get, key[0], key[1], snapshot['version'], render)
+
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if status == 200 and etag in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+    return Response(body, status_code=status, media_type='application/json', headers=headers)
+
+
+def _require(snapshot, name):
+    if snapshot.get(name) is None:
+        raise ApiError(503, f"Dataset '{name}' is not available")
+    return snapshot[name]
+
+
+# ============================================================================
+# ENDPOINTS
+# ============================================================================
+
+async def health(request):
+    return await cached_json(request, lambda snapshot: {'status': 'ok', 'data_version': snapshot['version']})
+
+
+async def list_prices(request):
+    def build(snapshot):
+        stats = _require(snapshot, 'price_stats').table
+        return {
+            'data_version': snapshot['version'],
+            'symbols': [
+                {
+                    'symbol': symbol,
+                    'last': _finite(row['last']),
+                    'last_date': row['last_date'],
+                    'mean_30d': _finite(row['mean_30d']),
+                    'std_30d': _finite(row['std_30d']),
+                }
+                for symbol, row in stats.iterrows()
+            ],
+        }
+    return await cached_json(request, build)
+
+
+async def symbol_prices(request):
+    symbol = request.path_params['symbol']
+    start = request.query_params.get('start')
+    end = request.query_params.get('end')
+
+    def build(snapshot):
+        price_index = _require(snapshot, 'price_index')
+        if symbol not in price_index:
+            raise ApiError(404, f"Unknown symbol '{symbol}'")
+        try:
+            window = date_window(price_index.dates(symbol), start, end)
+        except ValueError:
+            raise ApiError(400, "start/end must be ISO dates (YYYY-MM-DD)")
+
+        dates = price_index.dates(symbol)[window]
+        values = price_index.values(symbol)[window]
+        return {
+            'symbol': symbol,
+            'data_version': snapshot['version'],
+            'n': len(values),
+            'dates': [pd.Timestamp(d).date().isoformat() for d in dates],
+            'price_mid_usd_mt': [_finite(v) for v in values],
+        }
+    return await cached_json(request, build)
+
+
+async def forecast(request):
+    requested = request.query_params.get('horizons')
+
+    def build(snapshot):
+        price_index = _require(snapshot, 'price_index')
+        forecaster = state.forecaster(snapshot['prices'])
+        # One feature_row call, so the forecasts and as_of come from the same row
+        row, as_of = forecaster.feature_row(price_index, snapshot['version'])
+        df_pred = pd.DataFrame({
+            'horizon': forecaster.horizons,
+            'date': [as_of + pd.Timedelta(days=h) for h in forecaster.horizons],
+            'forecast': forecaster.predict(row),
+        })
+
+        if requested:
+            try:
+                horizons = [int(h) for h in requested.split(',') if h.strip()]
+            except ValueError:
+                raise ApiError(400, "horizons must be a comma-separated list of integers")
+            unknown = sorted(set(horizons) - set(forecaster.horizons))
+            if unknown:
+                raise ApiError(400, f"Unsupported horizons {unknown}; available: {forecaster.horizons}")
+            df_pred = df_pred[df_pred['horizon'].isin(horizons)]
+
+        return {
+            'target': forecaster.artifact['target'],
+            'as_of': as_of,
+            'data_version': snapshot['version'],
+            'forecasts': [
+                {'horizon': int(h), 'date': d, 'forecast': _finite(f)}
+                for h, d, f in df_pred.itertuples(index=False)
+            ],
+        }
+    return await cached_json(request, build)
+
+
+async def walk_forward_metrics(request):
+    def build(snapshot):
+        df_wf = _require(snapshot, 'walk_forward')
+        ss_tot = np.sum((df_wf['actual'] - df_wf['actual'].mean()) ** 2)
+        return {
+            'data_version': snapshot['version'],
+            'n_folds': len(df_wf),
+            'mae': _finite(df_wf['mae'].mean()),
+            'mape': _finite(df_wf['mape'].mean()),
+            'r2': _finite(1 - np.sum(df_wf['error'] ** 2) / ss_tot) if ss_tot > 0 else None,
+            'folds': [
+                {
+                    'fold': int(row.fold),
+                    'test_date': row.test_date,
+                    'actual': _finite(row.actual),
+                    'predicted': _finite(row.predicted),
+                    'error': _finite(row.error),
+                }
+                for row in df_wf.itertuples(index=False)
+            ],
+        }
+    return await cached_json(request, build)
+
+
+async def multi_step_metrics(request):
+    def build(snapshot):
+        df_summary = _require(snapshot, 'multi_step_summary')
+        return {
+            'data_version': snapshot['version'],
+            'horizons': [
+                {column: _finite(value) for column, value in row.items()}
+                for row in df_summary.to_dict(orient='records')
+            ],
+        }
+    return await cached_json(request, build)
+
+
+app = Starlette(routes=[
+    Route('/health', health),
+    Route('/prices', list_prices),
+    Route('/prices/{symbol}', symbol_prices),
+    Route('/forecast', forecast),
+    Route('/metrics/walk_forward', walk_forward_metrics),
+    Route('/metrics/multi_step', multi_step_metrics),
+])
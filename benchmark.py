@@ -0,0 +1,370 @@
+"""
+Dashboard Benchmark
+
+Times the dashboard's data path and page rendering on synthetic price
+histories of configurable size, and records peak memory per stage.
+
+For each size (symbols x years) a synthetic table in the schema of
+steel_prices_synthetic_with_external.csv is written to a scratch copy of the
+data directory. The stages then run against it:
+    load_csv / load_parquet   LiveDatasets cold start without / with Parquet copies
+    refresh_noop / refresh_append
+    filter_mask / filter_index   every symbol's rows, boolean mask vs PriceIndex
+    stats_table, lag_features, forecaster_fit, forecast, figures
+    page_<name> / page_<name>_rerun   AppTest run with cleared caches / warm rerun
+
+Timings are the median of --repeat runs. Peak memory comes from one extra
+run under tracemalloc, so tracing never slows the timed runs. Results are
+written as JSON; --compare reports the ratio against an earlier file and
+exits non-zero when a stage slowed down past --threshold.
+
+Run with: python benchmark.py [--symbols 17,50] [--years 1,5] [--repeat 3]
+          python benchmark.py --compare baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from charts import (
+    actual_vs_predicted_figure, error_bar_figure, error_histogram_figure, horizon_mae_figure,
+    price_history_figure, rebar_trend_figure,
+)
+from data_refresh import LiveDatasets
+from data_store import DATASETS, MULTI_STEP_STORE, VALIDATION_DIR
+from downsampling import downsample, points_for_width
+from feature_engineering import build_lag_features, wide_prices
+from forecast_engine import MODEL_FILE, Forecaster, fit, save_artifact
+from price_stats import PriceStats
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS in the metadata
+    resource = None
+
+REPO_DIR = Path(__file__).resolve().parent
+DASHBOARD = REPO_DIR / "dashboard.py"
+OUTPUT_FILE = Path("benchmark_results.json")
+
+PAGES = ["📊 Overview", "📈 Price History", "🔮 Forecasts", "✅ Model Performance", "💼 Business Value"]
+
+# The pages reference the original symbols by name, so every size includes them
+MIN_SYMBOLS = 17
+END_DATE = "2025-08-20"
+
+
+# ============================================================================
+# SYNTHETIC DATA
+# ============================================================================
+
+def _base_symbols():
+    """Per-symbol metadata and last price from the shipped synthetic CSV"""
+    df = pd.read_csv(REPO_DIR / DATASETS['prices']['csv'])
+    first = df.drop_duplicates('symbol').set_index('symbol')
+    last = df.groupby('symbol', sort=False)['price_mid'].last()
+    return first[['source', 'currency', 'unit', 'description']].assign(level=last)
+
+
+def generate_prices(n_symbols, years, seed=0):
+    """
+    Long-format daily prices for `n_symbols` x `years`, in the layout of
+    steel_prices_synthetic_with_external.csv. The original symbols come
+    first; extra ones are synthetic_NNN series in USD/mt.
+    """
+    base = _base_symbols()
+    n_extra = max(n_symbols - len(base), 0)
+    extra = pd.DataFrame({
+        'source': 'Synthetic_Benchmark',
+        'currency': 'USD',
+        'unit': 'USD/mt',
+        'description': [f"Synthetic Benchmark Series {i}" for i in range(n_extra)],
+        'level': 500.0,
+    }, index=[f"synthetic_{i:03d}" for i in range(n_extra)])
+    meta = pd.concat([base.iloc[:n_symbols], extra])
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=END_DATE, periods=365 * years, freq='D')
+    # Geometric random walk per symbol, ending near each symbol's real level
+    steps = rng.normal(0.0, 0.01, size=(len(meta), len(dates)))
+    paths = np.exp(np.cumsum(steps, axis=1) - np.cumsum(steps, axis=1)[:, -1:])
+    mid = (meta['level'].to_numpy()[:, None] * paths).ravel()
+    spread = 0.005 * mid
+
+    rep = np.repeat(np.arange(len(meta)), len(dates))
+    df = pd.DataFrame({
+        'date': np.tile(dates.strftime('%Y-%m-%d'), len(meta)),
+        'source': meta['source'].to_numpy()[rep],
+        'symbol': meta.index.to_numpy()[rep],
+        'price_low': mid - spread,
+        'price_mid': mid,
+        'price_high': mid + spread,
+        'currency': meta['currency'].to_numpy()[rep],
+        'unit': meta['unit'].to_numpy()[rep],
+    })
+    df['price_low_usd_mt'] = df['price_low']
+    df['price_mid_usd_mt'] = df['price_mid']
+    df['price_high_usd_mt'] = df['price_high']
+    df['description'] = meta['description'].to_numpy()[rep]
+    return df
+
+
+@contextmanager
+def scratch_workspace(df_prices):
+    """
+    Temporary working directory holding the synthetic prices plus copies of
+    the validation results and model, with the process cwd switched to it.
+    """
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="dashboard_bench_") as tmp:
+        work = Path(tmp)
+        prices_csv = work / DATASETS['prices']['csv']
+        prices_csv.parent.mkdir(parents=True)
+        df_prices.to_csv(prices_csv, index=False)
+
+        (work / VALIDATION_DIR).mkdir(parents=True)
+        for csv_path in (REPO_DIR / VALIDATION_DIR).glob("*.csv"):
+            shutil.copy(csv_path, work / VALIDATION_DIR / csv_path.name)
+        if (REPO_DIR / MULTI_STEP_STORE).is_dir():
+            shutil.copytree(REPO_DIR / MULTI_STEP_STORE, work / MULTI_STEP_STORE)
+        (work / MODEL_FILE).parent.mkdir(parents=True)
+
+        os.chdir(work)
+        try:
+            yield work
+        finally:
+            os.chdir(cwd)
+
+
+def remove_parquet_copies(work):
+    for path in Path(work).rglob("*.parquet"):
+        if path.is_file():
+            path.unlink()
+
+
+def append_day(csv_path, df_prices):
+    """Append one more day for every symbol, as a daily update would"""
+    last = df_prices.groupby('symbol', sort=False).tail(1).copy()
+    last['date'] = (pd.to_datetime(last['date']) + pd.Timedelta(days=1)).dt.strftime('%Y-%m-%d')
+    with open(csv_path, 'a') as f:
+        last.to_csv(f, header=False, index=False)
+    return pd.concat([df_prices, last], ignore_index=True)
+
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def measure(run, repeat, setup=None):
+    """
+    Median and min seconds of `run()` over `repeat` runs, and the peak
+    traced allocation of one extra run. `setup()` runs untimed before each.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'repeats': repeat, 'peak_bytes': peak}
+
+
+class PageRun:
+    """
+    One dashboard page under AppTest. `prepare()` opens the app and clears
+    every Streamlit cache; `run()` then renders the page cold, and calling
+    `run()` again renders it warm.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.at = None
+
+    def prepare(self):
+        import streamlit as st
+        from streamlit.logger import set_log_level
+        from streamlit.testing.v1 import AppTest
+
+        # Cache clears outside a server log a warning each time
+        set_log_level("error")
+        self.at = AppTest.from_file(str(DASHBOARD), default_timeout=600).run()
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        self.at.sidebar.radio[0].set_value(self.page)
+
+    def run(self):
+        self.at.run()
+        if self.at.exception:
+            raise RuntimeError(f"{self.page}: {self.at.exception[0].value}")
+
+
+def benchmark_size(n_symbols, years, repeat, pages=True):
+    """Every stage for one table size. Returns a list of result rows"""
+    df_prices = generate_prices(n_symbols, years)
+    size = {'symbols': n_symbols, 'years': years, 'rows': len(df_prices)}
+    results = []
+
+    def record(stage, result):
+        results.append({**size, 'stage': stage, **result})
+        print(f"  {stage:<32} {result['median_s'] * 1000:10.1f} ms  peak {result['peak_bytes'] / 2**20:8.1f} MB")
+
+    with scratch_workspace(df_prices) as work:
+        prices_csv = DATASETS['prices']['csv']
+        size['csv_bytes'] = prices_csv.stat().st_size
+
+        # Data path
+        record('load_csv', measure(LiveDatasets, repeat, setup=lambda: remove_parquet_copies(work)))
+        record('load_parquet', measure(LiveDatasets, repeat))
+
+        live = LiveDatasets()
+        record('refresh_noop', measure(live.refresh, repeat))
+        state = {'df': df_prices}
+        record('refresh_append', measure(
+            live.refresh, repeat, setup=lambda: state.update(df=append_day(prices_csv, state['df']))
+        ))
+
+        snapshot = live.refresh()
+        df, price_index = snapshot['prices'], snapshot['price_index']
+        symbols = price_index.symbols
+        record('filter_mask', measure(lambda: [df[df['symbol'] == s] for s in symbols], repeat))
+        record('filter_index', measure(lambda: [price_index.frame(s) for s in symbols], repeat))
+        record('stats_table', measure(lambda: PriceStats(price_index), repeat))
+        record('lag_features', measure(lambda: build_lag_features(wide_prices(df)), repeat))
+
+        # Model: fitted once on the synthetic table and saved for the pages
+        artifact = {}
+        record('forecaster_fit', measure(lambda: artifact.update(fit(df)), 1))
+        save_artifact(artifact)
+        record('forecast', measure(lambda: Forecaster(artifact).forecast(price_index), repeat))
+
+        # Figures, built the way each page builds them
+        def build_figures():
+            n_points = points_for_width()
+            series = [(s, *downsample(price_index.dates(s), price_index.values(s), n_points))
+                      for s in ['rebar_uae_import', 'brent_crude_oil', 'iron_ore_62fe_cfr_china']]
+            figs = [rebar_trend_figure(price_index.frame('rebar_uae_import').tail(90)), price_history_figure(series)]
+            figs += [actual_vs_predicted_figure(snapshot[f'multi_step_{h}d'], h) for h in snapshot['horizons']]
+            if snapshot['walk_forward'] is not None:
+                figs += [error_bar_figure(snapshot['walk_forward']), error_histogram_figure(snapshot['walk_forward'])]
+            if snapshot['multi_step_summary'] is not None:
+                figs.append(horizon_mae_figure(snapshot['multi_step_summary']))
+            return figs
+        record('figures', measure(build_figures, repeat))
+
+        # Pages, headless
+        if pages:
+            for page in PAGES:
+                name = page.split(' ', 1)[1].lower().replace(' ', '_')
+                page_run = PageRun(page)
+                record(f'page_{name}', measure(page_run.run, repeat, setup=page_run.prepare))
+                record(f'page_{name}_rerun', measure(page_run.run, repeat))
+
+    return results
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def run_metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print current/baseline time ratios per (size, stage). Returns stages past `threshold`"""
+    key = lambda row: (row['symbols'], row['years'], row['stage'])
+    before = {key(row): row for row in baseline['results']}
+    regressions = []
+    print(f"\n{'size':>10} {'stage':<32} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for row in current['results']:
+        old = before.get(key(row))
+        if old is None or old['median_s'] == 0:
+            continue
+        ratio = row['median_s'] / old['median_s']
+        flag = "  SLOWER" if ratio > threshold else ""
+        print(f"{row['symbols']:>4}x{row['years']:<4}y {row['stage']:<32} "
+              f"{old['median_s'] * 1000:8.1f}ms {row['median_s'] * 1000:8.1f}ms {ratio:6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(key(row))
+    return regressions
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def _int_list(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard data path and pages")
+    parser.add_argument("--symbols", type=_int_list, default=[17, 50], help="Comma-separated symbol counts")
+    parser.add_argument("--years", type=_int_list, default=[1, 5], help="Comma-separated history lengths")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--no-pages", action="store_true", help="Skip the AppTest page runs")
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE)
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    if min(args.symbols) < MIN_SYMBOLS:
+        parser.error(f"--symbols must be at least {MIN_SYMBOLS} (the pages use the original symbols)")
+
+    output = args.output.resolve()
+    report = {'meta': run_metadata(), 'results': []}
+    for n_symbols in args.symbols:
+        for years in args.years:
+            print(f"{n_symbols} symbols x {years} years")
+            report['results'].extend(benchmark_size(n_symbols, years, args.repeat, pages=not args.no_pages))
+
+    if resource is not None:
+        # ru_maxrss is in KB on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report['meta']['max_rss_bytes'] = max_rss if sys.platform == 'darwin' else max_rss * 1024
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {len(report['results'])} results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} stages slower than {args.threshold:.2f}x baseline")
+            sys.exit(1)
@@ -0,0 +1,83 @@
+"""
+Business Value Scenarios
+
+The Business Value page's savings formula, evaluated over whole grids of
+inputs at once. Each parameter is a 1-D array of values. The arrays are
+broadcast against each other (np.ix_), so every combination of volume,
+price, baseline MAE and model MAE is computed in one vectorized expression.
+No Python loop runs over the scenarios.
+
+The model MAE axis can also be the per-fold MAEs of the walk-forward
+validation, so the spread of savings reflects how the model actually
+performed from fold to fold.
+
+Savings assume a fixed share of the error reduction is captured per tonne
+(SAVINGS_SHARE, the page's conservative 50%).
+"""
+
+import numpy as np
+import pandas as pd
+
+SAVINGS_SHARE = 0.5
+
+# Grid axes, in the order of the result arrays
+PARAMETERS = ['volume', 'price', 'baseline_mae', 'model_mae']
+PARAMETER_LABELS = {
+    'volume': "Monthly Volume (mt)",
+    'price': "Price (USD/mt)",
+    'baseline_mae': "Baseline MAE (USD/mt)",
+    'model_mae': "Model MAE (USD/mt)",
+}
+
+DEFAULT_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def savings(volume, price, baseline_mae, model_mae, share=SAVINGS_SHARE):
+    """
+    Annual savings (USD) and ROI (% of annual spend) for every combination
+    of the inputs. The inputs are 1-D arrays (or scalars), and the results
+    have shape (len(volume), len(price), len(baseline_mae), len(model_mae)).
+    """
+    v, p, b, m = np.ix_(*(np.atleast_1d(np.asarray(a, dtype=float)) for a in (volume, price, baseline_mae, model_mae)))
+    annual_savings = (b - m) * share * v * 12
+    roi_pct = 100 * annual_savings / (v * p * 12)
+    # Savings do not depend on price; repeat them along that axis without copying
+    return np.broadcast_to(annual_savings, roi_pct.shape), roi_pct
+
+
+def reduce_to_axes(grid, x, y, percentile=50):
+    """
+    2-D (y, x) view of a scenario grid: the given percentile over every
+    parameter other than `x` and `y`
+    """
+    ix, iy = PARAMETERS.index(x), PARAMETERS.index(y)
+    rest = [axis for axis in range(grid.ndim) if axis not in (ix, iy)]
+    moved = np.moveaxis(grid, [iy, ix] + rest, range(grid.ndim))
+    return np.percentile(moved.reshape(grid.shape[iy], grid.shape[ix], -1), percentile, axis=2)
+
+
+def percentile_table(grids, percentiles=DEFAULT_PERCENTILES):
+    """Percentiles over every scenario, one row per named grid"""
+    return pd.DataFrame(
+        {name: np.percentile(grid, percentiles) for name, grid in grids.items()},
+        index=[f"P{p:g}" for p in percentiles],
+    ).T
+
+
+def scenario_summary(axes, x, y, heatmap_percentile=50, percentiles=DEFAULT_PERCENTILES, share=SAVINGS_SHARE):
+    """
+    Heatmap matrix and percentile table for a grid of scenarios.
+
+    `axes` maps each name in PARAMETERS to its array of values.
+    """
+    annual, roi = savings(*(axes[name] for name in PARAMETERS), share=share)
+    table = percentile_table({'Annual Savings (USD)': annual, 'ROI (% of spend)': roi}, percentiles)
+    # Monthly savings are annual / 12, so their percentiles are too
+    table.loc['Monthly Savings (USD)'] = table.loc['Annual Savings (USD)'] / 12
+    table = table.loc[['Annual Savings (USD)', 'Monthly Savings (USD)', 'ROI (% of spend)']]
+    return {
+        'heatmap': reduce_to_axes(annual, x, y, heatmap_percentile),
+        'percentiles': table,
+        'n_scenarios': annual.size,
+        'share_positive': float((annual > 0).mean()),
+    }
@@ -0,0 +1,265 @@
+"""
+Dashboard Charts
+
+Plotly figure builders for the dashboard pages. They take plain frames and
+arrays and never touch Streamlit, so the same figures can be cached,
+pre-rendered or served outside the app.
+"""
+
+import plotly.graph_objects as go
+
+
+def rebar_trend_figure(df_rebar):
+    """Overview: recent UAE rebar import price"""
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=df_rebar['date'],
+        y=df_rebar['price_mid_usd_mt'],
+        mode='lines',
+        name='Rebar Price',
+        line=dict(color='#1f77b4', width=2),
+        fill='tozeroy',
+        fillcolor='rgba(31, 119, 180, 0.1)'
+    ))
+
+    fig.update_layout(
+        title="UAE Rebar Import Price (CFR Jebel Ali)",
+        xaxis_title="Date",
+        yaxis_title="Price (USD/mt)",
+        hovermode='x unified',
+        height=400
+    )
+
+    return fig
+
+
+def price_history_figure(series, df_flagged=None):
+    """
+    Price History: one line per symbol from (symbol, dates, values) tuples,
+    with flagged prices (rows of PriceAnomalies.table) marked
+    """
+    fig = go.Figure()
+
+    for symbol, dates, values in series:
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=values,
+            mode='lines',
+            name=symbol.replace('_', ' ').title()
+        ))
+
+    if df_flagged is not None and len(df_flagged):
+        fig.add_trace(go.Scatter(
+            x=df_flagged['date'],
+            y=df_flagged['price'],
+            mode='markers',
+            name='Anomaly',
+            marker=dict(color='red', symbol='x', size=10),
+            customdata=df_flagged[['symbol', 'flag']],
+            hovertemplate="%{customdata[0]}: %{y:,.2f} (%{customdata[1]})<extra></extra>"
+        ))
+
+    fig.update_layout(
+        title="Historical Prices",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        hovermode='x unified',
+        height=500,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    return fig
+
+
+def actual_vs_predicted_figure(df_h, horizon):
+    """Forecasts: backtest actuals against predictions for one horizon"""
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=df_h['test_date'],
+        y=df_h['actual'],
+        mode='lines+markers',
+        name='Actual',
+        line=dict(color='blue')
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=df_h['test_date'],
+        y=df_h['predicted'],
+        mode='lines+markers',
+        name='Predicted',
+        line=dict(color='red', dash='dash')
+    ))
+
+    fig.update_layout(
+        title=f"{horizon}-Day Ahead: Actual vs Predicted",
+        xaxis_title="Date",
+        yaxis_title="Price (USD/mt)",
+        hovermode='x unified',
+        height=400
+    )
+
+    return fig
+
+
+def error_bar_figure(df_wf):
+    """Model Performance: walk-forward errors by test date"""
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=df_wf['test_date'],
+        y=df_wf['error'],
+        name='Error',
+        marker_color=['red' if e < 0 else 'green' for e in df_wf['error']]
+    ))
+
+    fig.add_hline(y=0, line_dash="dash", line_color="black")
+
+    fig.update_layout(
+        title="Prediction Errors by Date",
+        xaxis_title="Date",
+        yaxis_title="Error (USD/mt)",
+        showlegend=False,
+        height=400
+    )
+
+    return fig
+
+
+def error_histogram_figure(df_wf):
+    """Model Performance: distribution of walk-forward errors"""
+    fig = go.Figure(data=[go.Histogram(
+        x=df_wf['error'],
+        nbinsx=20,
+        name='Error Distribution',
+        marker_color='lightblue'
+    )])
+
+    fig.update_layout(
+        title="Distribution of Prediction Errors",
+        xaxis_title="Error (USD/mt)",
+        yaxis_title="Frequency",
+        showlegend=False,
+        height=350
+    )
+
+    return fig
+
+
+def horizon_mae_figure(df_summary):
+    """Model Performance: MAE for each forecast horizon"""
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=[f"{int(h)}-Day" for h in df_summary['Horizon (days)']],
+        y=df_summary['MAE ($/mt)'],
+        name='MAE',
+        marker_color='lightblue'
+    ))
+
+    fig.update_layout(
+        title="MAE by Forecast Horizon",
+        xaxis_title="Horizon",
+        yaxis_title="MAE (USD/mt)",
+        showlegend=False,
+        height=350
+    )
+
+    return fig
+
+
+def scenario_heatmap_figure(x_values, y_values, z, x_label, y_label, percentile):
+    """Business Value: annual savings over two scenario parameters"""
+    fig = go.Figure(data=go.Heatmap(
+        x=x_values,
+        y=y_values,
+        z=z,
+        colorscale='RdYlGn',
+        zmid=0,
+        colorbar=dict(title="USD/yr"),
+        hovertemplate=f"{x_label}: %{{x:,.4g}}<br>{y_label}: %{{y:,.4g}}<br>Savings: $%{{z:,.0f}}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title=f"Annual Savings (P{percentile:g} over the other parameters)",
+        xaxis_title=x_label,
+        yaxis_title=y_label,
+        height=500
+    )
+
+    return fig
+
+
+def _label(symbol):
+    return symbol.replace('_', ' ').title()
+
+
+def correlation_matrix_figure(df_corr, window):
+    """Price History: correlation of daily returns over the latest window"""
+    labels = [_label(s) for s in df_corr.columns]
+    fig = go.Figure(data=go.Heatmap(
+        x=labels,
+        y=labels,
+        z=df_corr.to_numpy(),
+        colorscale='RdBu',
+        zmin=-1,
+        zmax=1,
+        colorbar=dict(title="Corr"),
+        hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title=f"Return Correlations (last {window} days)",
+        yaxis=dict(autorange='reversed'),
+        height=600
+    )
+
+    return fig
+
+
+def rolling_correlation_figure(df_rolling, target, window):
+    """Price History: rolling correlation of one symbol's returns with others"""
+    fig = go.Figure()
+
+    for symbol in df_rolling.columns:
+        fig.add_trace(go.Scatter(
+            x=df_rolling.index,
+            y=df_rolling[symbol],
+            mode='lines',
+            name=_label(symbol)
+        ))
+
+    fig.update_layout(
+        title=f"{window}-Day Rolling Correlation with {_label(target)}",
+        xaxis_title="Date",
+        yaxis_title="Correlation",
+        yaxis=dict(range=[-1, 1]),
+        hovermode='x unified',
+        height=400,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    return fig
+
+
+def lead_lag_figure(df_lead_lag, target):
+    """Price History: correlation of each symbol's returns with the target's returns `lag` days later"""
+    fig = go.Figure(data=go.Heatmap(
+        x=df_lead_lag.index,
+        y=[_label(s) for s in df_lead_lag.columns],
+        z=df_lead_lag.to_numpy().T,
+        colorscale='RdBu',
+        zmin=-1,
+        zmax=1,
+        colorbar=dict(title="Corr"),
+        hovertemplate="%{y} leads by %{x} days: %{z:.2f}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title=f"Lead-Lag Correlation with {_label(target)}",
+        xaxis_title="Lead (days)",
+        height=550
+    )
+
+    return fig
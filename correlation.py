@@ -0,0 +1,245 @@
+"""
+Correlation & Lead-Lag Engine
+
+Rolling correlation matrices and lead-lag cross-correlations between every
+pair of symbols, computed on daily log returns. Price levels are not used
+because trending series correlate whether or not their markets are linked.
+
+Rolling correlations for every date come from one pass of cumulative sums
+of the returns and of their outer products. The window sums at each date are
+differences of those cumulative sums, so the full (dates x symbols x
+symbols) history costs O(dates x symbols^2) whatever the window.
+
+Lead-lag correlations over the latest window start from the raw lagged
+product sums P[l, i, j] = sum_t r_i[t] r_j[t + l]. All lags 0..MAX_LAG
+(the feature files' lags) come from one FFT of the window. A positive
+correlation at lag l means moves in symbol i are followed, l days later, by
+moves in the same direction in symbol j.
+
+`CorrelationEngine.update()` extends the engine when days are appended. It
+slides the window sums and lagged sums by one day per new date, at
+O(lags x symbols^2) each. The prices already seen are compared with the
+index first; any other change to the history rebuilds it.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from feature_engineering import FEATURE_LAGS, daily_log_returns, latest_wide, wide_prices, wide_window
+
+MAX_LAG = max(FEATURE_LAGS)
+
+# Trailing windows offered, in trading days; each must exceed MAX_LAG
+WINDOWS = [60, 90, 180]
+DEFAULT_WINDOW = 90
+
+
+# ============================================================================
+# VECTORIZED KERNELS
+# ============================================================================
+
+def correlation_from_sums(sx, sxx, n):
+    """Correlation matrices from window sums: sx (..., k), sxx (..., k, k), n observations"""
+    cov = sxx - sx[..., :, None] * sx[..., None, :] / n
+    var = np.diagonal(cov, axis1=-2, axis2=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.sqrt(var[..., :, None] * var[..., None, :])
+    # A flat series over the window has no defined correlation
+    corr[~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def rolling_correlations(returns, window):
+    """(dates, k, k) correlation of each trailing `window` of returns; NaN until the first full window"""
+    n, k = returns.shape
+    out = np.full((n, k, k), np.nan)
+    if n < window:
+        return out
+
+    s1 = np.zeros((n + 1, k))
+    np.cumsum(returns, axis=0, out=s1[1:])
+    s2 = np.zeros((n + 1, k, k))
+    np.cumsum(returns[:, :, None] * returns[:, None, :], axis=0, out=s2[1:])
+
+    out[window - 1:] = correlation_from_sums(s1[window:] - s1[:-window], s2[window:] - s2[:-window], window)
+    return out
+
+
+def lagged_product_sums(x, max_lag=MAX_LAG):
+    """P[l, i, j] = sum_t x[t, i] * x[t + l, j] for l = 0..max_lag, all from one FFT"""
+    m = len(x)
+    n_fft = 1 << (2 * m - 1).bit_length()
+    f = np.fft.rfft(x, n=n_fft, axis=0)
+    return np.fft.irfft(f.conj()[:, :, None] * f[:, None, :], n=n_fft, axis=0)[:max_lag + 1]
+
+
+def lead_lag_from_sums(products, x):
+    """
+    Pearson correlation at each lag over the overlapping part of window `x`:
+    corr[l, i, j] = corr(x[t, i], x[t + l, j])
+    """
+    m = len(x)
+    lags = np.arange(len(products))
+    n = (m - lags)[:, None]
+
+    cs = np.vstack([np.zeros(x.shape[1]), np.cumsum(x, axis=0)])
+    cs2 = np.vstack([np.zeros(x.shape[1]), np.cumsum(x * x, axis=0)])
+    # Leaders use rows [0, m - l); followers use rows [l, m)
+    mean_a, mean_b = cs[m - lags] / n, (cs[m] - cs[lags]) / n
+    var_a = cs2[m - lags] / n - mean_a ** 2
+    var_b = (cs2[m] - cs2[lags]) / n - mean_b ** 2
+
+    cov = products / n[:, :, None] - mean_a[:, :, None] * mean_b[:, None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.sqrt(var_a[:, :, None] * var_b[:, None, :])
+    corr[~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+class _Rows:
+    """Array growing along axis 0 with amortized O(1) appends"""
+
+    def __init__(self, values):
+        self._data = np.asarray(values)
+        self.n = len(self._data)
+
+    def append(self, row):
+        if self.n == len(self._data):
+            grown = np.empty((max(2 * self.n, 16),) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self.n] = self._data[:self.n]
+            self._data = grown
+        self._data[self.n] = row
+        self.n += 1
+
+    @property
+    def values(self):
+        return self._data[:self.n]
+
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+class CorrelationEngine:
+    """Rolling and lead-lag correlations for one window, kept current with the price index"""
+
+    def __init__(self, window=DEFAULT_WINDOW, max_lag=MAX_LAG):
+        if window <= max_lag:
+            raise ValueError(f"Window ({window}) must be longer than the largest lag ({max_lag})")
+        self.window = window
+        self.max_lag = max_lag
+        self.version = None
+        self.symbols = None
+        self.last_date = None
+        self.latest_prices = None
+        self._lock = threading.Lock()
+
+    def update(self, price_index, version=None):
+        """Bring the engine up to date, appending new dates when the history is otherwise unchanged"""
+        with self._lock:
+            if version is not None and version == self.version:
+                return self
+            if self.symbols == price_index.symbols and self.last_date is not None:
+                # Every past price feeds the rolling history, so all of them must still match
+                seen_dates, seen = self._price_dates.values, self._prices.values
+                dates, prices = wide_window(price_index, seen_dates[0], self.last_date, self.symbols)
+                if np.array_equal(dates, seen_dates) and np.allclose(prices, seen, equal_nan=True):
+                    new_rows = latest_wide(price_index, after=self.last_date)
+                    for date, prices in zip(new_rows.index, new_rows.reindex(columns=self.symbols).to_numpy()):
+                        self._append(date, prices)
+                    self.version = version
+                    return self
+
+            self._build(wide_prices(price_index.df))
+            self.version = version
+            return self
+
+    def _build(self, wide):
+        self.symbols = list(wide.columns)
+        self.last_date = pd.Timestamp(wide.index[-1])
+        self.latest_prices = wide.to_numpy(dtype=float)[-1]
+        self._price_dates = _Rows(wide.index.to_numpy(dtype='datetime64[ns]'))
+        self._prices = _Rows(wide.to_numpy(dtype=float))
+
+        returns = daily_log_returns(wide)
+        self._dates = _Rows(wide.index[1:].to_numpy(dtype='datetime64[ns]'))
+        self._rolling = _Rows(rolling_correlations(returns, self.window))
+
+        self._recent = returns[-self.window:]
+        self._sx = self._recent.sum(axis=0)
+        self._sxx = self._recent.T @ self._recent
+        self._products = lagged_product_sums(self._recent, self.max_lag)
+
+    def _append(self, date, prices):
+        prices = np.where(np.isnan(prices), self.latest_prices, prices)
+        r = daily_log_returns(np.vstack([self.latest_prices, prices]))[0]
+        self.latest_prices = prices
+        self.last_date = pd.Timestamp(date)
+        self._price_dates.append(np.datetime64(self.last_date, 'ns'))
+        self._prices.append(prices)
+
+        lags = np.arange(self.max_lag + 1)
+        full = len(self._recent) == self.window
+        if full:
+            # Drop every pair that starts on the day leaving the window
+            old = self._recent[0]
+            self._products -= old[None, :, None] * self._recent[lags][:, None, :]
+            self._sx -= old
+            self._sxx -= np.outer(old, old)
+            self._recent = self._recent[1:]
+
+        self._recent = np.vstack([self._recent, r])
+        m = len(self._recent)
+        leaders = self._recent[np.clip(m - 1 - lags, 0, None)] * (lags < m)[:, None]
+        self._products += leaders[:, :, None] * r[None, None, :]
+        self._sx += r
+        self._sxx += np.outer(r, r)
+
+        self._dates.append(np.datetime64(self.last_date, 'ns'))
+        if len(self._recent) == self.window:
+            self._rolling.append(correlation_from_sums(self._sx, self._sxx, self.window))
+        else:
+            self._rolling.append(np.full((len(self.symbols), len(self.symbols)), np.nan))
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def matrix(self):
+        """Correlation matrix over the latest window"""
+        with self._lock:
+            return pd.DataFrame(self._rolling.values[-1], index=self.symbols, columns=self.symbols)
+
+    def rolling(self, symbol, others=None):
+        """Rolling correlation of `symbol` with each other symbol, one column per symbol"""
+        with self._lock:
+            i = self.symbols.index(symbol)
+            others = [s for s in (others or self.symbols) if s != symbol]
+            columns = [self.symbols.index(s) for s in others]
+            values = self._rolling.values[:, i, columns]
+            return pd.DataFrame(values, index=pd.DatetimeIndex(self._dates.values, name='date'), columns=others)
+
+    def lead_lag(self):
+        """(lags, k, k) correlations over the latest window: [l, i, j] = corr(i at t, j at t + l)"""
+        with self._lock:
+            if len(self._recent) < self.window:
+                return np.full((self.max_lag + 1, len(self.symbols), len(self.symbols)), np.nan)
+            return lead_lag_from_sums(self._products, self._recent)
+
+    def leaders_of(self, target):
+        """How each symbol's moves lead `target`: lag x symbol correlations"""
+        corr = self.lead_lag()[:, :, self.symbols.index(target)]
+        return pd.DataFrame(corr, index=pd.RangeIndex(self.max_lag + 1, name='lag'), columns=self.symbols)
+
+
+def strongest_lags(df_lead_lag, exclude=()):
+    """Per symbol, the lag with the largest absolute correlation and that correlation"""
+    df = df_lead_lag.drop(columns=list(exclude), errors='ignore')
+    best = df.abs().fillna(-1).to_numpy().argmax(axis=0)
+    return pd.DataFrame({
+        'lag': df.index.to_numpy()[best],
+        'correlation': df.to_numpy()[best, np.arange(df.shape[1])],
+        'same_day': df.iloc[0].to_numpy(),
+    }, index=df.columns).sort_values('correlation', key=np.abs, ascending=False)
@@ -6,13 +6,31 @@ Interactive Streamlit dashboard for visualizing steel price forecasts.
 Run with: streamlit run dashboard.py
 """
 
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-from pathlib import Path
-import plotly.graph_objects as go
 import plotly.express as px
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from anomaly_detection import CUSUM_LIMIT, Z_THRESHOLD
+from business_value import PARAMETER_LABELS, PARAMETERS, SAVINGS_SHARE, scenario_summary
+from charts import (
+    actual_vs_predicted_figure, correlation_matrix_figure, error_bar_figure, error_histogram_figure,
+    horizon_mae_figure, lead_lag_figure, price_history_figure, rebar_trend_figure, rolling_correlation_figure,
+    scenario_heatmap_figure,
+)
+from correlation import DEFAULT_WINDOW, WINDOWS, CorrelationEngine, strongest_lags
+from data_refresh import price_values
+from downsampling import date_window, downsample, points_for_width, trace_payload_bytes
+from figure_cache import FigureCache
+from forecast_engine import load_forecaster
+from forecast_intervals import DEFAULT_QUANTILES, MIN_RESIDUALS, N_PATHS, forecast_intervals, quantile_column
+from instrumentation import Recorder
+from price_revisions import AsOfIndex, end_of_day, load_revisions, revisions_signature
+from shared_store import SharedLiveDatasets, open_live_datasets
+from static_snapshot import PAGES as SNAPSHOT_PAGES, SNAPSHOT_DIR_ENV, SnapshotBundle, current_bundle_pointer
 
 # ============================================================================
 # PAGE CONFIG
@@ -29,42 +47,205 @@ st.set_page_config(
 # LOAD DATA
 # ============================================================================
 
-@st.cache_data
-def load_data():
-    """Load all necessary data files"""
-    data = {}
-
-    # Historical prices
-    prices_file = Path("data/extracted/steel_prices_synthetic_with_external.csv")
-    if prices_file.exists():
-        df_prices = pd.read_csv(prices_file)
-        df_prices['date'] = pd.to_datetime(df_prices['date'])
-        data['prices'] = df_prices
-    else:
-        data['prices'] = None
+@st.cache_resource
+def get_live_datasets():
+    """
+    Datasets shared by every session in this process (Parquet copies first,
+    CSV fallback), each loaded when a page first reads it, or attached from
+    the cross-process shared store when DASHBOARD_SHARED_STORE is set
+    """
+    return open_live_datasets(lazy=True)
 
-    # Walk-forward validation results
-    wf_file = Path("data/validation/walk_forward_results.csv")
-    if wf_file.exists():
-        df_wf = pd.read_csv(wf_file)
-        df_wf['test_date'] = pd.to_datetime(df_wf['test_date'])
-        data['walk_forward'] = df_wf
-    else:
-        data['walk_forward'] = None
-
-    # Multi-step forecasts
-    for horizon in [1, 7, 30]:
-        ms_file = Path(f"data/validation/multi_step_{horizon}day_results.csv")
-        if ms_file.exists():
-            df_ms = pd.read_csv(ms_file)
-            df_ms['test_date'] = pd.to_datetime(df_ms['test_date'])
-            data[f'multi_step_{horizon}d'] = df_ms
-        else:
-            data[f'multi_step_{horizon}d'] = None
 
-    return data
+@st.cache_resource
+def get_recorder():
+    """Rerun timings, cache counters and figure sizes; a no-op unless DASHBOARD_PERF=1"""
+    return Recorder()
+
+
+def load_data():
+    """
+    Current data snapshot, merging in rows appended since the last rerun.
+    Datasets are read from disk only when a page first accesses them.
+    """
+    live = get_live_datasets()
+    previous = live.snapshot()
+    snapshot = live.refresh()
+    recorder = get_recorder()
+    recorder.cache_call("data_snapshot")
+    if snapshot is not previous:
+        recorder.cache_miss("data_snapshot")
+    get_figure_cache().retain(*snapshot.versions.values())
+    return snapshot
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Built figures shared by every session, keyed by page, selection and data version"""
+    return FigureCache()
+
+
+@st.cache_resource
+def get_as_of_figure_cache():
+    """Figures built from past prices, kept apart so the live cache's retain() does not drop them"""
+    return FigureCache()
+
+
+@st.cache_resource(max_entries=16)
+def get_forecaster(_df_prices, as_of=None):
+    """Multi-horizon forecast model, loaded (or fitted) once per process and as-of date"""
+    return load_forecaster(_df_prices)
+
+
+@st.cache_resource(max_entries=16)
+def get_correlation_engine(window, as_of=None):
+    """Rolling and lead-lag correlations for one window and as-of date, shared by every session and extended as days arrive"""
+    return CorrelationEngine(window)
+
+
+@st.cache_resource(max_entries=1)
+def get_revision_index(signature):
+    """As-of index over the recorded price revisions, rebuilt when a segment is added"""
+    return AsOfIndex(load_revisions())
+
+
+@st.cache_resource(max_entries=16)
+def prices_as_of(signature, as_of):
+    """Prices known at the end of `as_of`, with their index, statistics and anomalies"""
+    return price_values(get_revision_index(signature).as_of(end_of_day(as_of)))
+
+
+@st.cache_resource(max_entries=2)
+def get_snapshot_bundle(root, pointer):
+    """Pre-rendered pages of one static snapshot version, read once per process"""
+    return SnapshotBundle(root, pointer)
+
+
+@st.cache_data(max_entries=512)
+def downsampled_series(_price_index, version, symbol, start, end, n_points):
+    """Downsampled price series for one symbol and date range, with payload sizes"""
+    get_recorder().cache_miss("downsampled_series")
+    window = date_window(_price_index.dates(symbol), start, end)
+    dates = _price_index.dates(symbol)[window]
+    values = _price_index.values(symbol)[window]
+    ds_dates, ds_values = downsample(dates, values, n_points)
+
+    return {
+        'dates': ds_dates,
+        'values': ds_values,
+        'n_points': len(dates),
+        'full_bytes': trace_payload_bytes(len(dates)),
+        'sampled_bytes': trace_payload_bytes(len(ds_dates)),
+    }
+
+recorder = get_recorder()
+timer = recorder.start_rerun()
+
+@st.cache_data(max_entries=64)
+def prediction_intervals(_price_index, _forecaster, _residuals, model_version, row_date, versions, quantiles):
+    """Empirical intervals for every symbol and horizon, per model version, feature-row date and data"""
+    return forecast_intervals(_price_index, _forecaster, versions[0], quantiles, _residuals)
+
+
+@st.cache_data(max_entries=32)
+def scenario_outputs(ranges, model_maes, steps, x, y, heatmap_percentile):
+    """Savings heatmap figure and percentile table for one scenario grid"""
+    axes = {name: np.linspace(low, high, steps) for name, (low, high) in ranges.items()}
+    axes['model_mae'] = np.asarray(model_maes)
+    summary = scenario_summary(axes, x, y, heatmap_percentile)
+    summary['figure'] = scenario_heatmap_figure(
+        axes[x], axes[y], summary.pop('heatmap'), PARAMETER_LABELS[x], PARAMETER_LABELS[y], heatmap_percentile
+    )
+    return summary
+
+
+def get_intervals(quantiles=DEFAULT_QUANTILES):
+    """prediction_intervals() for the current data, with the backtest errors as residuals"""
+    forecaster = get_forecaster(data['prices'], as_of)
+    version = data.version_of('prices')
+    residuals = {h: data[f'multi_step_{h}d']['error'].to_numpy() for h in data['horizons']}
+    row_date = forecaster.feature_row(data['price_index'], version)[1]
+    return prediction_intervals(
+        data['price_index'], forecaster, residuals, forecaster.model_version, row_date,
+        (version, data.version_of('multi_step')), tuple(quantiles),
+    )
 
 data = load_data()
+figures = get_figure_cache()
+recorder.watch_cache("figures", figures)
+timer.mark("load_data")
+
+
+def show_chart(fig, name):
+    """Render a Plotly figure, timing it and recording its payload size when instrumented"""
+    with timer.span(f"chart/{name}"):
+        st.plotly_chart(fig, use_container_width=True)
+    timer.figure(name, fig)
+
+
+# What each usual horizon is for, on the Forecasts page
+HORIZON_USES = {1: "Next trading day prediction", 7: "Weekly planning forecast", 30: "Monthly budget forecast"}
+
+
+def horizons_text(horizons):
+    """'1, 7, and 30-day' for a list of horizons"""
+    names = [str(h) for h in horizons]
+    if len(names) > 2:
+        return f"{', '.join(names[:-1])}, and {names[-1]}-day"
+    return f"{' and '.join(names)}-day"
+
+
+# Navigation label -> page key in a static snapshot
+SNAPSHOT_KEYS = {label: key for key, label in SNAPSHOT_PAGES.items()}
+
+
+def snapshot_bundle(page):
+    """
+    Static snapshot to render `page` from, if DASHBOARD_SNAPSHOT_DIR is set,
+    the page is pre-rendered and the bundle matches the current data files
+    """
+    root = os.environ.get(SNAPSHOT_DIR_ENV)
+    key = SNAPSHOT_KEYS.get(page)
+    if not root or key is None:
+        return None
+    recorder.cache_call("static_snapshot")
+    pointer = current_bundle_pointer(root)
+    bundle = get_snapshot_bundle(root, pointer) if pointer is not None else None
+    if bundle is None or key not in bundle.pages:
+        recorder.cache_miss("static_snapshot")
+        return None
+    return bundle
+
+
+def show_snapshot_page(bundle, page):
+    """Render a page from its pre-rendered blocks; no dataset or model is loaded"""
+    for block in bundle.pages[SNAPSHOT_KEYS[page]]:
+        kind = block['type']
+        if kind == 'title':
+            st.title(block['text'])
+        elif kind == 'heading':
+            st.markdown(f"### {block['text']}")
+        elif kind == 'subheader':
+            st.subheader(block['text'])
+        elif kind == 'text':
+            st.markdown(block['text'])
+        elif kind == 'list':
+            st.markdown("\n".join(f"- {item}" for item in block['items']))
+        elif kind == 'caption':
+            st.caption(block['text'])
+        elif kind == 'divider':
+            st.markdown("---")
+        elif kind == 'alert':
+            getattr(st, block['level'])(block['text'])
+        elif kind == 'metrics':
+            for col, item in zip(st.columns(len(block['items'])), block['items']):
+                col.metric(item['label'], item['value'], item['delta'])
+        elif kind == 'figure':
+            show_chart(bundle.figures[block['name']], block['name'])
+        elif kind == 'table':
+            st.table(pd.DataFrame(block['rows'], columns=block['columns']))
+    st.caption(f"Pre-rendered snapshot {bundle.version}, built {bundle.manifest['built_at']}.")
+
 
 # ============================================================================
 # SIDEBAR
@@ -73,18 +254,31 @@ data = load_data()
 st.sidebar.title("⚙️ Steel Price Forecasting")
 st.sidebar.markdown("---")
 
-page = st.sidebar.radio(
-    "Navigation",
-    ["📊 Overview", "📈 Price History", "🔮 Forecasts", "✅ Model Performance", "💼 Business Value"]
-)
+pages = ["📊 Overview", "📈 Price History", "🔮 Forecasts", "✅ Model Performance", "💼 Business Value"]
+if recorder.enabled:
+    pages.append("⏱ Performance")
+
+page = st.sidebar.radio("Navigation", pages)
+timer.page = page.split(" ", 1)[-1]
+
+# Point-in-time view from the recorded price revisions (price_revisions.py)
+as_of = None
+revisions_version = revisions_signature()
+if revisions_version and st.sidebar.toggle("As-of date", help="Show prices as they were known at the end of a past date"):
+    today = datetime.now().date()
+    first_known = pd.Timestamp(get_revision_index(revisions_version).times[0]).date()
+    as_of = st.sidebar.date_input("Prices known as of", value=today, min_value=first_known, max_value=today)
+    data = data.replaced(prices_as_of(revisions_version, as_of), {'prices': f"{revisions_version}@{as_of}"})
+    figures = get_as_of_figure_cache()
+    st.sidebar.caption(f"Prices as known at the end of {as_of}; validation results and the model are current.")
 
 st.sidebar.markdown("---")
-st.sidebar.markdown("""
+st.sidebar.markdown(f"""
 ### About
 UAE Rebar Import Price Forecasting System
 
 **Features:**
-- 1, 7, and 30-day forecasts
+- {horizons_text(data['horizons']) if data['horizons'] else 'Multi-step'} forecasts
 - Walk-forward validation
 - Confidence intervals
 - External feature integration
@@ -94,11 +288,27 @@ UAE Rebar Import Price Forecasting System
 **MAE:** $0.78/mt
 """)
 
+with st.sidebar.expander("🧠 Memory"):
+    # Shared by every session: one copy per process, not per user
+    live = get_live_datasets()
+    df_mem = live.memory_report()
+    where = "memory-mapped, shared by all workers" if isinstance(live, SharedLiveDatasets) else "this process"
+    st.caption(f"Cached data: {df_mem['bytes'].sum() / 1024:,.0f} KB ({where}) · {len(figures)} cached figures")
+    if len(df_mem):
+        st.table(df_mem.assign(KB=(df_mem['bytes'] / 1024).round(1)).drop(columns='bytes').set_index('object'))
+
+timer.mark("sidebar")
+
 # ============================================================================
 # PAGE 1: OVERVIEW
 # ============================================================================
 
-if page == "📊 Overview":
+bundle = snapshot_bundle(page) if as_of is None else None
+
+if bundle is not None:
+    show_snapshot_page(bundle, page)
+
+elif page == "📊 Overview":
     st.title("📊 Steel Price Forecasting Dashboard")
     st.markdown("### UAE Rebar Import (CFR Jebel Ali)")
 
@@ -106,9 +316,9 @@ if page == "📊 Overview":
     col1, col2, col3, col4 = st.columns(4)
 
     if data['prices'] is not None:
-        df_rebar = data['prices'][data['prices']['symbol'] == 'rebar_uae_import']
-        current_price = df_rebar['price_mid_usd_mt'].iloc[-1]
-        prev_price = df_rebar['price_mid_usd_mt'].iloc[-2]
+        rebar_stats = data['price_stats'].get('rebar_uae_import')
+        current_price = rebar_stats['last']
+        prev_price = rebar_stats['prev']
         price_change = current_price - prev_price
         price_change_pct = (price_change / prev_price) * 100
 
@@ -120,11 +330,11 @@ if page == "📊 Overview":
             )
 
         with col2:
-            avg_30d = df_rebar['price_mid_usd_mt'].tail(30).mean()
+            avg_30d = rebar_stats['mean_30d']
             st.metric("30-Day Average", f"${avg_30d:.2f}/mt")
 
         with col3:
-            std_30d = df_rebar['price_mid_usd_mt'].tail(30).std()
+            std_30d = rebar_stats['std_30d']
             st.metric("30-Day Volatility", f"${std_30d:.2f}/mt")
 
         with col4:
@@ -138,79 +348,61 @@ if page == "📊 Overview":
     st.subheader("Recent Price Trends (Last 90 Days)")
 
     if data['prices'] is not None:
-        df_rebar = data['prices'][data['prices']['symbol'] == 'rebar_uae_import'].tail(90)
-
-        fig = go.Figure()
-
-        fig.add_trace(go.Scatter(
-            x=df_rebar['date'],
-            y=df_rebar['price_mid_usd_mt'],
-            mode='lines',
-            name='Rebar Price',
-            line=dict(color='#1f77b4', width=2),
-            fill='tozeroy',
-            fillcolor='rgba(31, 119, 180, 0.1)'
-        ))
-
-        fig.update_layout(
-            title="UAE Rebar Import Price (CFR Jebel Ali)",
-            xaxis_title="Date",
-            yaxis_title="Price (USD/mt)",
-            hovermode='x unified',
-            height=400
+        fig = figures.get(
+            "overview", ("rebar_uae_import", 90), data.version_of('prices'),
+            lambda: rebar_trend_figure(data['price_index'].frame('rebar_uae_import').tail(90))
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, "overview/rebar_trend")
 
     # Latest forecast
     st.markdown("---")
     st.subheader("Latest Multi-Step Forecast")
 
     if data['prices'] is not None:
-        df_rebar = data['prices'][data['prices']['symbol'] == 'rebar_uae_import']
-        current_price = df_rebar['price_mid_usd_mt'].iloc[-1]
-        current_date = df_rebar['date'].iloc[-1]
+        forecaster = get_forecaster(data['prices'], as_of)
+        df_int = get_intervals()
+        df_int = df_int[df_int['symbol'] == forecaster.artifact['target']]
 
         forecast_data = []
 
-        if data['multi_step_1d'] is not None:
-            df_1d = data['multi_step_1d']
-            error_std = df_1d['error'].std()
-            pred = current_price - 1.0  # Simplified for demo
-            forecast_data.append({
-                'Horizon': '1-Day',
-                'Date': (current_date + timedelta(days=1)).date(),
-                'Forecast': f"${pred:.2f}",
-                '68% CI': f"${pred - error_std:.2f} - ${pred + error_std:.2f}",
-                '95% CI': f"${pred - 2*error_std:.2f} - ${pred + 2*error_std:.2f}"
-            })
-
-        if data['multi_step_7d'] is not None:
-            df_7d = data['multi_step_7d']
-            error_std = df_7d['error'].std()
-            pred = current_price - 2.0
-            forecast_data.append({
-                'Horizon': '7-Day',
-                'Date': (current_date + timedelta(days=7)).date(),
-                'Forecast': f"${pred:.2f}",
-                '68% CI': f"${pred - error_std:.2f} - ${pred + error_std:.2f}",
-                '95% CI': f"${pred - 2*error_std:.2f} - ${pred + 2*error_std:.2f}"
-            })
-
-        if data['multi_step_30d'] is not None:
-            df_30d = data['multi_step_30d']
-            error_std = df_30d['error'].std()
-            pred = current_price - 5.0
+        for row in df_int.to_dict(orient='records'):
             forecast_data.append({
-                'Horizon': '30-Day',
-                'Date': (current_date + timedelta(days=30)).date(),
-                'Forecast': f"${pred:.2f}",
-                '68% CI': f"${pred - error_std:.2f} - ${pred + error_std:.2f}",
-                '95% CI': f"${pred - 2*error_std:.2f} - ${pred + 2*error_std:.2f}"
+                'Horizon': f"{row['horizon']}-Day",
+                'Date': row['date'].date(),
+                'Forecast': f"${row['point']:.2f}",
+                '68% CI': f"${row['p16']:.2f} - ${row['p84']:.2f}",
+                '95% CI': f"${row['p2.5']:.2f} - ${row['p97.5']:.2f}"
             })
 
         df_forecast = pd.DataFrame(forecast_data)
         st.table(df_forecast)
+        st.caption(
+            f"Empirical intervals from {N_PATHS:,} simulated price paths centred on the model forecast, "
+            f"or from backtest errors at horizons with at least {MIN_RESIDUALS} of them."
+        )
+
+    # Prices flagged by the streaming anomaly detector as they were ingested
+    if data['prices'] is not None:
+        st.markdown("---")
+        st.subheader("🚨 Price Anomalies")
+
+        latest = data['price_stats'].table['last_date'].max()
+        df_recent = data['price_anomalies'].recent(since=latest - pd.Timedelta(days=30))
+        df_latest = df_recent[df_recent['date'] == latest]
+        if len(df_latest):
+            st.warning(
+                f"{len(df_latest)} price(s) on {latest.date()} flagged: "
+                + ", ".join(f"{row['symbol']} ({row['flag'].replace('_', ' ')})" for row in df_latest.to_dict('records'))
+            )
+        if len(df_recent):
+            st.dataframe(df_recent.assign(date=df_recent['date'].dt.date).round(2), hide_index=True)
+        else:
+            st.success(f"No prices flagged in the last 30 days across {len(data['price_index'].symbols)} symbols.")
+        st.caption(
+            f"Spikes are returns beyond {Z_THRESHOLD:g} EWMA standard deviations and are held out of the baseline; "
+            f"regime shifts are trends whose CUSUM exceeds {CUSUM_LIMIT:g}."
+        )
 
 # ============================================================================
 # PAGE 2: PRICE HISTORY
@@ -221,7 +413,8 @@ elif page == "📈 Price History":
 
     if data['prices'] is not None:
         # Symbol selector
-        symbols = sorted(data['prices']['symbol'].unique())
+        price_index = data['price_index']
+        symbols = price_index.symbols
         selected_symbols = st.multiselect(
             "Select Symbols",
             symbols,
@@ -229,49 +422,98 @@ elif page == "📈 Price History":
         )
 
         if selected_symbols:
-            df_selected = data['prices'][data['prices']['symbol'].isin(selected_symbols)]
+            # Date range; narrowing it re-slices the full-resolution series
+            first_date = pd.Timestamp(min(price_index.dates(s)[0] for s in selected_symbols)).date()
+            last_date = pd.Timestamp(max(price_index.dates(s)[-1] for s in selected_symbols)).date()
+            start_date, end_date = st.slider(
+                "Date Range",
+                min_value=first_date,
+                max_value=last_date,
+                value=(first_date, last_date),
+                format="YYYY-MM-DD"
+            )
 
             # Price chart
-            fig = go.Figure()
-
-            for symbol in selected_symbols:
-                df_symbol = df_selected[df_selected['symbol'] == symbol]
-                fig.add_trace(go.Scatter(
-                    x=df_symbol['date'],
-                    y=df_symbol['price_mid_usd_mt'],
-                    mode='lines',
-                    name=symbol.replace('_', ' ').title()
-                ))
-
-            fig.update_layout(
-                title="Historical Prices",
-                xaxis_title="Date",
-                yaxis_title="Price",
-                hovermode='x unified',
-                height=500,
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+            n_points = points_for_width()
+
+            def build_price_history():
+                series, payload = [], {'total': 0, 'plotted': 0, 'full_bytes': 0, 'sampled_bytes': 0}
+                for symbol in selected_symbols:
+                    recorder.cache_call("downsampled_series")
+                    sampled = downsampled_series(price_index, data.version_of('prices'), symbol, start_date, end_date, n_points)
+                    series.append((symbol, sampled['dates'], sampled['values']))
+                    payload['total'] += sampled['n_points']
+                    payload['plotted'] += len(sampled['values'])
+                    payload['full_bytes'] += sampled['full_bytes']
+                    payload['sampled_bytes'] += sampled['sampled_bytes']
+                df_flagged = data['price_anomalies'].table
+                df_flagged = df_flagged[
+                    df_flagged['symbol'].isin(selected_symbols)
+                    & (df_flagged['date'] >= pd.Timestamp(start_date))
+                    & (df_flagged['date'] <= pd.Timestamp(end_date))
+                ]
+                return price_history_figure(series, df_flagged), payload
+
+            fig, payload = figures.get(
+                "price_history", (tuple(selected_symbols), start_date, end_date, n_points), data.version_of('prices'),
+                build_price_history
             )
 
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig, "price_history/prices")
+            st.caption(
+                f"Plotted {payload['plotted']:,} of {payload['total']:,} points. "
+                f"Series payload about {payload['sampled_bytes'] / 1024:,.0f} KB vs {payload['full_bytes'] / 1024:,.0f} KB "
+                f"at full resolution ({(payload['full_bytes'] - payload['sampled_bytes']) / 1024:,.0f} KB saved)."
+            )
 
             # Summary statistics
             st.subheader("Summary Statistics")
 
             summary_data = []
-            for symbol in selected_symbols:
-                df_symbol = df_selected[df_selected['symbol'] == symbol]
+            for symbol, row in data['price_stats'].rows(selected_symbols).iterrows():
                 summary_data.append({
                     'Symbol': symbol,
-                    'Current': f"${df_symbol['price_mid_usd_mt'].iloc[-1]:.2f}",
-                    'Mean': f"${df_symbol['price_mid_usd_mt'].mean():.2f}",
-                    'Std Dev': f"${df_symbol['price_mid_usd_mt'].std():.2f}",
-                    'Min': f"${df_symbol['price_mid_usd_mt'].min():.2f}",
-                    'Max': f"${df_symbol['price_mid_usd_mt'].max():.2f}"
+                    'Current': f"${row['last']:.2f}",
+                    'Mean': f"${row['mean']:.2f}",
+                    'Std Dev': f"${row['std']:.2f}",
+                    'Min': f"${row['min']:.2f}",
+                    'Max': f"${row['max']:.2f}"
                 })
 
             df_summary = pd.DataFrame(summary_data)
             st.table(df_summary)
 
+        # Cross-symbol correlations of daily returns
+        target = 'rebar_uae_import'
+        if target in symbols:
+            st.markdown("---")
+            st.subheader("Drivers of UAE Rebar")
+            window = st.selectbox("Correlation Window (days)", WINDOWS, index=WINDOWS.index(DEFAULT_WINDOW))
+            version = data.version_of('prices')
+            engine = get_correlation_engine(window, as_of).update(price_index, version)
+
+            df_leaders = strongest_lags(engine.leaders_of(target), exclude=[target])
+            others = [s for s in selected_symbols if s != target] or list(df_leaders.index[:3])
+
+            fig = figures.get("price_history", ("rolling_correlation", window, tuple(others)), version,
+                              lambda: rolling_correlation_figure(engine.rolling(target, others), target, window))
+            show_chart(fig, "price_history/rolling_correlation")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                fig = figures.get("price_history", ("correlation_matrix", window), version,
+                                  lambda: correlation_matrix_figure(engine.matrix(), window))
+                show_chart(fig, "price_history/correlation_matrix")
+            with col2:
+                fig = figures.get("price_history", ("lead_lag", window), version,
+                                  lambda: lead_lag_figure(engine.leaders_of(target).drop(columns=target), target))
+                show_chart(fig, "price_history/lead_lag")
+
+            st.markdown(f"**Strongest lead over the last {window} days** (returns of each symbol vs. UAE rebar returns *lag* days later)")
+            st.dataframe(df_leaders.rename(
+                columns={'lag': 'Lag (days)', 'correlation': 'Correlation', 'same_day': 'Same-Day'}
+            ).round(2))
+
 # ============================================================================
 # PAGE 3: FORECASTS
 # ============================================================================
@@ -279,143 +521,66 @@ elif page == "📈 Price History":
 elif page == "🔮 Forecasts":
     st.title("🔮 Multi-Step Forecasts")
 
-    st.markdown("""
-    This page shows forecast performance at different horizons:
-    - **1-Day Ahead**: Next trading day prediction
-    - **7-Day Ahead**: Weekly planning forecast
-    - **30-Day Ahead**: Monthly budget forecast
-    """)
-
-    # Tabs for different horizons
-    tab1, tab2, tab3 = st.tabs(["1-Day Ahead", "7-Day Ahead", "30-Day Ahead"])
+    # Tabs for the horizons found in the results store
+    horizons = data['horizons']
+    st.markdown("This page shows forecast performance at different horizons:\n" + "".join(
+        f"- **{h}-Day Ahead**: {HORIZON_USES.get(h, f'{h}-day forecast')}\n" for h in horizons
+    ))
+    tabs = st.tabs([f"{horizon}-Day Ahead" for horizon in horizons]) if horizons else []
 
-    with tab1:
-        if data['multi_step_1d'] is not None:
-            df_1d = data['multi_step_1d']
+    for horizon, tab in zip(horizons, tabs):
+        with tab:
+            df_h = data[f'multi_step_{horizon}d']
 
             # Actual vs Predicted
-            fig = go.Figure()
-
-            fig.add_trace(go.Scatter(
-                x=df_1d['test_date'],
-                y=df_1d['actual'],
-                mode='lines+markers',
-                name='Actual',
-                line=dict(color='blue')
-            ))
-
-            fig.add_trace(go.Scatter(
-                x=df_1d['test_date'],
-                y=df_1d['predicted'],
-                mode='lines+markers',
-                name='Predicted',
-                line=dict(color='red', dash='dash')
-            ))
-
-            fig.update_layout(
-                title="1-Day Ahead: Actual vs Predicted",
-                xaxis_title="Date",
-                yaxis_title="Price (USD/mt)",
-                hovermode='x unified',
-                height=400
+            fig = figures.get(
+                "forecasts", (horizon,), data.version_of('multi_step'),
+                lambda: actual_vs_predicted_figure(df_h, horizon)
             )
 
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig, f"forecasts/actual_vs_predicted_{horizon}d")
 
             # Error distribution
             col1, col2 = st.columns(2)
 
             with col1:
-                st.metric("MAE", f"${df_1d['error'].abs().mean():.2f}/mt")
-                st.metric("Mean Error", f"${df_1d['error'].mean():.2f}/mt")
+                st.metric("MAE", f"${df_h['error'].abs().mean():.2f}/mt")
+                st.metric("Mean Error", f"${df_h['error'].mean():.2f}/mt")
 
             with col2:
-                st.metric("Std Dev", f"${df_1d['error'].std():.2f}/mt")
-                st.metric("Max Error", f"${df_1d['error'].abs().max():.2f}/mt")
-
-    with tab2:
-        if data['multi_step_7d'] is not None:
-            df_7d = data['multi_step_7d']
-
-            fig = go.Figure()
-
-            fig.add_trace(go.Scatter(
-                x=df_7d['test_date'],
-                y=df_7d['actual'],
-                mode='lines+markers',
-                name='Actual',
-                line=dict(color='blue')
-            ))
-
-            fig.add_trace(go.Scatter(
-                x=df_7d['test_date'],
-                y=df_7d['predicted'],
-                mode='lines+markers',
-                name='Predicted',
-                line=dict(color='red', dash='dash')
-            ))
-
-            fig.update_layout(
-                title="7-Day Ahead: Actual vs Predicted",
-                xaxis_title="Date",
-                yaxis_title="Price (USD/mt)",
-                hovermode='x unified',
-                height=400
-            )
+                st.metric("Std Dev", f"${df_h['error'].std():.2f}/mt")
+                st.metric("Max Error", f"${df_h['error'].abs().max():.2f}/mt")
 
-            st.plotly_chart(fig, use_container_width=True)
+    # Intervals for every symbol
+    if data['prices'] is not None:
+        st.markdown("---")
+        st.subheader("Prediction Intervals: All Symbols")
 
-            col1, col2 = st.columns(2)
+        forecaster = get_forecaster(data['prices'], as_of)
 
-            with col1:
-                st.metric("MAE", f"${df_7d['error'].abs().mean():.2f}/mt")
-                st.metric("Mean Error", f"${df_7d['error'].mean():.2f}/mt")
+        col1, col2 = st.columns([1, 3])
 
-            with col2:
-                st.metric("Std Dev", f"${df_7d['error'].std():.2f}/mt")
-                st.metric("Max Error", f"${df_7d['error'].abs().max():.2f}/mt")
-
-    with tab3:
-        if data['multi_step_30d'] is not None:
-            df_30d = data['multi_step_30d']
-
-            fig = go.Figure()
-
-            fig.add_trace(go.Scatter(
-                x=df_30d['test_date'],
-                y=df_30d['actual'],
-                mode='lines+markers',
-                name='Actual',
-                line=dict(color='blue')
-            ))
-
-            fig.add_trace(go.Scatter(
-                x=df_30d['test_date'],
-                y=df_30d['predicted'],
-                mode='lines+markers',
-                name='Predicted',
-                line=dict(color='red', dash='dash')
-            ))
-
-            fig.update_layout(
-                title="30-Day Ahead: Actual vs Predicted",
-                xaxis_title="Date",
-                yaxis_title="Price (USD/mt)",
-                hovermode='x unified',
-                height=400
+        with col1:
+            interval_horizon = st.selectbox(
+                "Horizon", forecaster.horizons, format_func=lambda h: f"{h}-Day Ahead"
             )
 
-            st.plotly_chart(fig, use_container_width=True)
-
-            col1, col2 = st.columns(2)
-
-            with col1:
-                st.metric("MAE", f"${df_30d['error'].abs().mean():.2f}/mt")
-                st.metric("Mean Error", f"${df_30d['error'].mean():.2f}/mt")
+        with col2:
+            quantiles = st.multiselect(
+                "Quantiles",
+                [0.01, 0.025, 0.05, 0.1, 0.16, 0.25, 0.5, 0.75, 0.84, 0.9, 0.95, 0.975, 0.99],
+                default=list(DEFAULT_QUANTILES)
+            )
 
-            with col2:
-                st.metric("Std Dev", f"${df_30d['error'].std():.2f}/mt")
-                st.metric("Max Error", f"${df_30d['error'].abs().max():.2f}/mt")
+        if quantiles:
+            df_int = get_intervals(sorted(quantiles))
+            df_int = df_int[df_int['horizon'] == interval_horizon]
+            columns = ['symbol', 'last', 'point'] + [quantile_column(q) for q in sorted(quantiles)] + ['source']
+            st.dataframe(df_int[columns].set_index('symbol').round(2))
+            st.caption(
+                f"Forecast for {df_int['date'].iloc[0].date()}. Each of {N_PATHS:,} paths resamples whole days "
+                f"of returns across all symbols; the model's target is centred on its forecast."
+            )
 
 # ============================================================================
 # PAGE 4: MODEL PERFORMANCE
@@ -449,73 +614,27 @@ elif page == "✅ Model Performance":
         # Error over time
         st.subheader("Prediction Errors Over Time")
 
-        fig = go.Figure()
-
-        fig.add_trace(go.Bar(
-            x=df_wf['test_date'],
-            y=df_wf['error'],
-            name='Error',
-            marker_color=['red' if e < 0 else 'green' for e in df_wf['error']]
-        ))
-
-        fig.add_hline(y=0, line_dash="dash", line_color="black")
+        fig = figures.get("model_performance", ("errors",), data.version_of('walk_forward'), lambda: error_bar_figure(df_wf))
 
-        fig.update_layout(
-            title="Prediction Errors by Date",
-            xaxis_title="Date",
-            yaxis_title="Error (USD/mt)",
-            showlegend=False,
-            height=400
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, "model_performance/errors")
 
         # Error distribution
         st.subheader("Error Distribution")
 
-        fig = go.Figure(data=[go.Histogram(
-            x=df_wf['error'],
-            nbinsx=20,
-            name='Error Distribution',
-            marker_color='lightblue'
-        )])
-
-        fig.update_layout(
-            title="Distribution of Prediction Errors",
-            xaxis_title="Error (USD/mt)",
-            yaxis_title="Frequency",
-            showlegend=False,
-            height=350
-        )
+        fig = figures.get("model_performance", ("error_histogram",), data.version_of('walk_forward'), lambda: error_histogram_figure(df_wf))
 
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig, "model_performance/error_histogram")
 
     # Multi-step comparison
     st.markdown("---")
     st.subheader("Multi-Horizon Performance Comparison")
 
-    summary_file = Path("data/validation/multi_step_summary.csv")
-    if summary_file.exists():
-        df_summary = pd.read_csv(summary_file)
-
-        fig = go.Figure()
-
-        fig.add_trace(go.Bar(
-            x=[f"{int(h)}-Day" for h in df_summary['Horizon (days)']],
-            y=df_summary['MAE ($/mt)'],
-            name='MAE',
-            marker_color='lightblue'
-        ))
-
-        fig.update_layout(
-            title="MAE by Forecast Horizon",
-            xaxis_title="Horizon",
-            yaxis_title="MAE (USD/mt)",
-            showlegend=False,
-            height=350
-        )
+    if data['multi_step_summary'] is not None:
+        df_summary = data['multi_step_summary']
 
-        st.plotly_chart(fig, use_container_width=True)
+        fig = figures.get("model_performance", ("horizon_mae",), data.version_of('multi_step_summary'), lambda: horizon_mae_figure(df_summary))
+
+        show_chart(fig, "model_performance/horizon_mae")
 
         st.table(df_summary)
 
@@ -571,7 +690,7 @@ elif page == "💼 Business Value":
 
     # Calculate savings
     error_reduction = baseline_error - model_error
-    savings_per_mt = error_reduction * 0.5  # Conservative: assume 50% of error reduction translates to savings
+    savings_per_mt = error_reduction * SAVINGS_SHARE  # Conservative: assume 50% of error reduction translates to savings
     monthly_savings = savings_per_mt * monthly_volume
     annual_savings = monthly_savings * 12
 
@@ -608,6 +727,56 @@ elif page == "💼 Business Value":
     **ROI:** {roi_pct:.2f}% of procurement budget
     """)
 
+    # Scenario grid
+    st.markdown("---")
+    st.subheader("Scenario Analysis")
+
+    if st.toggle("Explore scenarios", help="Evaluate savings over every combination of the ranges below"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            volume_range = st.slider("Monthly Volume Range (mt)", 100, 100000, (500, 20000), step=100)
+            price_range = st.slider("Price Range (USD/mt)", 400.0, 1000.0, (500.0, 750.0), step=10.0)
+            baseline_range = st.slider("Baseline MAE Range (USD/mt)", 0.5, 50.0, (2.0, 15.0), step=0.5)
+
+        with col2:
+            model_source = st.radio("Model MAE", ["Range", "Walk-forward folds"], horizontal=True)
+            if model_source == "Range":
+                model_range = st.slider("Model MAE Range (USD/mt)", 0.1, 10.0, (0.5, 3.0), step=0.1)
+            steps = st.select_slider("Points per Range", [5, 10, 20, 30, 40], value=20)
+
+        if model_source == "Range":
+            model_maes = tuple(np.linspace(*model_range, steps))
+        elif data['walk_forward'] is not None:
+            model_maes = tuple(data['walk_forward']['mae'].to_numpy(dtype=float))
+        else:
+            st.warning("Walk-forward results are not available; using the model MAE range instead.")
+            model_maes = tuple(np.linspace(0.5, 3.0, steps))
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            x_param = st.selectbox("Heatmap X", PARAMETERS, index=0, format_func=PARAMETER_LABELS.get)
+
+        with col2:
+            y_options = [p for p in PARAMETERS if p != x_param]
+            y_param = st.selectbox("Heatmap Y", y_options, index=y_options.index('baseline_mae') if x_param != 'baseline_mae' else 0,
+                                   format_func=PARAMETER_LABELS.get)
+
+        with col3:
+            heatmap_percentile = st.slider("Heatmap Percentile", 5, 95, 50, step=5,
+                                           help="Percentile of savings over the parameters not on the axes")
+
+        ranges = {'volume': volume_range, 'price': price_range, 'baseline_mae': baseline_range}
+        scenarios = scenario_outputs(ranges, model_maes, steps, x_param, y_param, heatmap_percentile)
+
+        show_chart(scenarios['figure'], "business_value/scenario_heatmap")
+        st.caption(
+            f"{scenarios['n_scenarios']:,} scenarios; savings are positive in "
+            f"{scenarios['share_positive']:.0%} of them."
+        )
+        st.table(scenarios['percentiles'].map(lambda v: f"{v:,.2f}"))
+
     # Business use cases
     st.markdown("---")
     st.subheader("Business Use Cases")
@@ -634,6 +803,60 @@ elif page == "💼 Business Value":
     **Value**: Data-driven hedging decisions.
     """)
 
+# ============================================================================
+# PAGE 6: PERFORMANCE (only listed when DASHBOARD_PERF=1)
+# ============================================================================
+
+elif page == "⏱ Performance":
+    st.title("⏱ Performance")
+
+    st.markdown("""
+    Timings for recent reruns of this process, across all sessions. The page
+    itself is included; reruns that raised or were interrupted are not.
+    """)
+
+    df_reruns = recorder.rerun_frame()
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Reruns Recorded", f"{recorder.n_reruns:,}")
+
+    with col2:
+        median_ms = df_reruns['total_ms'].median() if len(df_reruns) else float('nan')
+        st.metric("Median Rerun", f"{median_ms:.0f} ms")
+
+    with col3:
+        df_caches = recorder.cache_frame()
+        hits, lookups = df_caches['hits'].sum(), df_caches['hits'].sum() + df_caches['misses'].sum()
+        st.metric("Cache Hit Ratio", f"{hits / lookups:.0%}" if lookups else "–")
+
+    with col4:
+        rss_mb = df_reruns['rss_mb'].iloc[0] if len(df_reruns) else None
+        st.metric("Resident Memory", f"{rss_mb:,.0f} MB" if pd.notna(rss_mb) else "–")
+
+    st.subheader("Recent Reruns (ms)")
+    st.dataframe(df_reruns.round(1), hide_index=True)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Caches")
+        st.table(df_caches.assign(hit_ratio=df_caches['hit_ratio'].round(3)).set_index('cache'))
+
+    with col2:
+        st.subheader("Figure Payloads")
+        df_figures = recorder.figure_frame()
+        st.table(df_figures.assign(kb=df_figures['kb'].round(1)).set_index('figure'))
+
+    st.subheader("Stage Totals")
+    st.table(recorder.stage_frame().round(2).set_index('stage'))
+
+    metrics_text = recorder.prometheus_text()
+    st.download_button("Download Prometheus metrics", metrics_text, "dashboard_metrics.prom", "text/plain")
+    with st.expander("Prometheus text"):
+        st.code(metrics_text, language=None)
+
 # ============================================================================
 # FOOTER
 # ============================================================================
@@ -645,3 +868,5 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+timer.mark(f"page/{timer.page}")
+timer.finish()
@@ -0,0 +1,420 @@
+"""
+Incremental Data Refresh
+
+Keeps the dashboard datasets in memory and watches their source CSVs. Each
+refresh only stats the files; rows appended since the last check are parsed
+on their own and merged into the cached frames, the per-symbol price index,
+the summary statistics and the streaming anomaly detector. Any other change
+to a file (rewrite, truncation, new header) reloads that one dataset in
+full. The partitioned multi-step results store is reloaded whenever any of
+its files change.
+
+Snapshots handed out by `LiveDatasets.refresh()` are never mutated: a refresh
+builds new objects and swaps them in, so readers holding an older snapshot
+are unaffected.
+
+With `lazy=True` nothing is read up front. Datasets load in groups (prices
+with its index, statistics and anomalies; the multi-step results; each
+other dataset alone) the first time a snapshot key from the group is read,
+and only loaded groups are watched for changes. Each group has its own
+version in `Snapshot.versions`, so caches keyed on it are invalidated only
+by changes to the data they were built from. A lazy load adds the group's
+keys to the snapshot being read, leaving the keys already there untouched.
+"""
+
+import hashlib
+import io
+import re
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from anomaly_detection import PriceAnomalies
+from data_store import (
+    DATASETS, MULTI_STEP_CSV_DATASETS, concat_rows, data_version, load_dataset, load_multi_step_store,
+    parquet_path, read_csv_typed, redundant_copies, store_signature, write_parquet,
+)
+from price_index import PriceIndex
+from price_stats import PriceStats
+
+# Bytes just before the previous end of file that must be unchanged for the
+# growth of a file to count as an append
+BOUNDARY_BYTES = 4096
+
+
+# ============================================================================
+# FILE STATE
+# ============================================================================
+
+class FileState:
+    """Size, mtime, header line and trailing bytes of a CSV at one point in time"""
+
+    def __init__(self, size, mtime_ns, header, boundary):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.header = header
+        self.boundary = boundary
+
+    @classmethod
+    def read(cls, csv_path, size=None):
+        """Capture the state of a CSV file (up to `size` bytes, if given)"""
+        if not csv_path.exists():
+            return None
+        stat = csv_path.stat()
+        size = stat.st_size if size is None else size
+        with open(csv_path, 'rb') as fh:
+            header = fh.readline()
+            fh.seek(max(size - BOUNDARY_BYTES, 0))
+            boundary = fh.read(min(size, BOUNDARY_BYTES))
+        return cls(size, stat.st_mtime_ns, header, boundary)
+
+    def unchanged(self, csv_path):
+        stat = csv_path.stat()
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+
+def read_appended_rows(name, state):
+    """
+    Rows appended to a dataset CSV since `state` was captured.
+
+    Returns (rows, new_state), or None if the file changed in any other way.
+    A trailing partial line (a write in progress) is left for the next call.
+    """
+    spec = DATASETS[name]
+    csv_path = spec['csv']
+    if csv_path.stat().st_size < state.size:
+        return None
+
+    with open(csv_path, 'rb') as fh:
+        if fh.readline() != state.header:
+            return None
+        fh.seek(state.size - len(state.boundary))
+        if fh.read(len(state.boundary)) != state.boundary:
+            return None
+        appended = fh.read()
+
+    complete = appended[:appended.rfind(b'\n') + 1]
+    new_state = FileState.read(csv_path, size=state.size + len(complete))
+    if not complete:
+        return pd.DataFrame(), new_state
+
+    rows = read_csv_typed(spec, io.BytesIO(state.header + complete))
+    return rows, new_state
+
+
+# ============================================================================
+# SNAPSHOTS
+# ============================================================================
+
+# Snapshot keys derived from the prices dataset
+PRICE_KEYS = ('prices', 'price_index', 'price_stats', 'price_anomalies')
+MULTI_STEP_KEY = re.compile(r'multi_step_\d+d$')
+
+
+def dataset_group(name):
+    """Loading group of a dataset; per-horizon result CSVs load with the results store"""
+    return 'multi_step' if name in MULTI_STEP_CSV_DATASETS.values() else name
+
+
+def snapshot_group(key):
+    """Group whose loading provides snapshot `key`, or None (e.g. 'version')"""
+    if key in PRICE_KEYS:
+        return 'prices'
+    if key == 'horizons' or MULTI_STEP_KEY.match(key):
+        return 'multi_step'
+    return dataset_group(key) if key in DATASETS else None
+
+
+def price_values(df_prices):
+    """Snapshot values derived from a price table: the table in index order, its index, statistics and anomalies"""
+    price_index = PriceIndex(df_prices)
+    return {
+        'prices': price_index.df,
+        'price_index': price_index,
+        'price_stats': PriceStats(price_index),
+        'price_anomalies': PriceAnomalies(price_index),
+    }
+
+
+class Snapshot(dict):
+    """
+    Datasets and derived objects by key, as the dashboard pages read them.
+    A key from a group not loaded yet loads that group on first access.
+    """
+
+    def __init__(self, values, versions, live=None):
+        super().__init__(values)
+        self.versions = dict(versions)  # group -> version of its files
+        self.live = live
+
+    def _ensure(self, group):
+        if group is not None and group not in self.versions and self.live is not None:
+            values, version = self.live.load(group)
+            for key, value in values.items():
+                self.setdefault(key, value)
+            self.versions[group] = version
+
+    def __missing__(self, key):
+        self._ensure(snapshot_group(key))
+        if key not in self:
+            raise KeyError(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def version_of(self, group):
+        """Version of one group's files, for cache keys (loads the group if needed)"""
+        self._ensure(group)
+        return self.versions[group]
+
+    def replaced(self, values, versions):
+        """
+        Copy with `values` in place of the same keys and `versions` for their
+        groups, e.g. prices as known at a past date. Groups not loaded yet
+        still load lazily; replaced groups are never loaded over.
+        """
+        versions = {**self.versions, **versions}
+        snapshot = Snapshot({**dict(dict.items(self)), **values}, versions, live=self.live)
+        snapshot['version'] = hashlib.sha1(repr(sorted(versions.items())).encode()).hexdigest()[:12]
+        return snapshot
+
+
+# ============================================================================
+# LIVE DATASETS
+# ============================================================================
+
+class LiveDatasets:
+    """Process-wide dashboard datasets, refreshed incrementally from disk"""
+
+    def __init__(self, names=None, lazy=False):
+        self.names = list(names or DATASETS)
+        self.states = {}
+        self.frames = {}
+        self.loaded = set()
+        self.store_signature = ""
+        self.multi_step = {}
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+        if not lazy:
+            for group in self.groups():
+                self._load_group(group)
+        self._snapshot = self._build_snapshot(None, {})
+
+    def groups(self):
+        """Dataset groups in load order; the multi-step results always form one"""
+        groups = dict.fromkeys(dataset_group(name) for name in self.names)
+        groups.setdefault('multi_step')
+        return list(groups)
+
+    def _group_names(self, group):
+        return [name for name in self.names if dataset_group(name) == group]
+
+    def _load_group(self, group):
+        for name in self._group_names(group):
+            self._reload(name)
+        if group == 'multi_step':
+            self._reload_store()
+        self.loaded.add(group)
+
+    def group_version(self, group):
+        if group == 'multi_step' and self.store_signature:
+            return self.store_signature
+        return data_version(self._group_names(group))
+
+    def load(self, group):
+        """
+        Load a group if it is not loaded yet. Returns its snapshot values
+        and version.
+        """
+        with self._lock:
+            if group not in self.loaded:
+                self._load_group(group)
+                self._snapshot = self._build_snapshot(self._snapshot, {}, set(self._group_names(group)))
+            snapshot = self._snapshot
+        values = {key: value for key, value in dict.items(snapshot) if snapshot_group(key) == group}
+        return values, snapshot.versions[group]
+
+    def _reload_store(self):
+        self.store_signature = store_signature()
+        self.multi_step = load_multi_step_store() if self.store_signature else {}
+
+    def _reload(self, name):
+        self.states[name] = FileState.read(DATASETS[name]['csv'])
+        self.frames[name] = load_dataset(name)
+
+    def _build_snapshot(self, previous, appended, reloaded=()):
+        """
+        Snapshot dict in the layout the dashboard pages read.
+
+        The price index, statistics and anomaly state are reused from
+        `previous` when prices did not change, extended when rows were
+        appended, and rebuilt otherwise.
+        """
+        previous = dict(previous) if previous is not None else None  # plain dict: no lazy loads
+        snapshot = dict(self.frames)
+        df_prices = self.frames.get('prices')
+
+        # Multi-step results: the partitioned store wins over per-horizon CSVs
+        if 'multi_step' not in self.loaded:
+            pass
+        elif self.multi_step:
+            for name in MULTI_STEP_CSV_DATASETS.values():
+                snapshot.pop(name, None)
+            for horizon, df in self.multi_step.items():
+                snapshot[f'multi_step_{horizon}d'] = df
+            snapshot['horizons'] = sorted(self.multi_step)
+        else:
+            snapshot['horizons'] = sorted(h for h, name in MULTI_STEP_CSV_DATASETS.items()
+                                          if snapshot.get(name) is not None)
+
+        if 'prices' not in self.loaded:
+            pass
+        elif df_prices is None:
+            snapshot['price_index'] = None
+            snapshot['price_stats'] = None
+            snapshot['price_anomalies'] = None
+        elif previous is None or previous.get('price_index') is None or 'prices' in reloaded:
+            snapshot.update(price_values(df_prices))
+        elif 'prices' in appended:
+            snapshot['price_index'], snapshot['price_stats'], snapshot['price_anomalies'] = self._append_prices(
+                previous, appended['prices']
+            )
+        else:
+            snapshot['price_index'] = previous['price_index']
+            snapshot['price_stats'] = previous['price_stats']
+            snapshot['price_anomalies'] = previous['price_anomalies']
+
+        if snapshot.get('price_index') is not None:
+            # The index's sorted frame is the only copy of the price table kept
+            self.frames['prices'] = snapshot['prices'] = snapshot['price_index'].df
+
+        versions = {group: self.group_version(group) for group in self.loaded}
+        snapshot['version'] = hashlib.sha1(repr(sorted(versions.items())).encode()).hexdigest()[:12]
+        return Snapshot(snapshot, versions, live=self)
+
+    @staticmethod
+    def _append_prices(previous, df_new):
+        """Index, statistics and anomaly state with new price rows merged in"""
+        old_index = previous['price_index']
+        if not old_index.is_append_only(df_new):
+            index = PriceIndex(concat_rows(old_index.df, df_new))
+            return index, PriceStats(index), PriceAnomalies(index)
+
+        index = old_index.append(df_new)
+        stats = PriceStats.__new__(PriceStats)
+        stats.__dict__.update(previous['price_stats'].__dict__)
+        stats.table = stats.table.copy()
+
+        column = stats.column
+        for symbol, rows in df_new.groupby(df_new['symbol'].astype(str), sort=False):
+            stats.append(symbol, rows['date'].to_numpy(), rows[column].to_numpy(), index.values(symbol, column))
+        return index, stats, previous['price_anomalies'].appended(df_new)
+
+    def refresh(self):
+        """
+        Pick up changes to the dataset files and return the current snapshot.
+
+        Unchanged files cost one stat() call each. Concurrent callers get the
+        current snapshot instead of waiting for a refresh in progress.
+        """
+        if not self._lock.acquire(blocking=False):
+            return self._snapshot
+        try:
+            appended, reloaded = {}, set()
+            for name in list(self.states):
+                csv_path = DATASETS[name]['csv']
+                state = self.states[name]
+
+                if state is None or not csv_path.exists():
+                    if (state is None) != (not csv_path.exists()):
+                        self._reload(name)
+                        reloaded.add(name)
+                    continue
+                if state.unchanged(csv_path):
+                    continue
+
+                result = read_appended_rows(name, state) if self.frames[name] is not None else None
+                if result is None:
+                    self._reload(name)
+                    reloaded.add(name)
+                    continue
+
+                rows, self.states[name] = result
+                dropped = set(rows.columns).difference(self.frames[name].columns)
+                if not dropped <= set(redundant_copies(rows, DATASETS[name])):
+                    # New rows carry values in a column the compact frame dropped
+                    self._reload(name)
+                    reloaded.add(name)
+                    continue
+                if len(rows):
+                    self.frames[name] = concat_rows(self.frames[name], rows)
+                    appended[name] = rows
+                    self._save_parquet(name)
+
+            if 'multi_step' in self.loaded and store_signature() != self.store_signature:
+                self._reload_store()
+                reloaded.add('multi_step_store')
+
+            if appended or reloaded:
+                self._snapshot = self._build_snapshot(self._snapshot, appended, reloaded)
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def _save_parquet(self, name):
+        """Best-effort rewrite of the Parquet copy so cold starts see the new rows"""
+        try:
+            write_parquet(self.frames[name], parquet_path(DATASETS[name]['csv']))
+        except (OSError, ImportError):
+            pass
+
+    def snapshot(self):
+        """Current snapshot without checking the files"""
+        return self._snapshot
+
+    def memory_report(self):
+        """Resident bytes of each object in the current snapshot; shared objects count once"""
+        seen = set()
+        rows = []
+        for key, value in self._snapshot.items():
+            if value is None or isinstance(value, (str, int, float, list)):
+                continue
+            rows.append({'object': key, 'type': type(value).__name__, 'bytes': deep_nbytes(value, seen)})
+        df = pd.DataFrame(rows, columns=['object', 'type', 'bytes']).astype({'bytes': 'int64'})
+        return df.sort_values('bytes', ascending=False)
+
+
+# ============================================================================
+# MEMORY FOOTPRINT
+# ============================================================================
+
+def deep_nbytes(obj, seen=None):
+    """
+    Approximate resident bytes of frames, arrays and the containers and
+    objects holding them. Objects already in `seen` (by id) count as zero.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, np.ndarray):
+        # Views share their base's buffer
+        return 0 if obj.base is not None else obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_nbytes(k, seen) + deep_nbytes(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(deep_nbytes(v, seen) for v in obj)
+    if hasattr(obj, '__dict__'):
+        return sys.getsizeof(obj) + deep_nbytes(vars(obj), seen)
+    return sys.getsizeof(obj)
@@ -0,0 +1,270 @@
+"""
+Columnar Data Store
+
+Typed Parquet copies of the CSV datasets read by the dashboard. The CSV files
+remain the source of truth: a Parquet copy is only used while it is at least
+as new as its CSV, otherwise the CSV is parsed and the copy is rewritten.
+
+Run with: python data_store.py
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+# ============================================================================
+# DATASETS
+# ============================================================================
+
+DATA_DIR = Path("data")
+EXTRACTED_DIR = DATA_DIR / "extracted"
+VALIDATION_DIR = DATA_DIR / "validation"
+
+# Each dataset: source CSV, columns parsed as timestamps, columns stored as
+# dictionary-encoded categoricals. Optionally, 'copies' (copy -> source
+# column) dropped on load when identical to their source; dataset_column()
+# recovers them. Prices stay float64: modelling outputs are written at full
+# precision and must not change with the in-memory layout.
+DATASETS = {
+    'prices': {
+        'csv': EXTRACTED_DIR / "steel_prices_synthetic_with_external.csv",
+        'dates': ['date'],
+        'categories': ['source', 'symbol', 'currency', 'unit', 'description'],
+        # Quoted prices equal their USD/mt copies for USD-per-tonne series
+        'copies': {
+            'price_low': 'price_low_usd_mt',
+            'price_mid': 'price_mid_usd_mt',
+            'price_high': 'price_high_usd_mt',
+        },
+    },
+    'walk_forward': {
+        'csv': VALIDATION_DIR / "walk_forward_results.csv",
+        'dates': ['test_date'],
+        'categories': [],
+    },
+    'multi_step_summary': {
+        'csv': VALIDATION_DIR / "multi_step_summary.csv",
+        'dates': [],
+        'categories': [],
+    },
+}
+
+# Per-horizon result CSVs, discovered rather than hard-coded
+MULTI_STEP_CSV_DATASETS = {}
+for _csv in sorted(VALIDATION_DIR.glob("multi_step_*day_results.csv")):
+    _horizon = _csv.name[len("multi_step_"):-len("day_results.csv")]
+    if _horizon.isdigit():
+        MULTI_STEP_CSV_DATASETS[int(_horizon)] = f'multi_step_{int(_horizon)}d'
+        DATASETS[f'multi_step_{int(_horizon)}d'] = {
+            'csv': _csv,
+            'dates': ['test_date'],
+            'categories': [],
+        }
+
+# Partitioned multi-horizon results (horizon=<h>/*.parquet), written by
+# multi_step_forecasting.py. Takes precedence over the per-horizon CSVs.
+MULTI_STEP_STORE = VALIDATION_DIR / "multi_step_results"
+
+
+def data_version(names=None):
+    """Short signature of the dataset CSVs (path, mtime, size) for cache keys"""
+    parts = []
+    for name in sorted(names or DATASETS):
+        csv_path = DATASETS[name]['csv']
+        if csv_path.exists():
+            stat = csv_path.stat()
+            parts.append(f"{csv_path}:{stat.st_mtime_ns}:{stat.st_size}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12]
+
+
+def parquet_path(csv_path):
+    """Location of the Parquet copy of a CSV file"""
+    return Path(csv_path).with_suffix(".parquet")
+
+
+def is_fresh(csv_path, pq_path):
+    """True if the Parquet copy exists and is not older than its CSV"""
+    if not pq_path.exists():
+        return False
+    if not csv_path.exists():
+        return True
+    return pq_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns
+
+
+# ============================================================================
+# READ / WRITE
+# ============================================================================
+
+def read_csv_typed(spec, source=None):
+    """
+    Parse a dataset CSV (or a file-like chunk of it) with typed columns.
+
+    A full file is returned compacted; a chunk keeps its copy columns so the
+    caller can check they are still redundant before merging it.
+    """
+    dtypes = {col: 'category' for col in spec['categories']}
+    df = pd.read_csv(spec['csv'] if source is None else source, dtype=dtypes)
+    for col in spec['dates']:
+        df[col] = pd.to_datetime(df[col])
+    return compact_frame(df, spec, drop_copies=source is None)
+
+
+def redundant_copies(df, spec):
+    """Copy columns of `df` identical to their source column, NaNs included"""
+    return [copy for copy, source in spec.get('copies', {}).items()
+            if copy in df and source in df and df[copy].equals(df[source])]
+
+
+def compact_frame(df, spec, drop_copies=True):
+    """Narrow a dataset frame to its in-memory layout (categoricals, redundant copies dropped)"""
+    narrow = {col: 'category' for col in spec['categories']
+              if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype)}
+    if narrow:
+        df = df.astype(narrow)
+    if drop_copies:
+        df = df.drop(columns=redundant_copies(df, spec))
+    return df
+
+
+def dataset_column(df, column, name):
+    """A column of a loaded dataset, rebuilt from its source if it was dropped as a copy"""
+    if column in df:
+        return df[column]
+    source = DATASETS[name].get('copies', {}).get(column)
+    if source is None:
+        raise KeyError(column)
+    return df[source].rename(column)
+
+
+def concat_rows(df, df_new):
+    """Append rows to a frame, keeping categorical columns categorical"""
+    df_new = df_new[df.columns]
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            extra = pd.Index(df_new[col].dropna().unique()).difference(df[col].cat.categories)
+            if len(extra):
+                df = df.assign(**{col: df[col].cat.add_categories(extra)})
+            df_new = df_new.assign(**{col: pd.Categorical(df_new[col], categories=df[col].cat.categories)})
+    return pd.concat([df, df_new], ignore_index=True)
+
+
+def write_parquet(df, pq_path):
+    """Write a frame to Parquet, replacing any existing copy atomically"""
+    tmp_path = pq_path.with_name(f".{pq_path.name}.{os.getpid()}.tmp")
+    try:
+        df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, pq_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def convert_dataset(name):
+    """Convert one dataset CSV to Parquet. Returns the Parquet path or None"""
+    spec = DATASETS[name]
+    if not spec['csv'].exists():
+        return None
+    pq_path = parquet_path(spec['csv'])
+    write_parquet(read_csv_typed(spec), pq_path)
+    return pq_path
+
+
+def convert_all():
+    """Convert every known dataset CSV to Parquet"""
+    return {name: convert_dataset(name) for name in DATASETS}
+
+
+def load_dataset(name):
+    """
+    Load a dataset, preferring its Parquet copy.
+
+    Falls back to parsing the CSV when the copy is missing or stale, and
+    refreshes the copy on the way. Returns None if neither file exists.
+    """
+    spec = DATASETS[name]
+    csv_path = spec['csv']
+    pq_path = parquet_path(csv_path)
+
+    if is_fresh(csv_path, pq_path):
+        try:
+            return compact_frame(pd.read_parquet(pq_path, engine="pyarrow"), spec)
+        except Exception:
+            # Unreadable or half-written copy; rebuild it from the CSV below
+            if not csv_path.exists():
+                raise
+
+    if not csv_path.exists():
+        return None
+
+    df = read_csv_typed(spec)
+    try:
+        write_parquet(df, pq_path)
+    except (OSError, ImportError):
+        # Read-only deployments still work from the CSV
+        pass
+    return df
+
+
+# ============================================================================
+# MULTI-HORIZON RESULTS STORE
+# ============================================================================
+
+def multi_step_partitions(store=MULTI_STEP_STORE):
+    """horizon -> partition directory of the multi-step results store"""
+    if not store.is_dir():
+        return {}
+    partitions = {}
+    for entry in os.scandir(store):
+        key, _, value = entry.name.partition('=')
+        if entry.is_dir() and key == 'horizon' and value.isdigit():
+            partitions[int(value)] = Path(entry.path)
+    return dict(sorted(partitions.items()))
+
+
+def store_signature(store=MULTI_STEP_STORE):
+    """Short signature of the files in the results store (empty if there is none)"""
+    parts = []
+    for horizon, partition in multi_step_partitions(store).items():
+        for entry in sorted(os.scandir(partition), key=lambda e: e.name):
+            stat = entry.stat()
+            parts.append(f"{horizon}/{entry.name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12] if parts else ""
+
+
+def load_multi_step_store(store=MULTI_STEP_STORE):
+    """horizon -> results frame, one Parquet partition read per horizon"""
+    results = {}
+    for horizon, partition in multi_step_partitions(store).items():
+        df = pd.read_parquet(partition, engine="pyarrow")
+        df['horizon'] = horizon
+        results[horizon] = df
+    return results
+
+
+def write_multi_step_store(df_results, store=MULTI_STEP_STORE):
+    """Replace the results store with `df_results`, partitioned by horizon"""
+    tmp_store = store.with_name(f".{store.name}.{os.getpid()}.tmp")
+    old_store = store.with_name(f".{store.name}.{os.getpid()}.old")
+    shutil.rmtree(tmp_store, ignore_errors=True)
+    df_results.to_parquet(tmp_store, engine="pyarrow", partition_cols=['horizon'], index=False)
+
+    if store.exists():
+        os.replace(store, old_store)
+    os.replace(tmp_store, store)
+    shutil.rmtree(old_store, ignore_errors=True)
+    return store
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    for name, pq_path in convert_all().items():
+        if pq_path is None:
+            print(f"  {name}: source CSV not found, skipped")
+        else:
+            print(f"  {name}: {pq_path} ({pq_path.stat().st_size:,} bytes)")
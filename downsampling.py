@@ -0,0 +1,109 @@
+"""
+Series Downsampling
+
+Reduces long price series to about one point per horizontal chart pixel
+before they are handed to Plotly. Two methods are available:
+
+- minmax: keeps the lowest and highest point of each bucket (fully vectorized)
+- lttb:   Largest-Triangle-Three-Buckets, keeps the visually dominant point
+
+Selecting a narrower date range re-slices the full-resolution series first,
+so zooming in returns every original point once the range fits the chart.
+"""
+
+import numpy as np
+
+DEFAULT_CHART_WIDTH_PX = 1200
+
+# JSON bytes of a line trace as Plotly 6+ serializes it: each point is a quoted
+# ISO datetime in x and a float64 in y, base64-encoded (8 bytes -> 32/3 chars)
+TRACE_JSON_BYTES = len('{"mode":"lines","x":[],"y":{"dtype":"f8","bdata":""},"type":"scatter"}')
+POINT_JSON_BYTES = len('"2025-01-01T00:00:00",') + 8 * 4 / 3
+
+
+def points_for_width(width_px=DEFAULT_CHART_WIDTH_PX):
+    """Target number of points for a chart of the given pixel width"""
+    return max(int(width_px), 3)
+
+
+def date_window(dates, start=None, end=None):
+    """Slice of a sorted datetime64 array covering [start, end]"""
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start), side='left')
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end), side='right')
+    return slice(int(lo), int(hi))
+
+
+def _bucket_starts(n, n_buckets, first=0, last=None):
+    last = n if last is None else last
+    return np.linspace(first, last, n_buckets + 1).astype(np.int64)[:-1]
+
+
+def _first_match_per_bucket(match, bucket):
+    positions = np.flatnonzero(match)
+    _, first = np.unique(bucket[positions], return_index=True)
+    return positions[first]
+
+
+def minmax_indices(y, n_out):
+    """Indices of the min and max point of each of n_out // 2 buckets"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    n_buckets = max(n_out // 2, 1)
+    starts = _bucket_starts(n, n_buckets)
+    bucket = np.repeat(np.arange(n_buckets), np.diff(np.r_[starts, n]))
+
+    lows = np.fmin.reduceat(y, starts)
+    highs = np.fmax.reduceat(y, starts)
+    idx_min = _first_match_per_bucket(y == lows[bucket], bucket)
+    idx_max = _first_match_per_bucket(y == highs[bucket], bucket)
+
+    return np.unique(np.concatenate([[0, n - 1], idx_min, idx_max]))
+
+
+def lttb_indices(x, y, n_out):
+    """Indices chosen by Largest-Triangle-Three-Buckets"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # First and last points are kept; the rest is split into n_out - 2 buckets
+    edges = np.r_[_bucket_starts(n - 1, n_out - 2, first=1), n - 1]
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+
+        area = np.abs(
+            (x[prev] - avg_x) * (y[lo:hi] - y[prev])
+            - (x[prev] - x[lo:hi]) * (avg_y - y[prev])
+        )
+        prev = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        selected[i + 1] = prev
+
+    return selected
+
+
+def downsample(dates, values, n_out, method='minmax'):
+    """Downsampled (dates, values) arrays with at most about n_out points"""
+    if method == 'lttb':
+        idx = lttb_indices(np.asarray(dates).astype('datetime64[ns]').astype(np.int64), values, n_out)
+    elif method == 'minmax':
+        idx = minmax_indices(values, n_out)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return dates[idx], values[idx]
+
+
+def trace_payload_bytes(n_points):
+    """Estimated size of a line trace's serialized JSON, in bytes, from its point count"""
+    return int(TRACE_JSON_BYTES + n_points * POINT_JSON_BYTES)
@@ -0,0 +1,256 @@
+"""
+Elastic Net Tuning
+
+Walk-forward search over alpha and l1_ratio for the forecast model. A full
+search costs a few fits per fold, not one fit per candidate per fold.
+
+- Regularization paths: for each l1_ratio and horizon, every alpha in the
+  grid is fitted in one enet_path() call. The path runs from the largest
+  alpha down, and each solve warm-starts from the previous alpha's
+  coefficients, so only the small alphas at the end need many sweeps.
+- Gram matrices: the solver works on X'X and X'y of the standardized
+  training rows. Training windows are nested (each fold adds STEP rows), so
+  raw sums of x, xx' and xy are extended by the new rows only. The
+  standardized Gram matrix follows from those sums in O(features^2) per
+  fold instead of O(rows x features^2).
+- Parallelism: the l1_ratios are split across a process pool. Workers open
+  the feature and target matrices memory-mapped, as walk_forward_validation
+  does.
+
+Folds are those of multi_step_forecasting.py: every horizon trains on the
+rows whose targets are known for all horizons. Candidates are ranked by
+their MAE relative to the best candidate at each horizon, averaged over
+horizons, so the long horizons' larger errors do not decide alone.
+
+Results go to data/validation/elastic_net_tuning.csv.
+
+Run with: python elastic_net_tuning.py [--workers 4] [--save-model]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import enet_path
+
+from data_store import load_dataset
+from forecast_engine import ALPHA, HORIZONS, L1_RATIO
+from multi_step_forecasting import fold_origins, target_matrix
+from walk_forward_validation import INITIAL_TRAIN, STEP, prepare_arrays
+
+OUTPUT_FILE = Path("data/validation/elastic_net_tuning.csv")
+
+# Search grid; includes the current ALPHA and L1_RATIO
+L1_RATIOS = [0.1, 0.3, 0.5, 0.7, 0.9, 0.95, 1.0]
+ALPHAS = np.logspace(-1, 2, 25)
+
+# Solver settings of the production model
+MAX_ITER = 10000
+TOL = 1e-4
+
+
+# ============================================================================
+# INCREMENTAL GRAM MATRIX
+# ============================================================================
+
+class GramAccumulator:
+    """
+    Sums of x, xx', y, xy over the first `n` rows, extended as `n` grows, and
+    the standardized Gram matrix and X'y they imply.
+
+    Rows are shifted by a fixed reference (the first window's mean) before
+    summing, so the centred products do not cancel catastrophically.
+    """
+
+    def __init__(self, X, Y, shift):
+        self.X, self.Y = X, Y
+        self.shift = np.asarray(shift, dtype=float)
+        n_features, n_targets = X.shape[1], Y.shape[1]
+        self.n = 0
+        self.sx = np.zeros(n_features)
+        self.sxx = np.zeros((n_features, n_features))
+        self.sy = np.zeros(n_targets)
+        self.sxy = np.zeros((n_features, n_targets))
+
+    def extend_to(self, n):
+        """Add rows [self.n, n) to the sums"""
+        X_new = self.X[self.n:n] - self.shift
+        Y_new = self.Y[self.n:n]
+        self.sx += X_new.sum(axis=0)
+        self.sxx += X_new.T @ X_new
+        self.sy += Y_new.sum(axis=0)
+        self.sxy += X_new.T @ Y_new
+        self.n = n
+
+    def standardized(self):
+        """
+        (Gram, Xy, mean, scale, y_mean) for the rows so far: Gram and Xy of
+        the training rows standardized as StandardScaler would, with y centred
+        """
+        n = self.n
+        mean = self.sx / n
+        cov = self.sxx / n - np.outer(mean, mean)
+        var = np.diag(cov).copy()
+        # Constant columns keep scale 1, as in walk_forward_validation._standardize
+        constant = var <= 1e-12 * np.maximum(np.diag(self.sxx) / n, np.finfo(float).tiny)
+        scale = np.sqrt(np.where(constant, 1.0, var))
+
+        gram = np.ascontiguousarray(n * cov / np.outer(scale, scale))
+        y_mean = self.sy / n
+        xy = (self.sxy - n * np.outer(mean, y_mean)) / scale[:, None]
+        return gram, xy, mean + self.shift, scale, y_mean
+
+
+# ============================================================================
+# PATHS OVER FOLDS
+# ============================================================================
+
+def run_paths(arrays_dir, origins, horizons, l1_ratios, alphas):
+    """
+    Out-of-sample errors of every (horizon, l1_ratio, alpha) candidate at
+    every fold, shape (folds, horizons, l1_ratios, alphas), and the number
+    of active features of each fit.
+
+    Runs in a worker process; the arrays are opened read-only via mmap.
+    """
+    X = np.load(Path(arrays_dir) / "X.npy", mmap_mode='r')
+    Y = np.load(Path(arrays_dir) / "Y.npy", mmap_mode='r')
+    alphas = np.sort(alphas)[::-1]
+    max_h = max(horizons)
+
+    first_train = origins[0] - max_h + 1
+    gram = GramAccumulator(X, Y, X[:first_train].mean(axis=0))
+    shape = (len(origins), len(horizons), len(l1_ratios), len(alphas))
+    errors = np.full(shape, np.nan)
+    n_active = np.zeros(shape, dtype=np.int64)
+
+    for f, origin in enumerate(origins):
+        n_train = origin - max_h + 1
+        gram.extend_to(n_train)
+        G, Xy, mean, scale, y_mean = gram.standardized()
+        # enet_path takes X and y for their shape and norm; the solver itself works on G and Xy
+        X_train = np.asfortranarray((X[:n_train] - mean) / scale)
+        x_origin = (X[origin] - mean) / scale
+
+        for j, horizon in enumerate(horizons):
+            if origin + horizon >= len(X):
+                continue
+            y_train = np.ascontiguousarray(Y[:n_train, j] - y_mean[j])
+            xy = np.ascontiguousarray(Xy[:, j])
+            for i, l1_ratio in enumerate(l1_ratios):
+                _, coefs, _ = enet_path(
+                    X_train, y_train, l1_ratio=l1_ratio, alphas=alphas, precompute=G, Xy=xy,
+                    check_input=False, max_iter=MAX_ITER, tol=TOL,
+                )
+                errors[f, j, i] = y_mean[j] + x_origin @ coefs - Y[origin, j]
+                n_active[f, j, i] = np.count_nonzero(coefs, axis=0)
+
+    return errors, n_active
+
+
+def tune(df_prices, horizons=HORIZONS, l1_ratios=L1_RATIOS, alphas=ALPHAS,
+         initial_train=INITIAL_TRAIN, step=STEP, workers=None):
+    """Walk-forward errors of every candidate. Returns one row per (horizon, l1_ratio, alpha)"""
+    horizons = sorted(set(horizons))
+    alphas = np.sort(np.asarray(alphas, dtype=float))[::-1]
+    X, price, dates = prepare_arrays(df_prices)
+    Y = target_matrix(price, horizons)
+    origins = fold_origins(len(X), horizons, initial_train, step)
+    unscored = [h for h in horizons if not len(origins) or origins[0] + h >= len(X)]
+    if unscored:
+        raise ValueError(f"Not enough rows ({len(X)}) to score horizons {unscored} on folds shared "
+                         f"with horizon {max(horizons)} after {initial_train} training rows")
+
+    workers = min(workers or os.cpu_count() or 1, len(l1_ratios))
+    chunks = [list(chunk) for chunk in np.array_split(np.asarray(l1_ratios, dtype=float), workers) if len(chunk)]
+
+    with tempfile.TemporaryDirectory(prefix="enet_tuning_") as arrays_dir:
+        np.save(Path(arrays_dir) / "X.npy", X)
+        np.save(Path(arrays_dir) / "Y.npy", Y)
+
+        if len(chunks) == 1:
+            parts = [run_paths(arrays_dir, origins, horizons, chunks[0], alphas)]
+        else:
+            with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+                futures = [pool.submit(run_paths, arrays_dir, origins, horizons, chunk, alphas) for chunk in chunks]
+                parts = [future.result() for future in futures]
+
+    errors = np.concatenate([part[0] for part in parts], axis=2)
+    n_active = np.concatenate([part[1] for part in parts], axis=2)
+    return results_table(errors, n_active, horizons, [r for chunk in chunks for r in chunk], alphas)
+
+
+def results_table(errors, n_active, horizons, l1_ratios, alphas):
+    """Per-candidate metrics from the (folds, horizons, l1_ratios, alphas) error array"""
+    scored = ~np.isnan(errors)
+    with np.errstate(invalid='ignore'):
+        mae = np.nanmean(np.abs(errors), axis=0)
+        rmse = np.sqrt(np.nanmean(errors ** 2, axis=0))
+        active = np.where(scored, n_active, 0).sum(axis=0) / np.maximum(scored.sum(axis=0), 1)
+
+    index = pd.MultiIndex.from_product([horizons, l1_ratios, alphas], names=['horizon', 'l1_ratio', 'alpha'])
+    df = pd.DataFrame({
+        'mae': mae.reshape(-1),
+        'rmse': rmse.reshape(-1),
+        'n_folds': scored.sum(axis=0).reshape(-1),
+        'mean_active_features': active.reshape(-1),
+    }, index=index).reset_index()
+    df['relative_mae'] = df['mae'] / df.groupby('horizon')['mae'].transform('min')
+    return df
+
+
+def rank_candidates(df_results):
+    """(l1_ratio, alpha) pairs ranked by relative MAE averaged over horizons, with each horizon's MAE"""
+    by_horizon = df_results.pivot_table(index=['l1_ratio', 'alpha'], columns='horizon', values='mae')
+    by_horizon.columns = [f"mae_{h}d" for h in by_horizon.columns]
+    score = df_results.groupby(['l1_ratio', 'alpha'])['relative_mae'].mean().rename('score')
+    # Ties (e.g. alphas large enough to zero every coefficient) go to the least regularized
+    return by_horizon.join(score).reset_index().sort_values(['score', 'alpha'], ignore_index=True)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    from forecast_engine import MODEL_FILE, fit, save_artifact
+
+    parser = argparse.ArgumentParser(description="Walk-forward alpha / l1_ratio search for the Elastic Net")
+    parser.add_argument("--horizons", default=",".join(map(str, HORIZONS)),
+                        help="Comma-separated horizons in days")
+    parser.add_argument("--initial-train", type=int, default=INITIAL_TRAIN)
+    parser.add_argument("--step", type=int, default=STEP)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE)
+    parser.add_argument("--save-model", action="store_true",
+                        help=f"Refit with the best candidate and overwrite {MODEL_FILE}")
+    args = parser.parse_args()
+
+    df_prices = load_dataset('prices')
+    horizons = [int(h) for h in args.horizons.split(",") if h.strip()]
+    start = time.perf_counter()
+    df_results = tune(df_prices, horizons, initial_train=args.initial_train, step=args.step, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    df_results.to_csv(args.output, index=False)
+
+    df_ranked = rank_candidates(df_results)
+    n_folds = int(df_results['n_folds'].max())
+    print(f"Evaluated {len(df_ranked)} candidates x {len(horizons)} horizons x {n_folds} folds "
+          f"in {elapsed:.1f}s; saved {args.output}")
+    print(df_ranked.head(10).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+    current = df_ranked[np.isclose(df_ranked['l1_ratio'], L1_RATIO) & np.isclose(df_ranked['alpha'], ALPHA)]
+    if len(current):
+        print(f"Current alpha={ALPHA:g}, l1_ratio={L1_RATIO:g}: score {current['score'].iloc[0]:.4f} "
+              f"(rank {current.index[0] + 1})")
+
+    if args.save_model:
+        best = df_ranked.iloc[0]
+        artifact = fit(df_prices, horizons, alpha=best['alpha'], l1_ratio=best['l1_ratio'])
+        save_artifact(artifact)
+        print(f"Saved {MODEL_FILE} with alpha={best['alpha']:g}, l1_ratio={best['l1_ratio']:g}")
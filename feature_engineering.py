@@ -0,0 +1,188 @@
+"""
+Lag Feature Engineering
+
+Builds the `<symbol>` / `<symbol>_lag<N>` feature columns (named as in
+data/features/steel_features_with_external.csv) from the long-format price
+table. Lags are gathered through one strided sliding-window view over the
+date x symbol matrix, so no shifted copy of any column is made; only the
+final feature matrix is materialized.
+
+`LagFeatureBuilder` keeps just the last max(lags) + 1 rows in a ring buffer
+and produces the feature row for each newly appended date in O(symbols x
+lags), so serving never rebuilds or re-reads the full feature matrix.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from price_index import DEFAULT_VALUE_COLUMN
+
+FEATURE_LAGS = [1, 2, 3, 5, 7, 10, 15, 20, 30]
+
+
+# ============================================================================
+# FULL HISTORY
+# ============================================================================
+
+def wide_prices(df_prices, column=DEFAULT_VALUE_COLUMN):
+    """Date x symbol float64 matrix of one price column, gaps forward-filled"""
+    wide = df_prices.pivot_table(index='date', columns='symbol', values=column, observed=True).astype(float)
+    wide.columns = wide.columns.astype(str)
+    return wide.sort_index(axis=1).ffill()
+
+
+def daily_log_returns(wide, dtype=float):
+    """(dates - 1) x symbols log returns; missing or non-positive prices move by 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(np.asarray(wide, dtype=float)), axis=0)
+    returns[~np.isfinite(returns)] = 0.0
+    return returns.astype(dtype, copy=False)
+
+
+def feature_names(symbols, lags=FEATURE_LAGS):
+    """Feature names: each symbol's current value followed by its lags"""
+    names = []
+    for symbol in symbols:
+        names.append(symbol)
+        names.extend(f"{symbol}_lag{lag}" for lag in lags)
+    return names
+
+
+def _lag_offsets(lags):
+    """Window positions of the current value and each lag, oldest slot first"""
+    return max(lags) - np.array([0] + list(lags))
+
+
+def lag_feature_matrix(values, lags=FEATURE_LAGS):
+    """
+    (dates x symbols) array -> (dates x symbols * (1 + len(lags))) array.
+
+    Rows earlier than a lag reaches are NaN for that lag, as with shift().
+    """
+    values = np.asarray(values, dtype=float)
+    n_dates, n_symbols = values.shape
+    max_lag = max(lags)
+
+    padded = np.vstack([np.full((max_lag, n_symbols), np.nan), values])
+    # windows[t, s, k] == padded[t + k, s] == values[t + k - max_lag, s]
+    windows = sliding_window_view(padded, max_lag + 1, axis=0)
+    return windows[:, :, _lag_offsets(lags)].reshape(n_dates, -1)
+
+
+def build_lag_features(wide, lags=FEATURE_LAGS):
+    """Current and lagged values for every row of a wide price matrix"""
+    return pd.DataFrame(
+        lag_feature_matrix(wide.to_numpy(), lags),
+        index=wide.index,
+        columns=feature_names(wide.columns, lags),
+    )
+
+
+# ============================================================================
+# INCREMENTAL
+# ============================================================================
+
+def latest_wide(price_index, column=DEFAULT_VALUE_COLUMN, n_rows=max(FEATURE_LAGS) + 1, after=None):
+    """
+    Last `n_rows` dates of the wide price matrix, read from per-symbol tails.
+
+    With `after`, only dates strictly later than it are returned instead.
+    """
+    last_date = max(price_index.dates(s)[-1] for s in price_index.symbols)
+    if after is None:
+        # Generous calendar window so symbols with gaps still cover n_rows dates
+        cutoff, side = last_date - np.timedelta64(3 * n_rows, 'D'), 'left'
+    else:
+        cutoff, side = np.datetime64(after), 'right'
+
+    series = {}
+    for symbol in price_index.symbols:
+        dates = price_index.dates(symbol)
+        start = np.searchsorted(dates, cutoff, side=side)
+        series[symbol] = pd.Series(price_index.values(symbol, column)[start:], index=dates[start:])
+
+    wide = pd.DataFrame(series).sort_index()
+    return wide if after is not None else wide.ffill().iloc[-n_rows:]
+
+
+def wide_window(price_index, start, end, symbols, column=DEFAULT_VALUE_COLUMN):
+    """
+    Dates of the index in [start, end] and the wide rows at those dates, as
+    wide_prices() builds them: missing values carry forward, NaN before a
+    symbol's first value.
+    """
+    start, end = np.datetime64(start), np.datetime64(end)
+    parts = []
+    for symbol in symbols:
+        dates = price_index.dates(symbol)
+        parts.append(dates[np.searchsorted(dates, start, side='left'):np.searchsorted(dates, end, side='right')])
+    window_dates = np.unique(np.concatenate(parts)) if parts else np.array([], dtype='datetime64[ns]')
+
+    values = np.full((len(window_dates), len(symbols)), np.nan)
+    for i, symbol in enumerate(symbols):
+        dates = price_index.dates(symbol)
+        # The row before `start` carries into the window
+        lo = max(np.searchsorted(dates, start, side='left') - 1, 0)
+        hi = np.searchsorted(dates, end, side='right')
+        tail = price_index.values(symbol, column)[lo:hi].astype(float)
+        filled = np.maximum.accumulate(np.where(np.isnan(tail), 0, np.arange(len(tail))))
+        pos = np.searchsorted(dates[lo:hi], window_dates, side='right') - 1
+        values[pos >= 0, i] = tail[filled][pos[pos >= 0]]
+    return window_dates, values
+
+
+class LagFeatureBuilder:
+    """Ring buffer of the last max(lags) + 1 wide rows, emitting one feature row per date"""
+
+    def __init__(self, symbols, lags=FEATURE_LAGS):
+        self.symbols = list(symbols)
+        self.lags = list(lags)
+        self.columns = feature_names(self.symbols, self.lags)
+        self.depth = max(self.lags) + 1
+        self.last_date = None
+
+        self._offsets = np.array([0] + self.lags)
+        self._buffer = np.full((self.depth, len(self.symbols)), np.nan)
+        self._dates = np.full(self.depth, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self._pos = 0
+
+    @classmethod
+    def from_wide(cls, wide, lags=FEATURE_LAGS):
+        """Builder primed with the last rows of a wide price matrix"""
+        builder = cls(wide.columns, lags)
+        for date, values in zip(wide.index[-builder.depth:], wide.to_numpy()[-builder.depth:]):
+            builder.append(date, values)
+        return builder
+
+    @property
+    def latest_values(self):
+        """Most recent wide row, in `symbols` order"""
+        return self._buffer[(self._pos - 1) % self.depth]
+
+    def append(self, date, values):
+        """Add one date's prices (missing values carry forward) and return its feature row"""
+        values = np.asarray(values, dtype=float)
+        values = np.where(np.isnan(values), self.latest_values, values)
+        self._buffer[self._pos] = values
+        self._dates[self._pos] = pd.Timestamp(date).to_datetime64()
+        self._pos = (self._pos + 1) % self.depth
+        self.last_date = pd.Timestamp(date)
+        return self.latest_row()
+
+    def append_wide(self, wide):
+        """Append every row of a wide frame whose columns match `symbols`"""
+        values = wide.reindex(columns=self.symbols).to_numpy()
+        for date, row in zip(wide.index, values):
+            self.append(date, row)
+
+    def window(self):
+        """Buffered dates and wide rows, oldest first"""
+        order = (self._pos + np.arange(self.depth)) % self.depth
+        order = order[~np.isnat(self._dates[order])]
+        return self._dates[order], self._buffer[order]
+
+    def latest_row(self):
+        """Feature row for the most recent date, in `columns` order"""
+        slots = (self._pos - 1 - self._offsets) % self.depth
+        return self._buffer[slots].T.reshape(-1)
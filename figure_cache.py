@@ -0,0 +1,67 @@
+"""
+Figure Cache
+
+Bounded LRU of built Plotly figures, shared by every session of the app
+process. Entries are keyed by (page, widget selection, data version), so a
+rerun that only changes an unrelated widget reuses the figures it already
+built. When the data version moves on, entries for older versions are
+dropped at once instead of waiting to be evicted. Several versions can be
+current at once, e.g. one per dataset a page's figures are built from.
+
+Cached figures are shared between sessions and must not be modified after
+they are built.
+"""
+
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class FigureCache:
+    """Thread-safe LRU of figures (or any built value) keyed by page, selection and version"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.versions = frozenset()
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, page, selection, version, build):
+        """Cached value for the key, calling `build()` to create it on a miss"""
+        key = (page, selection, version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Built outside the lock; two sessions missing together both build once
+        value = build()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def retain(self, *versions):
+        """Drop every entry not built for one of `versions` (no-op while they are unchanged)"""
+        versions = frozenset(versions)
+        if versions == self.versions:
+            return
+        with self._lock:
+            self.versions = versions
+            for key in [key for key in self._entries if key[2] not in versions]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
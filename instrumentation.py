@@ -0,0 +1,329 @@
+"""
+Dashboard Instrumentation
+
+Timing and memory for each dashboard rerun: load_data(), the sidebar, the
+page branch and every chart, plus cache hit/miss counters and the
+serialized size of each figure sent to the browser.
+
+Off unless DASHBOARD_PERF=1. When off, `Recorder.start_rerun()` returns a
+no-op timer, so instrumented code pays one method call per measurement and
+figures are never serialized a second time.
+
+The recent reruns, cache hit ratios and figure sizes are shown on the
+dashboard's "⏱ Performance" page (listed only while instrumentation is on)
+and exported as Prometheus text by `Recorder.prometheus_text()`. Set
+DASHBOARD_PERF_FILE to also write that text after every rerun, e.g. into
+node_exporter's textfile collector directory.
+"""
+
+import math
+import numbers
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import plotly.io
+
+PERF_ENV = "DASHBOARD_PERF"
+PERF_FILE_ENV = "DASHBOARD_PERF_FILE"
+METRIC_PREFIX = "steel_dashboard"
+
+RECENT_RERUNS = 50
+MAX_TRACKED_FIGURES = 1024
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _delta(before, after):
+    return None if before is None or after is None else after - before
+
+
+# ============================================================================
+# PER-RERUN TIMER
+# ============================================================================
+
+class RerunTimer:
+    """
+    Measurements for one script run. `mark(name)` closes a sequential phase
+    (time since the previous mark); `span(name)` times a nested block such
+    as one chart without affecting the phases.
+    """
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.page = None
+        self.started = time.perf_counter()
+        self.rss_start = rss_bytes()
+        self.phases = []   # (name, seconds, rss delta)
+        self.spans = []    # (name, seconds, rss delta)
+        self.figures = []  # (name, bytes)
+        self._lap = (self.started, self.rss_start)
+
+    def mark(self, name):
+        now, rss = time.perf_counter(), rss_bytes()
+        self.phases.append((name, now - self._lap[0], _delta(self._lap[1], rss)))
+        self._lap = (now, rss)
+
+    @contextmanager
+    def span(self, name):
+        start, rss = time.perf_counter(), rss_bytes()
+        try:
+            yield
+        finally:
+            self.spans.append((name, time.perf_counter() - start, _delta(rss, rss_bytes())))
+
+    def figure(self, name, fig):
+        self.figures.append((name, self.recorder.figure_bytes(fig)))
+
+    def finish(self):
+        self.recorder.finish(self)
+
+
+class _NullTimer:
+    """Stand-in for RerunTimer while instrumentation is off"""
+
+    page = None
+    _span = nullcontext()
+
+    def mark(self, name):
+        pass
+
+    def span(self, name):
+        return self._span
+
+    def figure(self, name, fig):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+# ============================================================================
+# RECORDER
+# ============================================================================
+
+class Recorder:
+    """Process-wide store of recent reruns, stage totals, cache counters and figure sizes"""
+
+    def __init__(self, enabled=None, export_path=None):
+        if enabled is None:
+            enabled = os.environ.get(PERF_ENV, '') not in ('', '0')
+        self.enabled = enabled
+        self.export_path = export_path or os.environ.get(PERF_FILE_ENV) or None
+        self.reruns = deque(maxlen=RECENT_RERUNS)
+        self.n_reruns = 0
+        self.stage_totals = {}   # stage -> [count, seconds]
+        self.cache_counts = {}   # cache -> [calls, misses]
+        self.watched_caches = {}  # cache -> object with hits/misses counters
+        self.figure_sizes = {}   # figure name -> bytes of its latest payload
+        self._sizes = {}         # id(fig) -> (weakref to fig, bytes)
+        self._lock = threading.Lock()
+
+    def start_rerun(self):
+        return RerunTimer(self) if self.enabled else NULL_TIMER
+
+    # ------------------------------------------------------------------
+    # Caches
+    # ------------------------------------------------------------------
+
+    def watch_cache(self, name, cache):
+        """Report a cache that counts its own `hits` and `misses` (e.g. FigureCache)"""
+        if self.enabled:
+            self.watched_caches[name] = cache
+
+    def cache_call(self, name):
+        """Count a lookup; pair with cache_miss() called from inside the cached function"""
+        if self.enabled:
+            with self._lock:
+                self.cache_counts.setdefault(name, [0, 0])[0] += 1
+
+    def cache_miss(self, name):
+        if self.enabled:
+            with self._lock:
+                self.cache_counts.setdefault(name, [0, 0])[1] += 1
+
+    def cache_stats(self):
+        """cache -> (hits, misses)"""
+        stats = {name: (cache.hits, cache.misses) for name, cache in self.watched_caches.items()}
+        with self._lock:
+            for name, (calls, misses) in self.cache_counts.items():
+                stats[name] = (max(calls - misses, 0), misses)
+        return stats
+
+    # ------------------------------------------------------------------
+    # Figures and reruns
+    # ------------------------------------------------------------------
+
+    def figure_bytes(self, fig):
+        """Size of the figure JSON sent to the browser; measured once per cached figure"""
+        entry = self._sizes.get(id(fig))
+        if entry is not None and entry[0]() is fig:
+            return entry[1]
+
+        n_bytes = len(plotly.io.to_json(fig, validate=False))
+        with self._lock:
+            if len(self._sizes) >= MAX_TRACKED_FIGURES:
+                self._sizes = {key: value for key, value in self._sizes.items() if value[0]() is not None}
+            self._sizes[id(fig)] = (weakref.ref(fig), n_bytes)
+        return n_bytes
+
+    def finish(self, timer):
+        """Record a completed rerun and refresh the export file"""
+        rss = rss_bytes()
+        record = {
+            'finished_at': datetime.now(timezone.utc),
+            'page': timer.page,
+            'total_s': time.perf_counter() - timer.started,
+            'rss_bytes': rss,
+            'rss_delta_bytes': _delta(timer.rss_start, rss),
+            'phases': timer.phases,
+            'spans': timer.spans,
+            'figures': timer.figures,
+        }
+        with self._lock:
+            self.reruns.append(record)
+            self.n_reruns += 1
+            for name, seconds, _ in [('rerun', record['total_s'], None)] + timer.phases + timer.spans:
+                totals = self.stage_totals.setdefault(name, [0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+            self.figure_sizes.update(timer.figures)
+
+        if self.export_path:
+            self.write_prometheus(self.export_path)
+
+    # ------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------
+
+    def rerun_frame(self):
+        """One row per recent rerun, newest first, with a column per phase (ms)"""
+        with self._lock:
+            reruns = list(self.reruns)
+        rows = []
+        for record in reversed(reruns):
+            row = {
+                'time': record['finished_at'].strftime('%H:%M:%S'),
+                'page': record['page'],
+                'total_ms': record['total_s'] * 1000,
+            }
+            # "page/<name>" phases share one column; the page is its own column
+            row.update({f"{name.split('/')[0]}_ms": seconds * 1000 for name, seconds, _ in record['phases']})
+            row['charts_ms'] = sum(seconds for _, seconds, _ in record['spans']) * 1000
+            row['rss_mb'] = record['rss_bytes'] / 2**20 if record['rss_bytes'] is not None else None
+            row['rss_delta_kb'] = (record['rss_delta_bytes'] / 1024
+                                   if record['rss_delta_bytes'] is not None else None)
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def stage_frame(self):
+        """Call count, total and mean time per phase and span since start-up"""
+        with self._lock:
+            totals = dict(self.stage_totals)
+        rows = [{'stage': name, 'count': count, 'total_s': seconds, 'mean_ms': 1000 * seconds / count}
+                for name, (count, seconds) in totals.items()]
+        return pd.DataFrame(rows, columns=['stage', 'count', 'total_s', 'mean_ms'])
+
+    def cache_frame(self):
+        rows = []
+        for name, (hits, misses) in sorted(self.cache_stats().items()):
+            total = hits + misses
+            rows.append({'cache': name, 'hits': hits, 'misses': misses,
+                         'hit_ratio': hits / total if total else None})
+        return pd.DataFrame(rows, columns=['cache', 'hits', 'misses', 'hit_ratio'])
+
+    def figure_frame(self):
+        with self._lock:
+            sizes = dict(self.figure_sizes)
+        rows = [{'figure': name, 'kb': n_bytes / 1024} for name, n_bytes in sorted(sizes.items())]
+        return pd.DataFrame(rows, columns=['figure', 'kb'])
+
+    # ------------------------------------------------------------------
+    # Prometheus export
+    # ------------------------------------------------------------------
+
+    def prometheus_text(self):
+        """All counters in the Prometheus text exposition format"""
+        with self._lock:
+            n_reruns = self.n_reruns
+            totals = dict(self.stage_totals)
+            sizes = dict(self.figure_sizes)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{full_name}{suffix}{_labels(labels)} {_number(value)}")
+
+        metric('reruns_total', 'counter', "Dashboard script reruns recorded", [('', {}, n_reruns)])
+        metric('stage_seconds', 'summary', "Time spent per rerun phase, chart and whole rerun", [
+            sample
+            for stage, (count, seconds) in sorted(totals.items())
+            for sample in (('_sum', {'stage': stage}, seconds), ('_count', {'stage': stage}, count))
+        ])
+        metric('cache_requests_total', 'counter', "Cache lookups by result", [
+            sample
+            for cache, (hits, misses) in sorted(self.cache_stats().items())
+            for sample in (('', {'cache': cache, 'result': 'hit'}, hits),
+                           ('', {'cache': cache, 'result': 'miss'}, misses))
+        ])
+        metric('figure_bytes', 'gauge', "Serialized size of the latest payload of each chart",
+               [('', {'figure': name}, n_bytes) for name, n_bytes in sorted(sizes.items())])
+        rss = rss_bytes()
+        if rss is not None:
+            metric('resident_memory_bytes', 'gauge', "Resident set size of the dashboard process",
+                   [('', {}, rss)])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write prometheus_text() atomically, so a scraper never reads half a file"""
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.prometheus_text())
+        os.replace(tmp, path)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    """Sample value as the exposition format spells it: NaN, +Inf and -Inf for non-finite floats"""
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
@@ -0,0 +1,138 @@
+"""
+Multi-Step Forecasting Backtest
+
+Walk-forward backtest of direct forecasts for any list of horizons in one
+pass. The target matrix (price change h rows ahead, one column per horizon)
+is built with a single gather, and each fold fits every horizon in one
+multi-output Elastic Net solve that shares the standardized training matrix
+and its precomputed Gram matrix. Each fold warm-starts from the previous one.
+
+A fold only trains on rows whose targets are known for every horizon, so
+all horizons share one solve; short horizons give up the most recent
+max(horizons) - h rows of training data in exchange. A horizon too long to
+be scored even once on those folds is dropped with a warning naming it, and
+the others are backtested without it.
+
+Results go to a single store partitioned by horizon
+(data/validation/multi_step_results/horizon=<h>/), with the per-horizon
+layout of multi_step_<h>day_results.csv, and the summary table is rewritten.
+
+Run with: python multi_step_forecasting.py [--horizons 1,7,30,60,90]
+"""
+
+import argparse
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import ElasticNet
+
+from data_store import DATASETS, MULTI_STEP_STORE, load_dataset, write_multi_step_store
+from forecast_engine import ALPHA, HORIZONS, L1_RATIO
+from walk_forward_validation import INITIAL_TRAIN, STEP, _standardize, prepare_arrays
+
+
+# ============================================================================
+# TARGETS
+# ============================================================================
+
+def target_matrix(price, horizons):
+    """Price change from each row to `h` rows ahead; NaN past the end of the series"""
+    n = len(price)
+    ahead = np.arange(n)[:, None] + np.asarray(horizons)[None, :]
+    known = ahead < n
+    Y = np.full(ahead.shape, np.nan)
+    Y[known] = price[ahead[known]]
+    return Y - price[:, None]
+
+
+def fold_origins(n_rows, horizons, initial_train=INITIAL_TRAIN, step=STEP):
+    """Origins with `initial_train` fully-known rows first, while any horizon can be scored"""
+    first = initial_train + max(horizons) - 1
+    return np.arange(first, n_rows - min(horizons), step)
+
+
+def scorable_horizons(n_rows, horizons, initial_train=INITIAL_TRAIN):
+    """Horizons scored at least once on the folds they share: h needs initial_train + 2h - 1 < n_rows"""
+    return [h for h in horizons if initial_train + 2 * h - 1 < n_rows]
+
+
+# ============================================================================
+# BACKTEST
+# ============================================================================
+
+def backtest(df_prices, horizons=HORIZONS, initial_train=INITIAL_TRAIN, step=STEP,
+             alpha=ALPHA, l1_ratio=L1_RATIO):
+    """Run the multi-horizon backtest. Returns one row per (fold, horizon)"""
+    horizons = sorted(set(horizons))
+    X, price, dates = prepare_arrays(df_prices)
+    kept = scorable_horizons(len(X), horizons, initial_train)
+    dropped = [h for h in horizons if h not in kept]
+    if dropped:
+        warnings.warn(f"Not enough rows ({len(X)}) to score horizons {dropped} after {initial_train} "
+                      f"training rows; backtesting {kept} only")
+    if not kept:
+        raise ValueError(f"Not enough rows ({len(X)}) to score any of horizons {horizons}")
+
+    h = np.asarray(kept)
+    Y = target_matrix(price, kept)
+    model = ElasticNet(alpha=alpha, l1_ratio=l1_ratio, max_iter=10000, warm_start=True, precompute=True)
+    rows = []
+    for fold, origin in enumerate(fold_origins(len(X), kept, initial_train, step), start=1):
+        n_train = origin - h[-1] + 1
+        mean, scale = _standardize(X[:n_train])
+        model.fit((X[:n_train] - mean) / scale, Y[:n_train])
+
+        predicted = price[origin] + model.predict(((X[origin] - mean) / scale)[None, :])[0]
+        scored = origin + h < len(price)
+        for horizon, pred in zip(h[scored].tolist(), predicted[scored]):
+            rows.append((fold, dates[origin + horizon], price[origin + horizon], pred, price[origin], horizon))
+
+    df = pd.DataFrame(rows, columns=['fold', 'test_date', 'actual', 'predicted', 'base', 'horizon'])
+    df['error'] = df['predicted'] - df['actual']
+    df['error_pct'] = 100 * df['error'] / df['actual']
+    return df[['fold', 'test_date', 'actual', 'predicted', 'error', 'error_pct', 'horizon', 'base']]
+
+
+def summarize(df_results):
+    """Per-horizon metrics in the multi_step_summary.csv layout"""
+    summary = []
+    for horizon, df in df_results.groupby('horizon', sort=True):
+        actual = df['actual']
+        ss_res = (df['error'] ** 2).sum()
+        ss_tot = ((actual - actual.mean()) ** 2).sum()
+        same_direction = np.sign(df['predicted'] - df['base']) == np.sign(actual - df['base'])
+        summary.append({
+            'Horizon (days)': horizon,
+            'N': len(df),
+            'MAE ($/mt)': df['error'].abs().mean(),
+            'MAPE (%)': (100 * df['error'].abs() / actual).mean(),
+            'R2': 1 - ss_res / ss_tot if ss_tot > 0 else np.nan,
+            'Dir Acc (%)': 100 * same_direction.mean(),
+        })
+    return pd.DataFrame(summary)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-horizon walk-forward backtest")
+    parser.add_argument("--horizons", default=",".join(map(str, HORIZONS)),
+                        help="Comma-separated horizons in days, e.g. 1,7,30,60,90")
+    parser.add_argument("--initial-train", type=int, default=INITIAL_TRAIN)
+    parser.add_argument("--step", type=int, default=STEP)
+    parser.add_argument("--store", type=Path, default=MULTI_STEP_STORE)
+    args = parser.parse_args()
+
+    horizons = [int(h) for h in args.horizons.split(",") if h.strip()]
+    df_results = backtest(load_dataset('prices'), horizons, args.initial_train, args.step)
+
+    write_multi_step_store(df_results.drop(columns='base'), args.store)
+    df_summary = summarize(df_results)
+    df_summary.to_csv(DATASETS['multi_step_summary']['csv'], index=False)
+
+    print(f"Saved {len(df_results)} forecasts to {args.store}")
+    print(df_summary.to_string(index=False))
@@ -0,0 +1,235 @@
+"""
+Price Normalization
+
+Converts extracted prices to USD per metric tonne, adding the
+price_{mid,low,high}_usd_mt columns of steel_prices_all_sources_normalized.csv.
+
+Exchange rates come from a dated table (date, currency, usd_per_unit)
+joined to the prices with one as-of merge, so each row uses the latest rate
+on or before its date. The table is built from:
+  1. rate series carried in the prices dataset (usd_aed_exchange_rate),
+  2. data/extracted/fx_rates.csv, if present, which overrides (1) on the
+     same date and is where corrections go.
+Dates before a currency's first dated rate, and currencies with no dated
+rates, use FALLBACK_USD_PER_UNIT. Rows in a currency or unit without any
+conversion get NaN.
+
+The rates used for the normalized CSV are saved alongside it. Re-running
+after an FX correction recomputes only the rows whose as-of rate changed.
+
+Run with: python normalization.py
+"""
+
+import os
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_store import DATASETS, EXTRACTED_DIR, data_version, dataset_column, load_dataset
+
+RAW_CSV = EXTRACTED_DIR / "steel_prices_all_sources_raw.csv"
+NORMALIZED_CSV = EXTRACTED_DIR / "steel_prices_all_sources_normalized.csv"
+FX_RATES_CSV = EXTRACTED_DIR / "fx_rates.csv"
+APPLIED_RATES_CSV = EXTRACTED_DIR / "fx_rates_applied.csv"
+
+RATE_COLUMNS = ['date', 'currency', 'usd_per_unit']
+
+# Rate series in the prices dataset, quoted as units of currency per USD
+FX_SERIES = {
+    'AED': 'usd_aed_exchange_rate',
+}
+
+# USD per unit of currency where no dated rate applies
+FALLBACK_USD_PER_UNIT = {
+    'USD': 1.0,
+    'AED': 0.272,
+    'CNY': 0.14,
+}
+
+# Quoted units per metric tonne (long hundredweight = 50.8 kg)
+UNITS_PER_MT = {
+    'mt': 1.0,
+    'cwt': 1000 / 50.8,
+}
+
+PRICE_COLUMNS = ['price_mid', 'price_low', 'price_high']
+USD_MT_COLUMNS = [f'{column}_usd_mt' for column in PRICE_COLUMNS]
+
+_rate_cache = {'key': None, 'table': None}
+
+
+# ============================================================================
+# RATE TABLE
+# ============================================================================
+
+def _empty_rates():
+    return pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'),
+                         'currency': pd.Series(dtype=object),
+                         'usd_per_unit': pd.Series(dtype=float)})
+
+
+def build_rate_table(df_prices=None, rates_csv=FX_RATES_CSV):
+    """Dated USD rates sorted by date; fx_rates.csv wins over the price series on the same date"""
+    frames = [_empty_rates()]
+    if df_prices is not None:
+        for currency, symbol in FX_SERIES.items():
+            rows = (df_prices['symbol'] == symbol).to_numpy()
+            frames.append(pd.DataFrame({
+                'date': pd.to_datetime(df_prices['date'][rows]).to_numpy(),
+                'currency': currency,
+                'usd_per_unit': 1.0 / dataset_column(df_prices, 'price_mid', 'prices')[rows].to_numpy(dtype=float),
+            }))
+    if Path(rates_csv).exists():
+        frames.append(read_rates(rates_csv))
+
+    table = pd.concat(frames, ignore_index=True)
+    table = table.astype({'date': 'datetime64[ns]', 'currency': str})
+    table = table.drop_duplicates(['currency', 'date'], keep='last')
+    return table.sort_values(['date', 'currency'], kind='stable').reset_index(drop=True)
+
+
+def read_rates(path):
+    return pd.read_csv(path, usecols=RATE_COLUMNS, parse_dates=['date']).astype({'currency': str})
+
+
+def rate_table():
+    """Current rate table, rebuilt only when the prices dataset or fx_rates.csv changes"""
+    rates_stat = FX_RATES_CSV.stat() if FX_RATES_CSV.exists() else None
+    key = (data_version(['prices']), rates_stat and (rates_stat.st_mtime_ns, rates_stat.st_size))
+    if _rate_cache['key'] != key:
+        df_prices = load_dataset('prices') if DATASETS['prices']['csv'].exists() else None
+        _rate_cache['table'] = build_rate_table(df_prices, FX_RATES_CSV)
+        _rate_cache['key'] = key
+    return _rate_cache['table']
+
+
+def lookup_rates(dates, currencies, rates):
+    """
+    USD per unit for each (date, currency), as of that date.
+
+    The as-of merge runs once over the distinct (date, currency) pairs, not
+    once per price row; the result is mapped back to the rows.
+    """
+    keys = pd.DataFrame({
+        'date': pd.to_datetime(pd.Series(dates)).to_numpy(dtype='datetime64[ns]'),
+        'currency': pd.Series(currencies).astype(object).fillna('').astype(str).to_numpy(),
+    }).astype({'currency': str})
+    rates = rates.astype({'currency': str})
+    pairs = keys.dropna(subset=['date']).drop_duplicates().sort_values('date', kind='stable')
+    pairs = pd.merge_asof(pairs, rates, on='date', by='currency', direction='backward')
+    pairs['usd_per_unit'] = pairs['usd_per_unit'].fillna(pairs['currency'].map(FALLBACK_USD_PER_UNIT))
+
+    merged = keys.merge(pairs, on=['date', 'currency'], how='left')
+    # Undated rows can still use a currency's fallback rate
+    return merged['usd_per_unit'].fillna(merged['currency'].map(FALLBACK_USD_PER_UNIT)).to_numpy(dtype=float)
+
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+def usd_mt_factors(df, rates=None):
+    """(USD per unit of currency, quoted units per mt) for each row (NaN when unknown)"""
+    rates = rate_table() if rates is None else rates
+    fx = lookup_rates(df['date'], df['currency'], rates)
+    units = df['unit'].map(UNITS_PER_MT).to_numpy(dtype=float)
+    return fx, units
+
+
+def normalize_prices(df, rates=None):
+    """Copy of `df` with price_*_usd_mt columns appended (or replaced)"""
+    df = df.copy()
+    fx, units = usd_mt_factors(df, rates)
+    for column, usd_column in zip(PRICE_COLUMNS, USD_MT_COLUMNS):
+        # price * fx * units, in that order, as the existing normalized CSV was computed
+        df[usd_column] = df[column].to_numpy(dtype=float) * fx * units
+
+    unknown = np.isnan(fx * units)
+    if unknown.any():
+        pairs = sorted(set(zip(df.loc[unknown, 'currency'].astype(str), df.loc[unknown, 'unit'].astype(str))))
+        warnings.warn(f"No USD/mt conversion for {pairs}; {int(unknown.sum())} rows left as NaN")
+    return df
+
+
+def changed_ranges(old_rates, new_rates):
+    """
+    (currency, start, end) date ranges, end exclusive, over which the as-of
+    rate differs between two rate tables. Open-ended ranges end at
+    pd.Timestamp.max.
+    """
+    both = old_rates.merge(new_rates, on=['currency', 'date'], how='outer', suffixes=('_old', '_new'))
+    ranges = []
+    for currency, knots in both.groupby('currency', sort=True):
+        knots = knots.sort_values('date')
+        dates = knots['date'].to_numpy()
+        # As-of value on [knot i, knot i+1) in each table
+        old = knots['usd_per_unit_old'].ffill().to_numpy()
+        new = knots['usd_per_unit_new'].ffill().to_numpy()
+        differs = ~np.isclose(old, new, rtol=0, atol=0, equal_nan=True)
+
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], differs.astype(np.int8), [0]))))
+        for start, stop in zip(edges[::2], edges[1::2]):
+            end = pd.Timestamp(dates[stop]) if stop < len(dates) else pd.Timestamp.max
+            ranges.append((currency, pd.Timestamp(dates[start]), end))
+    return ranges
+
+
+def renormalize(df_norm, old_rates, new_rates):
+    """
+    Recompute price_*_usd_mt for rows whose as-of rate changed between the
+    rate tables. Returns (updated frame, number of rows recomputed).
+    """
+    ranges = changed_ranges(old_rates, new_rates)
+    if not ranges:
+        return df_norm, 0
+
+    dates = pd.to_datetime(df_norm['date']).to_numpy(dtype='datetime64[ns]')
+    currency = df_norm['currency'].astype(str).to_numpy()
+    affected = np.zeros(len(df_norm), dtype=bool)
+    for cur, start, end in ranges:
+        affected |= (currency == cur) & (dates >= start.to_datetime64()) & (dates < end.to_datetime64())
+
+    if affected.any():
+        df_norm = df_norm.copy()
+        recomputed = normalize_prices(df_norm.loc[affected], new_rates)
+        df_norm.loc[affected, USD_MT_COLUMNS] = recomputed[USD_MT_COLUMNS].to_numpy()
+    return df_norm, int(affected.sum())
+
+
+def _write_csv(df, path):
+    tmp = Path(path).with_suffix(".csv.tmp")
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def normalize_files(raw_csv=RAW_CSV, normalized_csv=NORMALIZED_CSV, applied_csv=APPLIED_RATES_CSV):
+    """
+    Bring the normalized CSV up to date with the current rates. Only rows in
+    changed rate ranges are recomputed when the CSV still matches the raw
+    file and the rates it was built with are known; otherwise it is rebuilt.
+    """
+    rates = rate_table()
+    df_raw = pd.read_csv(raw_csv)
+
+    df_norm = pd.read_csv(normalized_csv) if Path(normalized_csv).exists() else None
+    if df_norm is not None and Path(applied_csv).exists() and len(df_norm) == len(df_raw):
+        df_norm, n_rows = renormalize(df_norm, read_rates(applied_csv), rates)
+    else:
+        df_norm, n_rows = normalize_prices(df_raw, rates), len(df_raw)
+
+    if n_rows:
+        _write_csv(df_norm, normalized_csv)
+    rates_out = rates.assign(date=rates['date'].dt.strftime('%Y-%m-%d'))
+    _write_csv(rates_out[RATE_COLUMNS], applied_csv)
+    return n_rows
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    n_rows = normalize_files()
+    print(f"Normalized {n_rows} rows into {NORMALIZED_CSV}")
@@ -0,0 +1,316 @@
+"""
+PDF Price Extraction
+
+Extracts daily price assessments from the Fastmarkets/Argus report PDFs under
+data/raw_pdfs and appends them to steel_prices_all_sources_raw.csv and
+steel_prices_all_sources_normalized.csv.
+
+Reports are parsed on a process pool, one PDF per task. Each worker walks
+its PDF page by page and releases every page once its lines are matched, so
+memory stays flat however long a report is. Results are written as each
+report finishes, not at the end of the run.
+
+Every ingested PDF is recorded by SHA-256 of its content in
+pdf_manifest.csv, so renamed or re-downloaded copies of a report are
+skipped and an interrupted backfill resumes where it stopped. A PDF that
+fails to parse is reported and left out of the manifest, so the next run
+retries it. The manifest is local state, not committed: the first run
+creates it, recording the PDFs whose prices are already in the raw CSV.
+
+Requires pdfplumber (pip install pdfplumber).
+
+Run with: python pdf_extraction.py [--pdf-dir data/raw_pdfs] [--workers 8]
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from data_store import DATA_DIR, EXTRACTED_DIR
+from normalization import NORMALIZED_CSV, RAW_CSV, normalize_prices
+
+try:
+    import pdfplumber
+except ImportError:  # only needed to parse PDFs, not to read the outputs
+    pdfplumber = None
+
+RAW_PDF_DIR = DATA_DIR / "raw_pdfs"
+MANIFEST_CSV = EXTRACTED_DIR / "pdf_manifest.csv"
+
+RAW_COLUMNS = ['date', 'source', 'symbol', 'price_low', 'price_mid', 'price_high',
+               'currency', 'unit', 'pdf_filename']
+MANIFEST_COLUMNS = ['sha256', 'pdf_filename', 'n_rows', 'ingested_at']
+
+HASH_BLOCK_BYTES = 1 << 20
+
+# Tasks queued per worker, so a long backfill does not queue every PDF at once
+QUEUED_PER_WORKER = 4
+
+
+# ============================================================================
+# ASSESSMENT PATTERNS
+# ============================================================================
+
+# Assessment description (matched case-insensitively) -> symbol. A report
+# line is "<description> <currency>/<unit> [<assessed date>] <low>[ - <high>] ...";
+# the first matching description wins, so more specific ones come first.
+ASSESSMENTS = [
+    (r'rebar.*import.*jebel ali', 'rebar_uae_import'),
+    (r'rebar.*(domestic|ex-?works).*uae|uae.*rebar.*(domestic|ex-?works)', 'rebar_uae_domestic'),
+    (r'rebar.*domestic.*china|china.*rebar.*domestic', 'rebar_china_domestic'),
+    (r'hot[- ]rolled coil.*export.*china|china.*hrc.*export', 'hrc_china_export'),
+    (r'hot[- ]rolled coil.*domestic.*china|china.*hrc.*domestic', 'hrc_china_domestic'),
+    (r'hot[- ]rolled coil.*(uae|jebel ali)|uae.*hrc', 'hrc_uae'),
+    (r'(hot[- ]dip(ped)?[- ]galvani[sz]ed|hdg|galvani[sz]ed coil).*export.*china|china.*hdg.*export', 'hdg_china_export'),
+    (r'billet.*(cis|black sea)', 'billet_cis_fob_black_sea'),
+    (r'billet.*china|china.*billet', 'billet_china'),
+    (r'(hms|heavy melting).*turkey', 'scrap_hms_cfr_turkey'),
+]
+ASSESSMENTS = [(re.compile(pattern, re.IGNORECASE), symbol) for pattern, symbol in ASSESSMENTS]
+
+CURRENCIES = {'$': 'USD', 'us$': 'USD', 'usd': 'USD', 'aed': 'AED', 'dh': 'AED', 'dirhams': 'AED',
+              'yuan': 'CNY', 'cny': 'CNY', 'rmb': 'CNY'}
+UNITS = {'tonne': 'mt', 'ton': 'mt', 't': 'mt', 'mt': 'mt', 'cwt': 'cwt'}
+
+_NUMBER = r'\d[\d,]*(?:\.\d+)?'
+# Fastmarkets tables put the assessment date ("19 Aug 2025") before the price,
+# and follow a single price with its change ("443 -1"), so a range dash must
+# be spaced on both sides or on neither
+PRICE_LINE = re.compile(
+    r'^(?P<description>.+?)\s*,?\s+'
+    r'(?P<currency>US\$|\$|USD|AED|Dh|dirhams|yuan|CNY|RMB)\s*/\s*(?P<unit>tonne|ton|mt|t|cwt)\b'
+    r'(?:\s+\d{1,2} [A-Za-z]{3} \d{4})?'
+    rf'\s+(?P<low>{_NUMBER})(?:(?:\s+[-–]\s+|[-–])(?P<high>{_NUMBER}))?',
+    re.IGNORECASE,
+)
+
+FILENAME_DATE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+FILENAME_STAMP = re.compile(r'_(\d{6})_\d{6}')
+TEXT_DATE = re.compile(r'\b(\d{1,2} (?:January|February|March|April|May|June|July|August|'
+                       r'September|October|November|December) \d{4})\b')
+
+
+def report_source(filename):
+    """Publisher named in the report filename"""
+    for source in ('Fastmarkets', 'Argus', 'Platts'):
+        if source.lower() in filename.lower():
+            return source
+    return 'Unknown'
+
+
+def report_date(filename, first_page_text=""):
+    """
+    Assessment date from the filename (YYYY-MM-DD, or the _YYMMDD_HHMMSS
+    download stamp), falling back to the first long-form date on page one.
+    """
+    match = FILENAME_DATE.search(filename)
+    if match:
+        return match.group(1)
+    match = FILENAME_STAMP.search(filename)
+    if match:
+        return datetime.strptime(match.group(1), "%y%m%d").date().isoformat()
+    match = TEXT_DATE.search(first_page_text)
+    if match:
+        return datetime.strptime(match.group(1), "%d %B %Y").date().isoformat()
+    return None
+
+
+def _number(text):
+    return float(text.replace(',', ''))
+
+
+def parse_line(line):
+    """(symbol, low, mid, high, currency, unit) for an assessment line, else None"""
+    match = PRICE_LINE.match(line.strip())
+    if not match:
+        return None
+    symbol = next((symbol for pattern, symbol in ASSESSMENTS if pattern.search(match['description'])), None)
+    if symbol is None:
+        return None
+
+    low = _number(match['low'])
+    high = _number(match['high']) if match['high'] else low
+    currency = CURRENCIES[match['currency'].lower()]
+    unit = UNITS[match['unit'].lower()]
+    return symbol, low, (low + high) / 2, high, currency, unit
+
+
+# ============================================================================
+# EXTRACTION (worker side)
+# ============================================================================
+
+def iter_page_rows(pdf_path):
+    """
+    Yield raw rows page by page. Only the first assessment of each symbol is
+    kept; later pages repeat prices in commentary and summary tables.
+    """
+    if pdfplumber is None:
+        raise ImportError("PDF extraction requires pdfplumber: pip install pdfplumber")
+
+    pdf_path = Path(pdf_path)
+    source = report_source(pdf_path.name)
+    date = None
+    seen = set()
+
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ""
+            page.close()  # drop the page's cached layout objects
+
+            if date is None:
+                date = report_date(pdf_path.name, text)
+            for line in text.splitlines():
+                parsed = parse_line(line)
+                if parsed is None or parsed[0] in seen:
+                    continue
+                seen.add(parsed[0])
+                symbol, low, mid, high, currency, unit = parsed
+                yield (date, source, symbol, low, mid, high, currency, unit, pdf_path.name)
+
+
+def extract_pdf(pdf_path):
+    """
+    Worker task: (rows, error) for one report; errors are returned, not raised.
+
+    The rows are gathered into a list because a task's result has to be
+    pickled back to the parent in one piece. Pages are still read one at a
+    time, and the list holds at most one row per assessment symbol.
+    """
+    try:
+        return list(iter_page_rows(pdf_path)), None
+    except Exception as exc:
+        return [], f"{type(exc).__name__}: {exc}"
+
+
+# ============================================================================
+# MANIFEST AND OUTPUT (parent side)
+# ============================================================================
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_csv=MANIFEST_CSV):
+    """Content hashes of PDFs already ingested"""
+    if not Path(manifest_csv).exists():
+        return set()
+    return set(pd.read_csv(manifest_csv, usecols=['sha256'])['sha256'])
+
+
+def append_csv(path, rows, columns):
+    """Append rows to a CSV, writing the header if the file is new"""
+    path = Path(path)
+    is_new = not path.exists() or path.stat().st_size == 0
+    if not is_new:
+        # A file missing its final newline would glue the first appended row onto the last one
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    with open(path, 'a', newline='') as f:
+        if not is_new and needs_newline:
+            f.write('\n')
+        writer = csv.writer(f, lineterminator='\n')
+        if is_new:
+            writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def write_report(rows, sha256, filename, raw_csv=RAW_CSV, normalized_csv=NORMALIZED_CSV,
+                 manifest_csv=MANIFEST_CSV):
+    """Append one report's rows to both price files, then record it in the manifest"""
+    if rows:
+        df_raw = pd.DataFrame(rows, columns=RAW_COLUMNS)
+        df_norm = normalize_prices(df_raw)
+        append_csv(raw_csv, df_raw.itertuples(index=False), RAW_COLUMNS)
+        append_csv(normalized_csv, df_norm.itertuples(index=False), list(df_norm.columns))
+
+    # Written last: a crash before this line re-ingests the report next run
+    ingested_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    append_csv(manifest_csv, [(sha256, filename, len(rows), ingested_at)], MANIFEST_COLUMNS)
+
+
+def seed_manifest(pdf_dir=RAW_PDF_DIR, raw_csv=RAW_CSV, manifest_csv=MANIFEST_CSV):
+    """Create the manifest, recording the PDFs under `pdf_dir` whose prices the raw CSV already holds"""
+    ingested = pd.Series(dtype=int)
+    if Path(raw_csv).exists():
+        ingested = pd.read_csv(raw_csv, usecols=['pdf_filename'])['pdf_filename'].value_counts()
+    ingested_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    rows = [(file_sha256(path), path.name, int(ingested[path.name]), ingested_at)
+            for path in sorted(Path(pdf_dir).rglob("*.pdf")) if path.name in ingested.index]
+    append_csv(manifest_csv, rows, MANIFEST_COLUMNS)
+
+
+def pending_pdfs(pdf_dir=RAW_PDF_DIR, manifest_csv=MANIFEST_CSV, force=False):
+    """(path, sha256) for every PDF under `pdf_dir` not yet in the manifest, oldest name first"""
+    ingested = set() if force else load_manifest(manifest_csv)
+    pending = []
+    for path in sorted(Path(pdf_dir).rglob("*.pdf")):
+        sha256 = file_sha256(path)
+        if sha256 not in ingested:
+            ingested.add(sha256)  # duplicate copies within this run
+            pending.append((path, sha256))
+    return pending
+
+
+def extract_all(pdf_dir=RAW_PDF_DIR, workers=None, force=False, raw_csv=RAW_CSV,
+                normalized_csv=NORMALIZED_CSV, manifest_csv=MANIFEST_CSV):
+    """Extract every new PDF in parallel, writing each report as it completes"""
+    if not force and not Path(manifest_csv).exists():
+        seed_manifest(pdf_dir, raw_csv, manifest_csv)
+    pending = deque(pending_pdfs(pdf_dir, manifest_csv, force))
+    if not pending:
+        print("No new PDFs to extract")
+        return {'pdfs': 0, 'rows': 0, 'failed': 0}
+
+    workers = min(workers or os.cpu_count() or 1, len(pending))
+    totals = {'pdfs': 0, 'rows': 0, 'failed': 0}
+    print(f"Extracting {len(pending)} PDFs on {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            while pending and len(running) < workers * QUEUED_PER_WORKER:
+                path, sha256 = pending.popleft()
+                running[pool.submit(extract_pdf, path)] = (path, sha256)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, sha256 = running.pop(future)
+                rows, error = future.result()
+                if error:
+                    totals['failed'] += 1
+                    print(f"  FAILED {path.name}: {error}")
+                    continue
+                write_report(rows, sha256, path.name, raw_csv, normalized_csv, manifest_csv)
+                totals['pdfs'] += 1
+                totals['rows'] += len(rows)
+                print(f"  {path.name}: {len(rows)} prices")
+
+    return totals
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract prices from report PDFs")
+    parser.add_argument("--pdf-dir", type=Path, default=RAW_PDF_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-extract PDFs already in the manifest")
+    args = parser.parse_args()
+
+    totals = extract_all(args.pdf_dir, args.workers, args.force)
+    print(f"Extracted {totals['rows']} prices from {totals['pdfs']} PDFs ({totals['failed']} failed)")
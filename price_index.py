@@ -0,0 +1,131 @@
+"""
+Per-Symbol Price Index
+
+Sorts the long-format price table by (symbol, date) once and keeps an offsets
+table so each symbol's history is a contiguous slice. Pages look a symbol up
+in O(1) instead of scanning the full table with a boolean mask.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_store import concat_rows
+
+DEFAULT_VALUE_COLUMN = 'price_mid_usd_mt'
+
+
+def _symbol_offsets(df_sorted):
+    """symbol -> (start, stop) row positions in a frame sorted by symbol"""
+    keys = df_sorted['symbol'].astype(str).to_numpy()
+    if len(keys) == 0:
+        return {}
+
+    # Row positions where a new symbol starts
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    stops = np.r_[starts[1:], len(keys)]
+    return {keys[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+
+def _is_sorted(df):
+    """True if rows are already in (symbol, date) order, as sort_values would put them"""
+    symbol = df['symbol']
+    keys = symbol.array.codes if isinstance(symbol.dtype, pd.CategoricalDtype) else symbol.to_numpy()
+    dates = df['date'].to_numpy()
+    same = keys[1:] == keys[:-1]
+    return bool(np.all((keys[1:] > keys[:-1]) | (same & (dates[1:] >= dates[:-1]))))
+
+
+class PriceIndex:
+    """Price table sorted by (symbol, date) with a symbol -> (start, stop) table"""
+
+    def __init__(self, df_prices):
+        if _is_sorted(df_prices):
+            # No copy: shared, read-only tables are indexed in place
+            df = df_prices.reset_index(drop=True)
+        else:
+            df = df_prices.sort_values(['symbol', 'date'], kind='stable').reset_index(drop=True)
+        self._set_sorted(df, _symbol_offsets(df))
+
+    def _set_sorted(self, df, offsets):
+        self.df = df
+        self.offsets = offsets
+        self._arrays = {}
+
+    def __getstate__(self):
+        # Column arrays are rebuilt on demand rather than pickled with the frame
+        state = self.__dict__.copy()
+        state['_arrays'] = {}
+        return state
+
+    @property
+    def symbols(self):
+        """Sorted list of symbols in the table"""
+        return sorted(self.offsets)
+
+    def __contains__(self, symbol):
+        return symbol in self.offsets
+
+    def __len__(self):
+        return len(self.df)
+
+    def _slice(self, symbol):
+        start, stop = self.offsets[symbol]
+        return slice(start, stop)
+
+    def column(self, column):
+        """Whole sorted column as a NumPy array (built once, shared by all slices)"""
+        if column not in self._arrays:
+            self._arrays[column] = self.df[column].to_numpy()
+        return self._arrays[column]
+
+    def frame(self, symbol):
+        """Rows for one symbol, ordered by date"""
+        return self.df.iloc[self._slice(symbol)]
+
+    def values(self, symbol, column=DEFAULT_VALUE_COLUMN):
+        """One column for one symbol as a NumPy view, ordered by date"""
+        return self.column(column)[self._slice(symbol)]
+
+    def dates(self, symbol):
+        """Dates for one symbol as a NumPy view"""
+        return self.values(symbol, 'date')
+
+    def is_append_only(self, df_new):
+        """True if every new row is dated after its symbol's last indexed date"""
+        first_new = df_new.groupby(df_new['symbol'].astype(str))['date'].min()
+        for symbol, first_date in first_new.items():
+            if symbol in self.offsets and first_date <= self.dates(symbol)[-1]:
+                return False
+        return True
+
+    def append(self, df_new):
+        """
+        New index with rows appended.
+
+        Rows dated after their symbol's last date are slotted in behind each
+        symbol's slice without re-sorting the existing table; anything else
+        (backfills, corrections) rebuilds the index from scratch.
+        """
+        combined = concat_rows(self.df, df_new)
+        if not self.is_append_only(df_new):
+            return PriceIndex(combined)
+
+        new_sorted = combined.iloc[len(self.df):].sort_values(['symbol', 'date'], kind='stable')
+        new_offsets = _symbol_offsets(new_sorted)
+        new_positions = new_sorted.index.to_numpy()
+
+        order, offsets, start = [], {}, 0
+        for symbol in sorted(set(self.offsets) | set(new_offsets)):
+            parts = []
+            if symbol in self.offsets:
+                parts.append(np.arange(*self.offsets[symbol]))
+            if symbol in new_offsets:
+                parts.append(new_positions[slice(*new_offsets[symbol])])
+            rows = np.concatenate(parts)
+            order.append(rows)
+            offsets[symbol] = (start, start + len(rows))
+            start += len(rows)
+
+        index = PriceIndex.__new__(PriceIndex)
+        index._set_sorted(combined.take(np.concatenate(order)).reset_index(drop=True), offsets)
+        return index
@@ -0,0 +1,267 @@
+"""
+Point-in-Time Price Store
+
+Append-only log of price revisions, so the dashboard and backtests can see
+prices as they were known at any past time, not only as the CSV says now.
+
+Each revision is one (symbol, date) price with the time it became known
+(`known_at`). Recording compares the current price table with the latest
+revisions and appends only new rows, corrected values and tombstones for
+rows that disappeared. Segments are never rewritten. The first recording has
+no earlier knowledge to go on, so its rows are stamped as known on their own
+date; later ones are stamped with the time of recording (or --known-at).
+
+Layout:
+    data/extracted/price_revisions/part-<n>.parquet
+
+`AsOfIndex` sorts the revisions once by (symbol, date, known_at) and numbers
+the distinct knowledge times. Every revision then has one int64 key,
+(group << 32) | time code, and the keys are sorted. "Prices as known at T"
+is one vectorized binary search: for each (symbol, date) group, the last key
+at or below (group, code of T). No pass over the revisions is needed, and
+a symbol or date window narrows the groups searched.
+
+Run with: python price_revisions.py                  (record the current prices)
+          python price_revisions.py --as-of 2025-03-31 [--symbol rebar_uae_import]
+"""
+
+import argparse
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import EXTRACTED_DIR, dataset_column, load_dataset, write_parquet
+
+REVISIONS_DIR = EXTRACTED_DIR / "price_revisions"
+VALUE_COLUMNS = ['price_low_usd_mt', 'price_mid_usd_mt', 'price_high_usd_mt']
+REVISION_COLUMNS = ['symbol', 'date', 'known_at', 'deleted', *VALUE_COLUMNS]
+
+
+# ============================================================================
+# SEGMENTS
+# ============================================================================
+
+def segment_paths(root=REVISIONS_DIR):
+    """Revision segment files in the order they were written"""
+    if not root.is_dir():
+        return []
+    return sorted(entry for entry in root.iterdir() if entry.name.startswith("part-") and entry.suffix == ".parquet")
+
+
+def revisions_signature(root=REVISIONS_DIR):
+    """Short signature of the revision segments (empty if there are none)"""
+    parts = [f"{path.name}:{path.stat().st_mtime_ns}:{path.stat().st_size}" for path in segment_paths(root)]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12] if parts else ""
+
+
+def load_revisions(root=REVISIONS_DIR):
+    """Every recorded revision, oldest segment first"""
+    frames = [pd.read_parquet(path, engine="pyarrow") for path in segment_paths(root)]
+    if not frames:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in _revision_dtypes().items()})
+    return pd.concat(frames, ignore_index=True)
+
+
+def _revision_dtypes():
+    dtypes = {'symbol': object, 'date': 'datetime64[ns]', 'known_at': 'datetime64[ns]', 'deleted': bool}
+    dtypes.update({column: 'float64' for column in VALUE_COLUMNS})
+    return dtypes
+
+
+def _price_values(df_prices):
+    """(symbol, date, value columns) of a price table, in the store's dtypes"""
+    df = pd.DataFrame({
+        'symbol': df_prices['symbol'].astype(str).to_numpy(),
+        'date': pd.to_datetime(df_prices['date']).to_numpy(dtype='datetime64[ns]'),
+    })
+    for column in VALUE_COLUMNS:
+        df[column] = dataset_column(df_prices, column, 'prices').to_numpy(dtype='float64')
+    return df
+
+
+def record_revisions(df_prices, root=REVISIONS_DIR, known_at=None):
+    """
+    Append the rows of `df_prices` that differ from what the store last knew,
+    as one new segment. Returns the revisions written (possibly none).
+    """
+    current = _price_values(df_prices)
+    index = AsOfIndex(load_revisions(root))
+
+    if not len(index):
+        stamp = current['date'] if known_at is None else pd.Timestamp(known_at)
+        revisions = current.assign(known_at=stamp, deleted=False)
+    else:
+        latest = _price_values(index.latest())
+        merged = current.merge(latest, on=['symbol', 'date'], how='outer', suffixes=('', '_known'), indicator=True)
+        both = merged['_merge'] == 'both'
+        changed = merged['_merge'] == 'left_only'
+        for column in VALUE_COLUMNS:
+            new, old = merged[column], merged[f'{column}_known']
+            changed |= both & (new != old) & ~(new.isna() & old.isna())
+        removed = merged['_merge'] == 'right_only'
+
+        revisions = pd.concat([
+            merged.loc[changed, ['symbol', 'date', *VALUE_COLUMNS]].assign(deleted=False),
+            merged.loc[removed, ['symbol', 'date', *VALUE_COLUMNS]].assign(deleted=True),
+        ], ignore_index=True)
+        revisions['known_at'] = pd.Timestamp.now() if known_at is None else pd.Timestamp(known_at)
+
+    revisions = revisions[REVISION_COLUMNS].astype(_revision_dtypes())
+    if len(revisions):
+        root.mkdir(parents=True, exist_ok=True)
+        paths = segment_paths(root)
+        counter = int(paths[-1].stem[len("part-"):]) + 1 if paths else 1
+        write_parquet(revisions, root / f"part-{counter:06d}.parquet")
+    return revisions
+
+
+# ============================================================================
+# AS-OF INDEX
+# ============================================================================
+
+class AsOfIndex:
+    """Revisions sorted by (symbol, date, known_at) with a binary-searchable composite key"""
+
+    def __init__(self, df_revisions):
+        symbols = pd.Categorical(df_revisions['symbol'].astype(str))
+        codes = symbols.codes.astype(np.int64)
+        dates = df_revisions['date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        known = df_revisions['known_at'].to_numpy(dtype='datetime64[ns]')
+
+        # Stable: revisions with the same knowledge time keep their recording order
+        order = np.lexsort((known, dates, codes))
+        codes, dates, known = codes[order], dates[order], known[order]
+        self.deleted = df_revisions['deleted'].to_numpy(dtype=bool)[order]
+        self.values = {column: df_revisions[column].to_numpy(dtype='float64')[order] for column in VALUE_COLUMNS}
+        self.categories = list(symbols.categories)
+
+        # One group per (symbol, date); groups are in (symbol, date) order
+        new_group = np.r_[True, (codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1])] if len(codes) else np.array([], bool)
+        group_starts = np.flatnonzero(new_group)
+        self.group_codes = codes[group_starts]
+        self.group_dates = dates[group_starts]
+
+        # symbol code -> (first, stop) group
+        bounds = np.searchsorted(self.group_codes, np.arange(len(self.categories) + 1))
+        self.symbol_groups = dict(enumerate(zip(bounds[:-1], bounds[1:])))
+
+        self.times, time_codes = np.unique(known, return_inverse=True)
+        group_ids = np.cumsum(new_group) - 1
+        self.keys = (group_ids.astype(np.int64) << 32) | time_codes.astype(np.int64)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def n_groups(self):
+        return len(self.group_codes)
+
+    @property
+    def symbols(self):
+        return self.categories
+
+    def _groups(self, symbols=None, start=None, end=None):
+        """Group ids for the given symbols (all by default) within [start, end]"""
+        if symbols is None and start is None and end is None:
+            return np.arange(self.n_groups, dtype=np.int64)
+
+        lo_date = np.iinfo(np.int64).min if start is None else pd.Timestamp(start).value
+        hi_date = np.iinfo(np.int64).max if end is None else pd.Timestamp(end).value
+        code_of = {symbol: code for code, symbol in enumerate(self.categories)}
+        ranges = []
+        for symbol in (self.categories if symbols is None else symbols):
+            if symbol not in code_of:
+                continue
+            first, stop = self.symbol_groups[code_of[symbol]]
+            # Dates are sorted within a symbol's groups
+            lo = first + np.searchsorted(self.group_dates[first:stop], lo_date, 'left')
+            hi = first + np.searchsorted(self.group_dates[first:stop], hi_date, 'right')
+            ranges.append(np.arange(lo, hi, dtype=np.int64))
+        return np.concatenate(ranges) if ranges else np.array([], dtype=np.int64)
+
+    def positions_as_of(self, known_at, symbols=None, start=None, end=None):
+        """Revision positions in effect at `known_at`, one per (symbol, date) that existed then"""
+        t = np.searchsorted(self.times, np.datetime64(pd.Timestamp(known_at), 'ns'), 'right') - 1
+        if t < 0:
+            return np.array([], dtype=np.int64)
+
+        groups = self._groups(symbols, start, end)
+        positions = np.searchsorted(self.keys, (groups << 32) | t, 'right') - 1
+        # A group whose first revision came later than `known_at` lands on the previous group
+        valid = positions >= 0
+        valid[valid] = (self.keys[positions[valid]] >> 32) == groups[valid]
+        positions = positions[valid]
+        return positions[~self.deleted[positions]]
+
+    def as_of(self, known_at, symbols=None, start=None, end=None):
+        """
+        Price table as it was known at `known_at`, sorted by (symbol, date),
+        optionally only for some symbols and dates in [start, end]
+        """
+        positions = self.positions_as_of(known_at, symbols, start, end)
+        groups = self.keys[positions] >> 32
+        df = pd.DataFrame({
+            'date': self.group_dates[groups].view('datetime64[ns]'),
+            'symbol': pd.Categorical.from_codes(self.group_codes[groups], categories=self.categories),
+        })
+        for column, values in self.values.items():
+            df[column] = values[positions]
+        return df
+
+    def latest(self):
+        """Price table as of the most recent revision"""
+        return self.as_of(self.times[-1]) if len(self.times) else self.as_of(pd.Timestamp.min)
+
+    def replay(self, known_ats, symbols=None, start=None, end=None):
+        """(known_at, price table) for each time in `known_ats`, e.g. for audits of past dashboard states"""
+        for known_at in known_ats:
+            yield known_at, self.as_of(known_at, symbols, start, end)
+
+    def revisions(self, symbol, date):
+        """Every revision of one price, oldest first"""
+        groups = self._groups([symbol], date, date)
+        if not len(groups):
+            return pd.DataFrame(columns=['known_at', 'deleted', *VALUE_COLUMNS])
+        lo = np.searchsorted(self.keys, groups[0] << 32, 'left')
+        hi = np.searchsorted(self.keys, (groups[0] + 1) << 32, 'left')
+        df = pd.DataFrame({'known_at': self.times[self.keys[lo:hi] & 0xFFFFFFFF], 'deleted': self.deleted[lo:hi]})
+        for column, values in self.values.items():
+            df[column] = values[lo:hi]
+        return df
+
+
+def end_of_day(day):
+    """Last instant of a calendar date: "as of 2025-03-31" includes everything recorded that day"""
+    return pd.Timestamp(day).normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record price revisions, or show prices as known at a past date")
+    parser.add_argument("--as-of", help="Show the prices known at the end of this date instead of recording")
+    parser.add_argument("--symbol", action="append", help="Limit --as-of output to a symbol (repeatable)")
+    parser.add_argument("--known-at", help="Knowledge time to stamp new revisions with (default: now)")
+    args = parser.parse_args()
+
+    if args.as_of:
+        start = time.perf_counter()
+        index = AsOfIndex(load_revisions())
+        loaded = time.perf_counter()
+        df = index.as_of(end_of_day(args.as_of), args.symbol)
+        done = time.perf_counter()
+        print(f"Indexed {len(index):,} revisions of {index.n_groups:,} prices in {(loaded - start) * 1000:.0f} ms; "
+              f"as-of query returned {len(df):,} rows in {(done - loaded) * 1000:.1f} ms")
+        print(df.to_string(index=False) if len(df) <= 50 else df.tail(50).to_string(index=False))
+    else:
+        df_prices = load_dataset('prices')
+        revisions = record_revisions(df_prices, known_at=args.known_at)
+        if not len(revisions):
+            print(f"No revisions: {REVISIONS_DIR} matches the current prices")
+        else:
+            print(f"Recorded {len(revisions):,} revisions ({int(revisions['deleted'].sum()):,} removals) "
+                  f"in {segment_paths()[-1]}")
@@ -0,0 +1,113 @@
+"""
+Per-Symbol Summary Statistics
+
+One grouped pass over the price table builds a statistics row per symbol:
+all-time count/mean/std/min/max, the last two observations, and mean/std/
+min/max over the most recent observations for each rolling window. Pages
+read a symbol's row instead of re-aggregating its history, and appended
+observations update the row in place.
+"""
+
+import numpy as np
+import pandas as pd
+
+from price_index import DEFAULT_VALUE_COLUMN
+
+# Rolling windows, in observations (one observation per trading day)
+WINDOWS = [30, 90]
+
+
+def _window_columns(window):
+    return [f'mean_{window}d', f'std_{window}d', f'min_{window}d', f'max_{window}d']
+
+
+def build_stats_table(df_sorted, column=DEFAULT_VALUE_COLUMN, windows=WINDOWS):
+    """Statistics table indexed by symbol from a frame sorted by (symbol, date)"""
+    df = df_sorted[['symbol', 'date', column]].dropna(subset=[column]).astype({column: float})
+    grouped = df.groupby('symbol', observed=True, sort=True)
+
+    table = grouped[column].agg(['count', 'mean', 'std', 'min', 'max', 'last'])
+    table['last_date'] = grouped['date'].last()
+
+    tail2 = grouped.tail(2).groupby('symbol', observed=True, sort=True)[column]
+    table['prev'] = tail2.first().where(table['count'] > 1)
+
+    for window in windows:
+        recent = grouped.tail(window).groupby('symbol', observed=True, sort=True)[column]
+        table[_window_columns(window)] = recent.agg(['mean', 'std', 'min', 'max']).to_numpy()
+
+    table.index = table.index.astype(str)
+    return table
+
+
+class PriceStats:
+    """Statistics table with O(1) per-symbol lookups and incremental appends"""
+
+    def __init__(self, price_index, column=DEFAULT_VALUE_COLUMN, windows=WINDOWS):
+        self.column = column
+        self.windows = list(windows)
+        self.table = build_stats_table(price_index.df, column, self.windows)
+
+    def __contains__(self, symbol):
+        return symbol in self.table.index
+
+    def get(self, symbol):
+        """Statistics row for one symbol"""
+        return self.table.loc[symbol]
+
+    def rows(self, symbols):
+        """Statistics rows for several symbols, in the given order; NaN for a symbol with no values"""
+        return self.table.reindex(list(symbols))
+
+    def append(self, symbol, dates, values, history):
+        """
+        Fold newly appended observations into a symbol's row.
+
+        `dates`/`values` are the new observations only; `history` is the
+        symbol's full value series after the append (e.g. a PriceIndex view),
+        used for the rolling windows. Cost is O(new rows + largest window).
+        """
+        values = np.asarray(values, dtype=float)
+        mask = ~np.isnan(values)
+        values = values[mask]
+        if len(values) == 0:
+            return
+        last_date = pd.Timestamp(np.asarray(dates)[mask][-1])
+
+        if symbol in self.table.index:
+            row = self.table.loc[symbol]
+            n_a, mean_a = int(row['count']), row['mean']
+            m2_a = 0.0 if n_a < 2 else row['std'] ** 2 * (n_a - 1)
+            lo, hi, last = row['min'], row['max'], row['last']
+        else:
+            n_a, mean_a, m2_a = 0, 0.0, 0.0
+            lo, hi, last = np.inf, -np.inf, np.nan
+
+        # Chan et al. pairwise merge of (count, mean, M2)
+        n_b = len(values)
+        mean_b = values.mean()
+        m2_b = ((values - mean_b) ** 2).sum()
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        mean = mean_a + delta * n_b / n
+        m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+
+        updated = {
+            'count': n,
+            'mean': mean,
+            'std': np.sqrt(m2 / (n - 1)) if n > 1 else np.nan,
+            'min': min(lo, values.min()),
+            'max': max(hi, values.max()),
+            'last': values[-1],
+            'last_date': last_date,
+            'prev': values[-2] if n_b > 1 else last,
+        }
+
+        history = np.asarray(history, dtype=float)
+        history = history[~np.isnan(history)]
+        for window in self.windows:
+            recent = history[-window:]
+            std = recent.std(ddof=1) if len(recent) > 1 else np.nan
+            updated.update(zip(_window_columns(window), [recent.mean(), std, recent.min(), recent.max()]))
+
+        self.table.loc[symbol, list(updated)] = list(updated.values())
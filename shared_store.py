@@ -0,0 +1,259 @@
+"""
+Shared Dataset Store
+
+Opt-in backend for running several dashboard (or API) processes on one
+host. The loaded datasets are published once as a directory of .npy column
+files, and every process memory-maps them read-only. The pandas frames
+built on top are zero-copy views, so RAM does not grow with the number of
+workers and a new worker attaches in milliseconds instead of parsing files.
+
+Layout under the store root:
+    CURRENT.json     pointer: {"counter": n, "version": ..., "path": "v<n>"}
+    v<n>/manifest.json and v<n>/<frame>/<column>.npy
+
+Each publish writes a new v<n> directory and then swaps the pointer, so
+readers never see a half-written version. The counter increases with every
+publish; workers re-attach when it moves. When a worker notices that the
+source files changed, it reloads them and publishes the next version under a
+file lock, and the other workers pick that version up. The last
+KEEP_VERSIONS versions are kept for readers still attached to them.
+
+String columns are stored as categoricals. Frames read from the store are
+read-only. Every dataset is attached at once (mapping is cheap and pages are
+read from disk on first touch), so `lazy` has no effect here, and all
+groups share the published version.
+
+Enable by pointing DASHBOARD_SHARED_STORE at a directory, ideally on tmpfs:
+    DASHBOARD_SHARED_STORE=/dev/shm/steel-dashboard streamlit run dashboard.py
+"""
+
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_refresh import LiveDatasets
+from data_store import DATASETS, data_version, load_dataset, load_multi_step_store, store_signature
+
+try:
+    import fcntl
+except ImportError:  # Windows: publishes are still atomic, just not serialized
+    fcntl = None
+
+SHARED_STORE_ENV = "DASHBOARD_SHARED_STORE"
+POINTER_FILE = "CURRENT.json"
+LOCK_FILE = ".lock"
+KEEP_VERSIONS = 2
+
+# Frame names for multi-step store partitions, alongside the DATASETS names
+STORE_PREFIX = "multi_step_store_"
+
+
+# ============================================================================
+# PUBLISH
+# ============================================================================
+
+def _encode_column(series):
+    """(kind, array, categories) for one column"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return 'category', series.array.codes, series.cat.categories.tolist()
+    if series.dtype.kind in 'biufM' and not isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        return 'array', series.to_numpy(), None
+    if series.dtype.kind in 'OU' or pd.api.types.is_string_dtype(series.dtype):
+        values = pd.Categorical(series)
+        return 'category', values.codes, values.categories.tolist()
+    raise TypeError(f"Column '{series.name}' has unsupported dtype {series.dtype}")
+
+
+def write_version(version_dir, frames):
+    """Write frames as .npy columns plus a manifest into `version_dir`"""
+    manifest = {}
+    for name, df in frames.items():
+        if df is None:
+            manifest[name] = None
+            continue
+        frame_dir = version_dir / name
+        frame_dir.mkdir(parents=True)
+        columns = []
+        for i, column in enumerate(df.columns):
+            kind, values, categories = _encode_column(df[column])
+            filename = f"{i:03d}.npy"
+            np.save(frame_dir / filename, np.ascontiguousarray(values))
+            columns.append({'name': column, 'kind': kind, 'file': filename, 'categories': categories})
+        manifest[name] = {'n_rows': len(df), 'columns': columns}
+
+    with open(version_dir / "manifest.json", 'w') as f:
+        json.dump(manifest, f)
+
+
+def read_pointer(root):
+    """Current pointer of the store, or None if nothing is published"""
+    try:
+        with open(Path(root) / POINTER_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def publish(root, frames, version):
+    """Publish `frames` as the next version of the store. Returns the new pointer"""
+    root = Path(root)
+    previous = read_pointer(root)
+    counter = previous['counter'] + 1 if previous else 1
+
+    name = f"v{counter}"
+    tmp_dir = root / f".{name}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    try:
+        write_version(tmp_dir, frames)
+        os.replace(tmp_dir, root / name)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    pointer = {'counter': counter, 'version': version, 'path': name}
+    tmp_pointer = root / f".{POINTER_FILE}.{os.getpid()}.tmp"
+    with open(tmp_pointer, 'w') as f:
+        json.dump(pointer, f)
+    os.replace(tmp_pointer, root / POINTER_FILE)
+
+    _remove_old_versions(root, counter)
+    return pointer
+
+
+def _remove_old_versions(root, counter):
+    # Attached readers keep their mapped files alive after the unlink
+    for entry in root.iterdir():
+        if entry.is_dir() and entry.name.startswith('v') and entry.name[1:].isdigit():
+            if int(entry.name[1:]) <= counter - KEEP_VERSIONS:
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+@contextmanager
+def publish_lock(root):
+    """Exclusive lock held while one process reloads and publishes"""
+    Path(root).mkdir(parents=True, exist_ok=True)
+    with open(Path(root) / LOCK_FILE, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ============================================================================
+# ATTACH
+# ============================================================================
+
+def attach(root, pointer):
+    """frame name -> read-only DataFrame whose columns are views of the mapped files"""
+    version_dir = Path(root) / pointer['path']
+    with open(version_dir / "manifest.json") as f:
+        manifest = json.load(f)
+
+    frames = {}
+    for name, spec in manifest.items():
+        if spec is None:
+            frames[name] = None
+            continue
+        columns = {}
+        for column in spec['columns']:
+            values = np.load(version_dir / name / column['file'], mmap_mode='r')
+            if column['kind'] == 'category':
+                values = pd.Categorical.from_codes(values, categories=column['categories'], validate=False)
+            columns[column['name']] = values
+        frames[name] = pd.DataFrame(columns, copy=False) if columns else pd.DataFrame(index=range(spec['n_rows']))
+    return frames
+
+
+# ============================================================================
+# LIVE DATASETS ON THE SHARED STORE
+# ============================================================================
+
+class SharedLiveDatasets(LiveDatasets):
+    """
+    LiveDatasets backed by the shared store: frames are attached rather than
+    loaded, and a change to the source files is published for every worker.
+    """
+
+    def __init__(self, root, names=None):
+        self.root = Path(root)
+        self.names = list(names or DATASETS)
+        self.states = {}
+        self.frames = {}
+        self.multi_step = {}
+        self.store_signature = ""  # part of the published version instead
+        self.loaded = set(self.groups())
+        self.counter = None
+        self.pointer_version = None
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.refresh()
+
+    def group_version(self, group):
+        return self.pointer_version
+
+    def _source_version(self):
+        return f"{data_version(self.names)}{store_signature()}"
+
+    def _load_sources(self):
+        """Frames to publish, loaded from the local files (Parquet copies first)"""
+        frames = {name: load_dataset(name) for name in self.names}
+        if frames.get('prices') is not None:
+            # Published in (symbol, date) order so the price index needs no copy
+            frames['prices'] = frames['prices'].sort_values(['symbol', 'date'], kind='stable').reset_index(drop=True)
+        for horizon, df in load_multi_step_store().items():
+            frames[f"{STORE_PREFIX}{horizon}"] = df
+        return frames
+
+    def _attach(self, pointer):
+        frames = attach(self.root, pointer)
+        self.multi_step = {int(name[len(STORE_PREFIX):]): df
+                           for name, df in frames.items() if name.startswith(STORE_PREFIX)}
+        self.frames = {name: frames.get(name) for name in self.names}
+        self.counter = pointer['counter']
+        self.pointer_version = pointer['version']
+        self._snapshot = self._build_snapshot(None, {})
+        self._snapshot['version'] = pointer['version']
+
+    def refresh(self):
+        """
+        Attach the latest published version, publishing one first if the
+        source files have changed since. Unchanged sources cost a few stat()
+        calls and one small pointer read.
+        """
+        if not self._lock.acquire(blocking=False):
+            return self._snapshot
+        try:
+            version = self._source_version()
+            pointer = read_pointer(self.root)
+            if pointer is None or pointer['version'] != version:
+                with publish_lock(self.root):
+                    # Another worker may have published while we waited
+                    pointer = read_pointer(self.root)
+                    if pointer is None or pointer['version'] != version:
+                        pointer = publish(self.root, self._load_sources(), version)
+
+            if pointer['counter'] != self.counter:
+                try:
+                    self._attach(pointer)
+                except FileNotFoundError:
+                    # Version removed between reading the pointer and attaching; next refresh retries
+                    if self._snapshot is None:
+                        raise
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+
+def open_live_datasets(names=None, lazy=False):
+    """LiveDatasets on the shared store if DASHBOARD_SHARED_STORE is set, else in-process"""
+    root = os.environ.get(SHARED_STORE_ENV)
+    return SharedLiveDatasets(root, names) if root else LiveDatasets(names, lazy=lazy)
@@ -0,0 +1,522 @@
+"""
+Static Snapshot
+
+Pre-renders the read-only dashboard pages (Overview, Forecasts, Model
+Performance) into a static bundle, once per data version. Each page is one
+JSON file of ordered blocks: headings, metrics, tables and figures as
+Plotly JSON. Nothing is computed when the bundle is viewed.
+
+The bundle can be served two ways:
+    - by any static file server: index.html fetches the page files and
+      draws the figures with the plotly.js copy written next to it;
+    - by the dashboard itself, when DASHBOARD_SNAPSHOT_DIR points at the
+      bundle root: the read-only pages are rendered from the bundle while
+      it matches the data files, without loading any dataset or the model.
+      Interactive pages (Price History, Business Value) stay live.
+
+Layout under the bundle root:
+    CURRENT.json     pointer: {"counter": n, "version": ..., "path": "v<n>"}
+    index.html, plotly-<version>.min.js
+    v<n>/manifest.json and v<n>/<page>.json
+
+The version is a signature of the files the pages are built from (dataset
+CSVs, multi-step results store, model artifact), computed from stat() calls
+only. A build is skipped while the current bundle has the same version.
+Each build writes a new v<n> directory and then swaps the pointer, so
+readers never see a half-written bundle; the last KEEP_VERSIONS are kept.
+
+Run with: python static_snapshot.py [--output data/snapshot] [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from anomaly_detection import CUSUM_LIMIT, Z_THRESHOLD
+from charts import actual_vs_predicted_figure, error_bar_figure, error_histogram_figure, horizon_mae_figure, rebar_trend_figure
+from data_store import DATA_DIR, MULTI_STEP_CSV_DATASETS, data_version, store_signature
+from forecast_engine import MODEL_FILE, load_forecaster
+from forecast_intervals import DEFAULT_QUANTILES, MIN_RESIDUALS, N_PATHS, forecast_intervals, quantile_column
+
+SNAPSHOT_DIR_ENV = "DASHBOARD_SNAPSHOT_DIR"
+DEFAULT_SNAPSHOT_DIR = DATA_DIR / "snapshot"
+POINTER_FILE = "CURRENT.json"
+KEEP_VERSIONS = 2
+
+# Bump when the page layout changes, so bundles built by older code are rebuilt
+SNAPSHOT_FORMAT = 1
+
+# Page key -> dashboard navigation label
+PAGES = {
+    'overview': "📊 Overview",
+    'forecasts': "🔮 Forecasts",
+    'model_performance': "✅ Model Performance",
+}
+
+# Datasets the pre-rendered pages read
+PAGE_DATASETS = ['prices', 'walk_forward', 'multi_step_summary', *MULTI_STEP_CSV_DATASETS.values()]
+
+REBAR = 'rebar_uae_import'
+
+
+def data_signature():
+    """Signature of the dataset CSVs and results store the pages read"""
+    return f"{data_version(PAGE_DATASETS)}:{store_signature()}"
+
+
+def snapshot_version(data=None):
+    """
+    Short signature of every file the pre-rendered pages depend on: the
+    data (or a data_signature() taken earlier) and the model artifact
+    """
+    data = data_signature() if data is None else data
+    model = f"{MODEL_FILE.stat().st_mtime_ns}:{MODEL_FILE.stat().st_size}" if MODEL_FILE.exists() else ""
+    parts = [str(SNAPSHOT_FORMAT), data, model]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:12]
+
+
+# ============================================================================
+# BLOCKS
+# ============================================================================
+
+def _cell(value):
+    """JSON-safe table cell: dates as ISO strings, NaN as null"""
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return None if pd.isna(value) else pd.Timestamp(value).date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _text(kind, text):
+    return {'type': kind, 'text': text}
+
+
+def _metrics(*items):
+    """Row of metrics from (label, value) or (label, value, delta) tuples"""
+    return {'type': 'metrics', 'items': [
+        {'label': item[0], 'value': item[1], 'delta': item[2] if len(item) > 2 else None} for item in items
+    ]}
+
+
+def _figure(name, fig):
+    return {'type': 'figure', 'name': name, 'figure': json.loads(pio.to_json(fig, validate=False))}
+
+
+def _table(df):
+    return {
+        'type': 'table',
+        'columns': [str(column) for column in df.columns],
+        'rows': [[_cell(value) for value in row] for row in df.itertuples(index=False)],
+    }
+
+
+def _divider():
+    return {'type': 'divider'}
+
+
+# ============================================================================
+# PAGES
+# ============================================================================
+
+def overview_page(data, forecaster, df_int):
+    blocks = [_text('title', "📊 Steel Price Forecasting Dashboard"), _text('heading', "UAE Rebar Import (CFR Jebel Ali)")]
+    if data['prices'] is None:
+        return blocks
+
+    rebar_stats = data['price_stats'].get(REBAR)
+    price_change = rebar_stats['last'] - rebar_stats['prev']
+    metrics = [
+        ("Current Price", f"${rebar_stats['last']:.2f}/mt",
+         f"{price_change:+.2f} ({price_change / rebar_stats['prev'] * 100:+.1f}%)"),
+        ("30-Day Average", f"${rebar_stats['mean_30d']:.2f}/mt"),
+        ("30-Day Volatility", f"${rebar_stats['std_30d']:.2f}/mt"),
+    ]
+    if data['walk_forward'] is not None:
+        metrics.append(("Model MAE", f"${data['walk_forward']['mae'].mean():.2f}/mt"))
+    blocks += [_metrics(*metrics), _divider()]
+
+    blocks += [
+        _text('subheader', "Recent Price Trends (Last 90 Days)"),
+        _figure("overview/rebar_trend", rebar_trend_figure(data['price_index'].frame(REBAR).tail(90))),
+        _divider(),
+        _text('subheader', "Latest Multi-Step Forecast"),
+    ]
+
+    df_target = df_int[df_int['symbol'] == forecaster.artifact['target']]
+    blocks.append(_table(pd.DataFrame({
+        'Horizon': [f"{h}-Day" for h in df_target['horizon']],
+        'Date': df_target['date'].dt.date,
+        'Forecast': [f"${v:.2f}" for v in df_target['point']],
+        '68% CI': [f"${lo:.2f} - ${hi:.2f}" for lo, hi in zip(df_target['p16'], df_target['p84'])],
+        '95% CI': [f"${lo:.2f} - ${hi:.2f}" for lo, hi in zip(df_target['p2.5'], df_target['p97.5'])],
+    })))
+    blocks.append(_text('caption',
+        f"Empirical intervals from {N_PATHS:,} simulated price paths centred on the model forecast, "
+        f"or from backtest errors at horizons with at least {MIN_RESIDUALS} of them."
+    ))
+
+    blocks += [_divider(), _text('subheader', "🚨 Price Anomalies")]
+    latest = data['price_stats'].table['last_date'].max()
+    df_recent = data['price_anomalies'].recent(since=latest - pd.Timedelta(days=30))
+    df_latest = df_recent[df_recent['date'] == latest]
+    if len(df_latest):
+        blocks.append({'type': 'alert', 'level': 'warning', 'text': (
+            f"{len(df_latest)} price(s) on {latest.date()} flagged: "
+            + ", ".join(f"{row['symbol']} ({row['flag'].replace('_', ' ')})" for row in df_latest.to_dict('records'))
+        )})
+    if len(df_recent):
+        blocks.append(_table(df_recent.assign(date=df_recent['date'].dt.date).round(2)))
+    else:
+        blocks.append({'type': 'alert', 'level': 'success', 'text':
+                       f"No prices flagged in the last 30 days across {len(data['price_index'].symbols)} symbols."})
+    blocks.append(_text('caption',
+        f"Spikes are returns beyond {Z_THRESHOLD:g} EWMA standard deviations and are held out of the baseline; "
+        f"regime shifts are trends whose CUSUM exceeds {CUSUM_LIMIT:g}."
+    ))
+    return blocks
+
+
+def forecasts_page(data, forecaster, df_int):
+    blocks = [
+        _text('title', "🔮 Multi-Step Forecasts"),
+        _text('text', "This page shows forecast performance at different horizons:"),
+        {'type': 'list', 'items': [
+            "1-Day Ahead: Next trading day prediction",
+            "7-Day Ahead: Weekly planning forecast",
+            "30-Day Ahead: Monthly budget forecast",
+        ]},
+    ]
+
+    for horizon in data['horizons']:
+        df_h = data[f'multi_step_{horizon}d']
+        errors = df_h['error']
+        blocks += [
+            _text('subheader', f"{horizon}-Day Ahead"),
+            _figure(f"forecasts/actual_vs_predicted_{horizon}d", actual_vs_predicted_figure(df_h, horizon)),
+            _metrics(
+                ("MAE", f"${errors.abs().mean():.2f}/mt"),
+                ("Mean Error", f"${errors.mean():.2f}/mt"),
+                ("Std Dev", f"${errors.std():.2f}/mt"),
+                ("Max Error", f"${errors.abs().max():.2f}/mt"),
+            ),
+        ]
+
+    if df_int is not None:
+        blocks += [_divider(), _text('subheader', "Prediction Intervals: All Symbols")]
+        columns = ['symbol', 'last', 'point'] + [quantile_column(q) for q in DEFAULT_QUANTILES] + ['source']
+        for horizon in forecaster.horizons:
+            df_h = df_int[df_int['horizon'] == horizon]
+            blocks += [
+                _text('heading', f"{horizon}-Day Ahead"),
+                _table(df_h[columns].round(2)),
+                _text('caption', f"Forecast for {df_h['date'].iloc[0].date()}."),
+            ]
+        blocks.append(_text('caption',
+            f"Each of {N_PATHS:,} paths resamples whole days of returns across all symbols; "
+            f"the model's target is centred on its forecast."
+        ))
+    return blocks
+
+
+def model_performance_page(data):
+    blocks = [_text('title', "✅ Model Performance Analysis")]
+
+    if data['walk_forward'] is not None:
+        df_wf = data['walk_forward']
+        r2 = 1 - (np.sum(df_wf['error']**2) / np.sum((df_wf['actual'] - df_wf['actual'].mean())**2))
+        blocks += [
+            _text('subheader', "Walk-Forward Validation Results"),
+            _metrics(
+                ("Out-of-Sample MAE", f"${df_wf['mae'].mean():.2f}/mt"),
+                ("Out-of-Sample MAPE", f"{df_wf['mape'].mean():.2f}%"),
+                ("R²", f"{r2:.4f}"),
+                ("Validation Folds", f"{len(df_wf)}"),
+            ),
+            _text('subheader', "Prediction Errors Over Time"),
+            _figure("model_performance/errors", error_bar_figure(df_wf)),
+            _text('subheader', "Error Distribution"),
+            _figure("model_performance/error_histogram", error_histogram_figure(df_wf)),
+        ]
+
+    blocks += [_divider(), _text('subheader', "Multi-Horizon Performance Comparison")]
+    if data['multi_step_summary'] is not None:
+        df_summary = data['multi_step_summary']
+        blocks += [_figure("model_performance/horizon_mae", horizon_mae_figure(df_summary)), _table(df_summary)]
+    return blocks
+
+
+def render_pages(data):
+    """Page key -> blocks for every pre-rendered page of a data snapshot"""
+    forecaster = df_int = None
+    if data['prices'] is not None:
+        forecaster = load_forecaster(data['prices'], MODEL_FILE)
+        residuals = {h: data[f'multi_step_{h}d']['error'].to_numpy() for h in data['horizons']}
+        df_int = forecast_intervals(data['price_index'], forecaster, data['version'], DEFAULT_QUANTILES, residuals)
+
+    return {
+        'overview': overview_page(data, forecaster, df_int),
+        'forecasts': forecasts_page(data, forecaster, df_int),
+        'model_performance': model_performance_page(data),
+    }
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def read_pointer(root):
+    """Current pointer of the bundle, or None if nothing is built"""
+    try:
+        with open(Path(root) / POINTER_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json(path, payload):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, separators=(',', ':'), allow_nan=False)
+    os.replace(tmp_path, path)
+
+
+def _write_viewer(root):
+    """index.html and the plotly.js it loads; plotly.js is written once per plotly version"""
+    plotly_js = f"plotly-{get_plotlyjs_version()}.min.js"
+    if not (root / plotly_js).exists():
+        (root / f".{plotly_js}.tmp").write_text(get_plotlyjs(), encoding='utf-8')
+        os.replace(root / f".{plotly_js}.tmp", root / plotly_js)
+    (root / "index.html").write_text(VIEWER_HTML.replace("{plotly_js}", plotly_js), encoding='utf-8')
+
+
+def build_snapshot(root=DEFAULT_SNAPSHOT_DIR, force=False):
+    """
+    Render every read-only page into a new bundle version under `root`.
+
+    Returns the pointer, and whether a bundle was built (False when the
+    current one already matches the data files).
+    """
+    from data_refresh import LiveDatasets
+
+    root = Path(root)
+    # Taken before loading: data changing mid-build leaves the bundle stale, never mislabelled
+    signature = data_signature()
+    previous = read_pointer(root)
+    if previous and previous['version'] == snapshot_version(signature) and not force and (root / previous['path']).is_dir():
+        return previous, False
+
+    data = LiveDatasets(PAGE_DATASETS).snapshot()
+    pages = render_pages(data)
+    # Taken after rendering, which fits and saves the model when there is none yet
+    version = snapshot_version(signature)
+
+    counter = previous['counter'] + 1 if previous else 1
+    name = f"v{counter}"
+    root.mkdir(parents=True, exist_ok=True)
+    tmp_dir = root / f".{name}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+    try:
+        for key, blocks in pages.items():
+            _write_json(tmp_dir / f"{key}.json", {'page': key, 'label': PAGES[key], 'blocks': blocks})
+        _write_json(tmp_dir / "manifest.json", {
+            'version': version,
+            'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'pages': {key: PAGES[key] for key in pages},
+        })
+        os.replace(tmp_dir, root / name)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    _write_viewer(root)
+    pointer = {'counter': counter, 'version': version, 'path': name}
+    _write_json(root / POINTER_FILE, pointer)
+
+    for entry in root.iterdir():
+        if entry.is_dir() and entry.name.startswith('v') and entry.name[1:].isdigit():
+            if int(entry.name[1:]) <= counter - KEEP_VERSIONS:
+                shutil.rmtree(entry, ignore_errors=True)
+    return pointer, True
+
+
+# ============================================================================
+# READ
+# ============================================================================
+
+class SnapshotBundle:
+    """One bundle version: page blocks with their figures rebuilt as Plotly figures"""
+
+    def __init__(self, root, pointer):
+        version_dir = Path(root) / pointer['path']
+        with open(version_dir / "manifest.json") as f:
+            self.manifest = json.load(f)
+        self.version = pointer['version']
+        self.pages = {}
+        self.figures = {}
+        for key in self.manifest['pages']:
+            with open(version_dir / f"{key}.json") as f:
+                blocks = json.load(f)['blocks']
+            for block in blocks:
+                if block['type'] == 'figure':
+                    self.figures[block['name']] = go.Figure(block.pop('figure'), skip_invalid=True)
+            self.pages[key] = blocks
+
+
+def current_bundle_pointer(root):
+    """
+    Pointer of the bundle under `root` if it was built from the current
+    data files, else None. Costs one small file read and a few stat() calls.
+    """
+    pointer = read_pointer(root)
+    if pointer is None or pointer['version'] != snapshot_version():
+        return None
+    return pointer
+
+
+# ============================================================================
+# VIEWER
+# ============================================================================
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Steel Price Forecasting</title>
+<script src="{plotly_js}"></script>
+<style>
+  body { font-family: sans-serif; margin: 0; color: #262730; }
+  nav { background: #f0f2f6; padding: 1rem 2rem; }
+  nav a { margin-right: 1.5rem; cursor: pointer; color: #262730; text-decoration: none; }
+  nav a.active { font-weight: bold; }
+  main { max-width: 1200px; margin: 0 auto; padding: 1rem 2rem; }
+  .metrics { display: flex; gap: 2rem; margin: 1rem 0; }
+  .metric .label { font-size: 0.9rem; }
+  .metric .value { font-size: 2rem; }
+  .caption, footer { color: gray; font-size: 0.85rem; }
+  .alert { padding: 0.75rem 1rem; border-radius: 0.5rem; margin: 1rem 0; }
+  .warning { background: #fffce7; }
+  .success { background: #e8f9ee; }
+  table { border-collapse: collapse; margin: 1rem 0; }
+  td, th { border-bottom: 1px solid #e6e9ef; padding: 0.3rem 0.75rem; text-align: right; }
+  footer { text-align: center; padding: 2rem; }
+</style>
+</head>
+<body>
+<nav id="nav"></nav>
+<main id="page"></main>
+<footer id="footer"></footer>
+<script>
+function el(tag, text, className) {
+  const node = document.createElement(tag);
+  if (text !== undefined && text !== null) node.textContent = text;
+  if (className) node.className = className;
+  return node;
+}
+
+async function getJSON(url) {
+  const response = await fetch(url, {cache: 'no-cache'});
+  if (!response.ok) throw new Error(url + ': ' + response.status);
+  return response.json();
+}
+
+const render = {
+  title: (b) => el('h1', b.text),
+  heading: (b) => el('h3', b.text),
+  subheader: (b) => el('h2', b.text),
+  text: (b) => el('p', b.text),
+  caption: (b) => el('p', b.text, 'caption'),
+  divider: () => el('hr'),
+  alert: (b) => el('div', b.text, 'alert ' + b.level),
+  list: (b) => { const ul = el('ul'); b.items.forEach((i) => ul.appendChild(el('li', i))); return ul; },
+  metrics: (b) => {
+    const row = el('div', null, 'metrics');
+    b.items.forEach((m) => {
+      const metric = el('div', null, 'metric');
+      metric.append(el('div', m.label, 'label'), el('div', m.value, 'value'));
+      if (m.delta) metric.appendChild(el('div', m.delta, 'delta'));
+      row.appendChild(metric);
+    });
+    return row;
+  },
+  table: (b) => {
+    const table = el('table');
+    const head = table.createTHead().insertRow();
+    b.columns.forEach((c) => head.appendChild(el('th', c)));
+    const body = table.createTBody();
+    b.rows.forEach((r) => { const tr = body.insertRow(); r.forEach((v) => tr.appendChild(el('td', v))); });
+    return table;
+  },
+  figure: (b) => {
+    const div = el('div');
+    Plotly.newPlot(div, b.figure.data, b.figure.layout, {responsive: true});
+    return div;
+  },
+};
+
+async function show(base, manifest, key) {
+  const page = await getJSON(base + key + '.json');
+  const main = document.getElementById('page');
+  main.replaceChildren();
+  page.blocks.forEach((block) => main.appendChild(render[block.type](block)));
+  document.querySelectorAll('nav a').forEach((a) => a.classList.toggle('active', a.dataset.page === key));
+  window.location.hash = key;
+}
+
+(async () => {
+  const pointer = await getJSON('CURRENT.json');
+  const base = pointer.path + '/';
+  const manifest = await getJSON(base + 'manifest.json');
+  const nav = document.getElementById('nav');
+  Object.entries(manifest.pages).forEach(([key, label]) => {
+    const a = el('a', label);
+    a.dataset.page = key;
+    a.onclick = () => show(base, manifest, key);
+    nav.appendChild(a);
+  });
+  document.getElementById('footer').textContent =
+    'Steel Price Forecasting System | Snapshot ' + manifest.version + ' built ' + manifest.built_at;
+  const keys = Object.keys(manifest.pages);
+  const first = keys.includes(window.location.hash.slice(1)) ? window.location.hash.slice(1) : keys[0];
+  if (first) show(base, manifest, first);
+})();
+</script>
+</body>
+</html>
+"""
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render the read-only dashboard pages into a static bundle")
+    parser.add_argument("--output", type=Path, default=Path(os.environ.get(SNAPSHOT_DIR_ENV, DEFAULT_SNAPSHOT_DIR)))
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the bundle matches the data files")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pointer, built = build_snapshot(args.output, force=args.force)
+    if not built:
+        print(f"Snapshot {pointer['version']} in {args.output} is up to date")
+    else:
+        version_dir = args.output / pointer['path']
+        print(f"Built snapshot {pointer['version']} in {version_dir} ({time.perf_counter() - start:.1f}s)")
+        for page_file in sorted(version_dir.glob("*.json")):
+            print(f"  {page_file.name}: {page_file.stat().st_size / 1024:,.0f} KB")
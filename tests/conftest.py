@@ -0,0 +1,11 @@
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(autouse=True)
+def repo_cwd(monkeypatch):
+    """Data paths in data_store are relative to the repository root"""
+    monkeypatch.chdir(REPO_ROOT)
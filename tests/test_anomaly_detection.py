@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from anomaly_detection import FLAGS, WARMUP, AnomalyDetector
+
+
+def walk(n=120, drift=0.0, seed=1):
+    """
+    Prices of a random walk with 1% daily volatility. Some walks wander far
+    enough to trip the CUSUM; the default seed's does not.
+    """
+    rng = np.random.default_rng(seed)
+    return 600 * np.exp(np.cumsum(rng.normal(drift, 0.01, n)))
+
+
+def flags(prices, symbol='rebar'):
+    _, _, flag = AnomalyDetector().score([symbol] * len(prices), prices)
+    return {i: FLAGS[f] for i, f in enumerate(flag) if f}
+
+
+def test_quiet_series_is_not_flagged():
+    assert flags(walk()) == {}
+
+
+def test_spike_is_flagged_and_not_accepted():
+    prices = walk()
+    prices[60] *= 1.3
+    # The next day is scored against the price before the spike, so it is not flagged
+    assert flags(prices) == {60: 'spike'}
+
+
+def test_level_shift_after_a_run_of_spikes():
+    prices = walk()
+    prices[60:] *= 1.3
+    assert flags(prices) == {60: 'spike', 61: 'spike', 62: 'level_shift'}
+
+
+def test_trend_is_a_regime_shift():
+    found = flags(walk(drift=0.01))
+    assert 'regime_shift' in found.values()
+    assert 'spike' not in found.values()
+
+
+def test_invalid_and_repeated_prices():
+    prices = walk()
+    prices[40] = 0.0
+    prices[41] = -5.0
+    # A price carried forward is skipped, not scored as a zero return
+    prices[50] = prices[49]
+    assert flags(prices) == {40: 'invalid', 41: 'invalid'}
+
+
+def test_no_flags_during_warmup():
+    prices = walk()
+    prices[WARMUP - 1] *= 1.5
+    assert flags(prices) == {}
+
+
+@pytest.mark.parametrize("split", [1, 61, 119])
+def test_streaming_matches_one_batch(split):
+    a, b = walk(seed=2), walk(seed=3)
+    a[70] *= 1.3
+    b[90:] *= 0.7
+    symbols = np.array(['a'] * len(a) + ['b'] * len(b))
+    prices = np.r_[a, b]
+    batch = AnomalyDetector().score(symbols, prices)
+
+    # Rows arrive in two batches: the first `split` days of both symbols, then the rest
+    first = np.r_[np.arange(split), len(a) + np.arange(split)]
+    rest = np.setdiff1d(np.arange(len(prices)), first)
+    detector = AnomalyDetector()
+    streamed = [np.empty(len(prices)) for _ in batch]
+    for rows in (first, rest):
+        for out, values in zip(streamed, detector.score(symbols[rows], prices[rows])):
+            out[rows] = values
+
+    for expected, actual in zip(batch, streamed):
+        np.testing.assert_array_equal(expected, actual)
@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")  # used by starlette's TestClient
+
+from starlette.testclient import TestClient
+
+import api
+from feature_engineering import LagFeatureBuilder
+from price_index import PriceIndex
+
+
+@pytest.fixture(scope="module")
+def client():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.delenv("DASHBOARD_SHARED_STORE", raising=False)
+        monkeypatch.setattr(api, "state", api.ApiState())
+        yield TestClient(api.app)
+
+
+def test_etag_round_trip(client):
+    first = client.get("/prices/rebar_uae_import", params={'start': '2025-03-01', 'end': '2025-03-31'})
+    assert first.status_code == 200
+    etag = first.headers['etag']
+    assert first.json()['n'] > 0
+
+    again = client.get("/prices/rebar_uae_import", params={'start': '2025-03-01', 'end': '2025-03-31'},
+                       headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers['etag'] == etag
+
+    # Another query is another resource
+    other = client.get("/prices/rebar_uae_import", params={'start': '2025-04-01'}, headers={'If-None-Match': etag})
+    assert other.status_code == 200
+    assert other.headers['etag'] != etag
+
+
+def test_stale_etag_gets_a_body(client):
+    response = client.get("/health", headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    assert response.json()['status'] == 'ok'
+
+
+def test_etag_follows_the_data_version(client, monkeypatch):
+    etag = client.get("/health").headers['etag']
+    snapshot = dict(api.state.snapshot(), version="next")
+    monkeypatch.setattr(api.state, "snapshot", lambda: snapshot)
+
+    response = client.get("/health", headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json()['data_version'] == "next"
+    assert response.headers['etag'] != etag
+
+
+def test_errors_are_not_answered_with_304(client):
+    missing = client.get("/prices/unknown")
+    assert missing.status_code == 404
+    again = client.get("/prices/unknown", headers={'If-None-Match': missing.headers['etag']})
+    assert again.status_code == 404
+    assert "unknown" in again.json()['error']
+
+
+def test_concurrent_forecast_misses_agree(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_SHARED_STORE", raising=False)
+    monkeypatch.setattr(api, "state", api.ApiState())
+    snapshot = api.state.snapshot()
+    forecaster = api.state.forecaster(snapshot['prices'])
+    # A stale builder, so both requests have to extend it
+    df = snapshot['prices']
+    forecaster.feature_row(PriceIndex(df[df['date'] < df['date'].max() - pd.Timedelta(days=5)]))
+
+    append = LagFeatureBuilder.append
+    def slow_append(self, *args, **kwargs):
+        time.sleep(0.001)
+        return append(self, *args, **kwargs)
+    monkeypatch.setattr(LagFeatureBuilder, "append", slow_append)
+
+    # Different queries are different cache keys, so both miss
+    barrier = threading.Barrier(2)
+    def get(params):
+        client = TestClient(api.app)
+        barrier.wait()
+        return client.get("/forecast", params=params).json()
+    with ThreadPoolExecutor(2) as pool:
+        full, filtered = pool.map(get, [{}, {'horizons': ','.join(map(str, forecaster.horizons))}])
+
+    assert full['as_of'] == filtered['as_of'] == df['date'].max().date().isoformat()
+    assert full['forecasts'] == filtered['forecasts']
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import pandas as pd
+
+from benchmark import append_day, compare, generate_prices, measure, scratch_workspace
+from data_store import DATASETS
+
+
+def test_generated_prices_follow_the_csv_layout():
+    shipped = pd.read_csv(DATASETS['prices']['csv'], nrows=5)
+    df = generate_prices(20, 1)
+    assert list(df.columns) == list(shipped.columns)
+    assert df['symbol'].nunique() == 20
+    assert len(df) == 20 * 365
+    assert df['symbol'].iloc[-1].startswith("synthetic_")
+    assert (df['price_low'] < df['price_mid']).all() and (df['price_mid'] < df['price_high']).all()
+
+
+def test_scratch_workspace_holds_the_prices(tmp_path):
+    df = generate_prices(3, 1)
+    cwd = Path.cwd()
+    with scratch_workspace(df) as work:
+        assert Path.cwd() == work
+        csv_path = work / DATASETS['prices']['csv']
+        appended = append_day(csv_path, df)
+        assert len(pd.read_csv(csv_path)) == len(appended) == len(df) + 3
+    assert Path.cwd() == cwd
+    assert not work.exists()
+
+
+def test_measure_runs_setup_before_every_run():
+    calls = []
+    result = measure(lambda: calls.append('run'), repeat=3, setup=lambda: calls.append('setup'))
+    # Three timed runs and one traced run
+    assert calls == ['setup', 'run'] * 4
+    assert result['repeats'] == 3 and result['min_s'] <= result['median_s']
+
+
+def test_compare_flags_slower_stages(capsys):
+    row = lambda stage, seconds: {'symbols': 17, 'years': 1, 'stage': stage, 'median_s': seconds}
+    baseline = {'results': [row('load_csv', 1.0), row('forecast', 0.1)]}
+    current = {'results': [row('load_csv', 1.1), row('forecast', 0.3), row('new_stage', 1.0)]}
+    assert compare(baseline, current, threshold=1.5) == [(17, 1, 'forecast')]
+    assert "SLOWER" in capsys.readouterr().out
@@ -0,0 +1,50 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from business_value import PARAMETERS, SAVINGS_SHARE, reduce_to_axes, savings, scenario_summary
+
+AXES = {
+    'volume': np.array([5000.0, 10000.0, 20000.0]),
+    'price': np.array([550.0, 600.0]),
+    'baseline_mae': np.array([20.0, 25.0, 30.0, 35.0]),
+    'model_mae': np.array([0.5, 1.0, 40.0]),
+}
+
+
+def scalar_savings(volume, price, baseline_mae, model_mae):
+    """The page's original per-scenario formula"""
+    annual = (baseline_mae - model_mae) * SAVINGS_SHARE * volume * 12
+    return annual, 100 * annual / (volume * price * 12)
+
+
+def test_grid_matches_the_scalar_formula():
+    annual, roi = savings(*(AXES[name] for name in PARAMETERS))
+    assert annual.shape == roi.shape == (3, 2, 4, 3)
+    for idx in itertools.product(*(range(len(AXES[name])) for name in PARAMETERS)):
+        expected = scalar_savings(*(AXES[name][i] for name, i in zip(PARAMETERS, idx)))
+        assert (annual[idx], roi[idx]) == pytest.approx(expected)
+
+
+def test_scalars_give_a_single_scenario():
+    annual, roi = savings(10000, 600, 25, 0.78)
+    assert annual.shape == (1, 1, 1, 1)
+    assert annual.item() == pytest.approx(scalar_savings(10000, 600, 25, 0.78)[0])
+
+
+def test_heatmap_reduces_the_other_axes():
+    annual, _ = savings(*(AXES[name] for name in PARAMETERS))
+    heatmap = reduce_to_axes(annual, 'volume', 'baseline_mae')
+    assert heatmap.shape == (4, 3)
+    # Savings do not depend on price; the median over model MAE is the middle value
+    np.testing.assert_allclose(heatmap[0, 0], scalar_savings(5000, 600, 20, 1.0)[0])
+
+
+def test_summary():
+    summary = scenario_summary(AXES, 'volume', 'price')
+    assert summary['n_scenarios'] == 3 * 2 * 4 * 3
+    # Only the 40 USD/mt model MAE loses money
+    assert summary['share_positive'] == pytest.approx(2 / 3)
+    table = summary['percentiles']
+    np.testing.assert_allclose(table.loc['Monthly Savings (USD)'], table.loc['Annual Savings (USD)'] / 12)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import CorrelationEngine, rolling_correlations
+from data_store import load_dataset
+from feature_engineering import daily_log_returns, wide_prices
+from price_index import PriceIndex
+
+
+@pytest.fixture(scope="module")
+def df_prices():
+    return load_dataset('prices')
+
+
+def test_rolling_matches_pandas():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.01, (200, 3))
+    corr = rolling_correlations(returns, 60)
+    expected = pd.Series(returns[:, 0]).rolling(60).corr(pd.Series(returns[:, 2]))
+    np.testing.assert_allclose(corr[:, 0, 2], expected, equal_nan=True)
+    assert np.isnan(corr[58]).all()
+
+
+def test_lead_lag_matches_shifted_windows(df_prices):
+    engine = CorrelationEngine(window=60).update(PriceIndex(df_prices))
+    recent = daily_log_returns(wide_prices(df_prices))[-60:]
+    lead_lag = engine.lead_lag()
+    for lag in [0, 1, 7, 30]:
+        expected = np.corrcoef(recent[:60 - lag, 2], recent[lag:, 5])[0, 1]
+        assert lead_lag[lag, 2, 5] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("window", [60, 180])
+def test_appended_days_match_a_rebuild(df_prices, window):
+    dates = np.sort(df_prices['date'].unique())
+    engine = CorrelationEngine(window=window).update(PriceIndex(df_prices[df_prices['date'] <= dates[-10]]))
+    engine.update(PriceIndex(df_prices))
+    fresh = CorrelationEngine(window=window).update(PriceIndex(df_prices))
+
+    assert engine.last_date == fresh.last_date
+    np.testing.assert_allclose(engine.matrix(), fresh.matrix())
+    np.testing.assert_allclose(engine.lead_lag(), fresh.lead_lag(), atol=1e-10)
+    pd.testing.assert_frame_equal(engine.rolling('rebar_uae_import'), fresh.rolling('rebar_uae_import'))
+
+
+def test_correction_in_the_window_rebuilds(df_prices):
+    engine = CorrelationEngine(window=60).update(PriceIndex(df_prices))
+
+    # Only the latest prices were checked before: a correction 10 days back was missed
+    corrected = df_prices.copy()
+    date = np.sort(corrected['date'].unique())[-11]
+    corrected.loc[(corrected['symbol'] == 'rebar_uae_import') & (corrected['date'] == date), 'price_mid_usd_mt'] *= 1.05
+    engine.update(PriceIndex(corrected))
+    fresh = CorrelationEngine(window=60).update(PriceIndex(corrected))
+
+    np.testing.assert_allclose(engine.matrix(), fresh.matrix())
+    np.testing.assert_allclose(engine.lead_lag(), fresh.lead_lag(), atol=1e-10)
+    pd.testing.assert_frame_equal(engine.rolling('rebar_uae_import'), fresh.rolling('rebar_uae_import'))
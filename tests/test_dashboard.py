@@ -0,0 +1,71 @@
+"""Smoke test: every dashboard page renders without an exception"""
+
+import shutil
+from datetime import date
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from conftest import REPO_ROOT
+from data_store import load_dataset
+from price_revisions import REVISIONS_DIR, record_revisions
+
+PAGES = ["📊 Overview", "📈 Price History", "🔮 Forecasts", "✅ Model Performance", "💼 Business Value"]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.delenv("DASHBOARD_SHARED_STORE", raising=False)
+    monkeypatch.delenv("DASHBOARD_SNAPSHOT_DIR", raising=False)
+    # Each page starts from a cold process: nothing loaded, nothing cached
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    return AppTest.from_file(str(REPO_ROOT / "dashboard.py"), default_timeout=120)
+
+
+def assert_rendered(app):
+    assert not app.exception, [e.value for e in app.exception]
+    assert app.title[0].value
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_renders(app, page):
+    app.run()
+    assert_rendered(app)
+    app.sidebar.radio[0].set_value(page).run()
+    assert_rendered(app)
+
+
+@pytest.fixture(scope="module")
+def revisions():
+    """Recorded price revisions, so the sidebar offers the as-of view"""
+    if REVISIONS_DIR.exists():
+        yield
+        return
+    record_revisions(load_dataset('prices'))
+    yield
+    shutil.rmtree(REVISIONS_DIR)
+
+
+@pytest.mark.parametrize("page", PAGES)
+def test_page_renders_as_of(app, revisions, page):
+    app.run()
+    app.sidebar.toggle[0].set_value(True).run()
+    app.sidebar.date_input[0].set_value(date(2025, 3, 31)).run()
+    assert_rendered(app)
+    assert any("2025-03-31" in caption.value for caption in app.sidebar.caption)
+    app.sidebar.radio[0].set_value(page).run()
+    assert_rendered(app)
+
+
+def test_horizon_text_follows_the_results(app):
+    app.run()
+    app.sidebar.radio[0].set_value("🔮 Forecasts").run()
+    horizons = [int(tab.label.split('-')[0]) for tab in app.tabs if tab.label.endswith("-Day Ahead")]
+    assert horizons
+
+    text = "\n".join(md.value for md in app.markdown)
+    assert all(f"**{h}-Day Ahead**" in text for h in horizons)
+    sidebar = "\n".join(md.value for md in app.sidebar.markdown)
+    assert f"- {', '.join(map(str, horizons[:-1]))}, and {horizons[-1]}-day forecasts" in sidebar
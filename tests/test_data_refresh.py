@@ -0,0 +1,38 @@
+from data_refresh import LiveDatasets, snapshot_group
+
+
+def test_snapshot_keys_map_to_groups():
+    assert snapshot_group('price_stats') == 'prices'
+    assert snapshot_group('multi_step_7d') == 'multi_step'
+    assert snapshot_group('horizons') == 'multi_step'
+    assert snapshot_group('walk_forward') == 'walk_forward'
+    assert snapshot_group('version') is None
+
+
+def test_lazy_groups_load_on_first_read():
+    live = LiveDatasets(lazy=True)
+    snapshot = live.snapshot()
+    assert live.loaded == set() and snapshot.versions == {}
+
+    assert snapshot['walk_forward'] is not None
+    assert live.loaded == {'walk_forward'}
+    assert set(live.states) == {'walk_forward'}
+
+    # Every key of the prices group arrives together
+    assert snapshot['price_stats'] is not None
+    assert live.loaded == {'walk_forward', 'prices'}
+    assert {'prices', 'price_index'} <= set(dict.keys(snapshot))
+    assert set(snapshot.versions) == {'walk_forward', 'prices'}
+
+
+def test_lazy_versions_match_eager_ones():
+    eager = LiveDatasets()
+    lazy = LiveDatasets(lazy=True).snapshot()
+    for group in eager.groups():
+        assert lazy.version_of(group) == eager.snapshot().version_of(group)
+
+    # Refreshing unchanged files keeps the snapshot
+    live = LiveDatasets(lazy=True)
+    live.snapshot()['prices']
+    loaded = live.snapshot()
+    assert live.refresh() is loaded
@@ -0,0 +1,11 @@
+import pandas as pd
+
+from data_store import DATASETS, dataset_column, load_dataset
+
+
+def test_prices_keep_full_precision():
+    df = load_dataset('prices')
+    df_csv = pd.read_csv(DATASETS['prices']['csv'])
+    for column in ['price_low', 'price_mid', 'price_high', 'price_mid_usd_mt']:
+        values = dataset_column(df, column, 'prices')
+        pd.testing.assert_series_equal(values.reset_index(drop=True), df_csv[column], check_names=False)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsampling import date_window, downsample, lttb_indices, minmax_indices, trace_payload_bytes
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2015-01-01', periods=5000).to_numpy()
+    values = 600 + np.cumsum(rng.normal(0, 5, len(dates)))
+    return dates, values
+
+
+def test_short_series_is_returned_whole(series):
+    dates, values = series
+    np.testing.assert_array_equal(minmax_indices(values[:100], 200), np.arange(100))
+    np.testing.assert_array_equal(lttb_indices(dates[:100].astype(np.int64), values[:100], 200), np.arange(100))
+
+
+def test_minmax_keeps_every_bucket_extreme(series):
+    _, values = series
+    idx = minmax_indices(values, 200)
+    assert len(idx) <= 202
+    assert np.all(np.diff(idx) > 0)
+    assert idx[0] == 0 and idx[-1] == len(values) - 1
+    assert values.argmin() in idx and values.argmax() in idx
+
+
+def test_lttb_keeps_endpoints(series):
+    dates, values = series
+    idx = lttb_indices(dates.astype(np.int64), values, 300)
+    assert len(idx) == 300
+    assert np.all(np.diff(idx) > 0)
+    assert idx[0] == 0 and idx[-1] == len(values) - 1
+
+
+@pytest.mark.parametrize("method", ['minmax', 'lttb'])
+def test_downsampled_points_are_original_points(series, method):
+    dates, values = series
+    ds_dates, ds_values = downsample(dates, values, 400, method)
+    positions = np.searchsorted(dates, ds_dates)
+    np.testing.assert_array_equal(values[positions], ds_values)
+
+    with pytest.raises(ValueError, match="Unknown downsampling method"):
+        downsample(dates, values, 400, 'median')
+
+
+def test_narrow_window_keeps_every_point(series):
+    dates, values = series
+    window = date_window(dates, '2016-01-01', '2016-03-31')
+    assert pd.Timestamp(dates[window][0]) == pd.Timestamp('2016-01-01')
+    assert pd.Timestamp(dates[window][-1]) == pd.Timestamp('2016-03-31')
+    _, ds_values = downsample(dates[window], values[window], 1200)
+    np.testing.assert_array_equal(ds_values, values[window])
+
+
+@pytest.mark.parametrize("n", [1, 10, 5000])
+def test_payload_estimate_matches_plotly(n):
+    go = pytest.importorskip("plotly.graph_objects")
+    dates = pd.date_range('2020-01-01', periods=n).to_numpy()
+    values = 600 + np.cumsum(np.random.default_rng(0).normal(0, 5, n))
+    # The trace's share of the figure JSON; the template is the same for every figure
+    actual = len(go.Figure(go.Scatter(x=dates, y=values, mode='lines')).to_json()) - len(go.Figure().to_json())
+    assert trace_payload_bytes(n) == pytest.approx(actual, rel=0.02, abs=8)
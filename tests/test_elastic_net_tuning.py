@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from data_store import load_dataset
+from elastic_net_tuning import rank_candidates, tune
+
+
+@pytest.fixture(scope="module")
+def df_prices():
+    return load_dataset('prices')
+
+
+def test_every_candidate_is_scored(df_prices):
+    df = tune(df_prices, [1, 7], l1_ratios=[0.5, 1.0], alphas=[1.0, 10.0], workers=1)
+    assert len(df) == 2 * 2 * 2
+    assert (df['n_folds'] > 0).all() and np.isfinite(df['mae']).all()
+    assert len(rank_candidates(df)) == 4
+
+
+def test_unscorable_horizon_is_named(df_prices):
+    with pytest.raises(ValueError, match=r"\[60\]"):
+        tune(df_prices, [1, 60], l1_ratios=[0.5], alphas=[1.0], workers=1)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_engineering import FEATURE_LAGS, LagFeatureBuilder, build_lag_features, latest_wide, wide_prices, wide_window
+from price_index import PriceIndex
+
+
+@pytest.fixture
+def wide():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2025-01-01', periods=80)
+    return pd.DataFrame(600 + np.cumsum(rng.normal(0, 5, (len(dates), 3)), axis=0),
+                        index=dates, columns=['billet', 'hrc', 'rebar'])
+
+
+def long_format(wide):
+    df = wide.rename_axis('date').reset_index().melt(id_vars='date', var_name='symbol', value_name='price_mid_usd_mt')
+    return df.dropna()
+
+
+def test_strided_lags_match_shift(wide):
+    expected = {}
+    for symbol in wide.columns:
+        expected[symbol] = wide[symbol]
+        for lag in FEATURE_LAGS:
+            expected[f"{symbol}_lag{lag}"] = wide[symbol].shift(lag)
+    pd.testing.assert_frame_equal(build_lag_features(wide), pd.DataFrame(expected))
+
+
+def test_builder_rows_match_the_full_matrix(wide):
+    features = build_lag_features(wide).to_numpy()
+    builder = LagFeatureBuilder.from_wide(wide.iloc[:40])
+    np.testing.assert_array_equal(builder.latest_row(), features[39])
+
+    for i in range(40, len(wide)):
+        row = builder.append(wide.index[i], wide.iloc[i].to_numpy())
+        np.testing.assert_array_equal(row, features[i])
+    assert builder.last_date == wide.index[-1]
+
+
+def test_missing_values_carry_forward(wide):
+    builder = LagFeatureBuilder.from_wide(wide.iloc[:40])
+    previous = builder.latest_values.copy()
+    builder.append(wide.index[40], [np.nan, 1.0, np.nan])
+    np.testing.assert_array_equal(builder.latest_values, [previous[0], 1.0, previous[2]])
+
+
+def test_latest_wide_reads_symbol_tails(wide):
+    gappy = wide.copy()
+    gappy.iloc[-3:, 0] = np.nan
+    index = PriceIndex(long_format(gappy))
+
+    expected = wide_prices(long_format(gappy)).iloc[-31:]
+    pd.testing.assert_frame_equal(latest_wide(index), expected, check_names=False, check_freq=False)
+
+    after = latest_wide(index, after=wide.index[-5])
+    assert list(after.index) == list(wide.index[-4:])
+    assert np.isnan(after['billet'].iloc[-1])
+
+
+def test_wide_window_matches_wide_prices(wide):
+    wide.iloc[30:35, 1] = np.nan
+    wide.iloc[:4, 2] = np.nan
+    index = PriceIndex(long_format(wide))
+    expected = wide_prices(long_format(wide)).loc['2025-01-02':'2025-02-20']
+
+    dates, values = wide_window(index, '2025-01-02', '2025-02-20', list(wide.columns))
+    np.testing.assert_array_equal(dates, expected.index.to_numpy())
+    np.testing.assert_array_equal(values, expected.to_numpy())
@@ -0,0 +1,55 @@
+from figure_cache import FigureCache
+
+
+def counting_build(calls, value):
+    def build():
+        calls.append(value)
+        return value
+    return build
+
+
+def test_build_runs_once_per_key():
+    cache, calls = FigureCache(), []
+    assert cache.get("overview", (), "v1", counting_build(calls, "a")) == "a"
+    assert cache.get("overview", (), "v1", counting_build(calls, "b")) == "a"
+    assert cache.get("overview", ("rebar",), "v1", counting_build(calls, "c")) == "c"
+    assert calls == ["a", "c"]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_is_evicted():
+    cache, calls = FigureCache(max_entries=2), []
+    cache.get("page", (1,), "v1", counting_build(calls, 1))
+    cache.get("page", (2,), "v1", counting_build(calls, 2))
+    cache.get("page", (1,), "v1", counting_build(calls, 1))
+    cache.get("page", (3,), "v1", counting_build(calls, 3))
+    assert len(cache) == 2
+
+    # (2,) was evicted, (1,) was used more recently and survives
+    cache.get("page", (1,), "v1", counting_build(calls, 1))
+    cache.get("page", (2,), "v1", counting_build(calls, 2))
+    assert calls == [1, 2, 3, 2]
+
+
+def test_new_version_drops_old_entries():
+    cache, calls = FigureCache(), []
+    cache.get("page", (), "v1", counting_build(calls, "old"))
+    cache.retain("v1")
+    assert len(cache) == 1
+
+    cache.retain("v2")
+    assert len(cache) == 0
+    assert cache.get("page", (), "v2", counting_build(calls, "new")) == "new"
+
+
+def test_entries_of_every_current_version_are_kept():
+    cache, calls = FigureCache(), []
+    cache.get("forecasts", (), "prices@1", counting_build(calls, "prices"))
+    cache.get("performance", (), "walk_forward@1", counting_build(calls, "walk_forward"))
+    cache.retain("prices@1", "walk_forward@1")
+    assert len(cache) == 2
+
+    # Only the prices changed
+    cache.retain("prices@2", "walk_forward@1")
+    assert len(cache) == 1
+    assert cache.get("performance", (), "walk_forward@1", counting_build(calls, "rebuilt")) == "walk_forward"
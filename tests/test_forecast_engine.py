@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecast_engine
+from data_store import load_dataset
+from feature_engineering import LagFeatureBuilder, build_lag_features, latest_wide, wide_prices
+from forecast_engine import TARGET_SYMBOL, Forecaster, fit, load_forecaster
+from price_index import PriceIndex
+
+
+@pytest.fixture(scope="module")
+def df_prices():
+    return load_dataset('prices')
+
+
+@pytest.fixture(scope="module")
+def artifact(df_prices):
+    return fit(df_prices)
+
+
+def latest_features(df_prices):
+    return build_lag_features(wide_prices(df_prices)).iloc[-1]
+
+
+def test_folded_weights_match_the_pipeline(df_prices, artifact):
+    features = latest_features(df_prices)
+    row = features[artifact['feature_columns']].to_numpy()
+    expected = artifact['pipeline'].predict(row[None, :])[0] + features[TARGET_SYMBOL]
+    np.testing.assert_allclose(Forecaster(artifact).predict(row), expected)
+
+
+def test_forecast_from_the_latest_row(df_prices, artifact):
+    forecaster = Forecaster(artifact)
+    df = forecaster.forecast(PriceIndex(df_prices))
+
+    features = latest_features(df_prices)
+    assert list(df['horizon']) == artifact['horizons']
+    assert list(df['date']) == [features.name + pd.Timedelta(days=h) for h in artifact['horizons']]
+    np.testing.assert_allclose(df['forecast'], forecaster.predict(features[artifact['feature_columns']].to_numpy()))
+
+
+def test_feature_row_is_cached_per_version(df_prices, artifact):
+    forecaster = Forecaster(artifact)
+    row, as_of = forecaster.feature_row(PriceIndex(df_prices), version="v1")
+
+    earlier = PriceIndex(df_prices[df_prices['date'] < as_of])
+    cached, cached_as_of = forecaster.feature_row(earlier, version="v1")
+    assert cached is row and cached_as_of == as_of
+
+    _, new_as_of = forecaster.feature_row(earlier, version="v2")
+    assert new_as_of < as_of
+
+
+def test_missing_artifact_is_fitted_and_saved(tmp_path, monkeypatch, df_prices, artifact):
+    path = tmp_path / "model.joblib"
+    monkeypatch.setattr(forecast_engine, "fit", lambda df: artifact)
+    with pytest.raises(Exception):
+        load_forecaster(path=path)
+
+    fitted = load_forecaster(df_prices, path)
+    assert path.exists()
+    np.testing.assert_array_equal(load_forecaster(path=path).weights, fitted.weights)
+
+
+def test_appended_prices_extend_the_builder(df_prices, artifact):
+    cut = df_prices['date'].drop_duplicates().nlargest(5).iloc[-1]
+    forecaster = Forecaster(artifact)
+    forecaster.feature_row(PriceIndex(df_prices[df_prices['date'] <= cut]))
+    builder = forecaster._builder
+
+    row, as_of = forecaster.feature_row(PriceIndex(df_prices))
+    assert forecaster._builder is builder
+
+    fresh_row, fresh_as_of = Forecaster(artifact).feature_row(PriceIndex(df_prices))
+    assert as_of == fresh_as_of
+    np.testing.assert_array_equal(row, fresh_row)
+
+
+def test_correction_inside_the_lag_window_rebuilds(df_prices, artifact):
+    forecaster = Forecaster(artifact)
+    forecaster.feature_row(PriceIndex(df_prices))
+
+    # Only the latest row was checked before: a correction 10 days back, the
+    # lag10 feature, was kept stale
+    corrected = df_prices.copy()
+    date = corrected['date'].drop_duplicates().nlargest(11).iloc[-1]
+    corrected.loc[(corrected['symbol'] == TARGET_SYMBOL) & (corrected['date'] == date), 'price_mid_usd_mt'] += 25.0
+    index = PriceIndex(corrected)
+    row, _ = forecaster.feature_row(index)
+
+    fresh = LagFeatureBuilder.from_wide(latest_wide(index, n_rows=max(artifact['lags']) + 1), artifact['lags'])
+    expected = pd.Series(fresh.latest_row(), index=fresh.columns)[artifact['feature_columns']]
+    np.testing.assert_array_equal(row, expected.to_numpy())
+    assert not np.array_equal(row, Forecaster(artifact).feature_row(PriceIndex(df_prices))[0])
+
+
+def test_concurrent_feature_rows(df_prices, artifact, monkeypatch):
+    cut = df_prices['date'].drop_duplicates().nlargest(5).iloc[-1]
+    indexes = [PriceIndex(df_prices[df_prices['date'] <= cut]), PriceIndex(df_prices)]
+    expected = [Forecaster(artifact).feature_row(index) for index in indexes]
+
+    # Slow appends widen the window in which another thread could swap the builder
+    append = LagFeatureBuilder.append
+    def slow_append(self, *args, **kwargs):
+        time.sleep(0.001)
+        return append(self, *args, **kwargs)
+    monkeypatch.setattr(LagFeatureBuilder, "append", slow_append)
+
+    forecaster = Forecaster(artifact)
+    barrier = threading.Barrier(8)
+    def run(i):
+        barrier.wait()
+        return i % 2, forecaster.feature_row(indexes[i % 2])
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(run, range(32)))
+
+    for which, (row, as_of) in results:
+        assert as_of == expected[which][1]
+        np.testing.assert_array_equal(row, expected[which][0])
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from data_store import load_dataset
+from forecast_engine import Forecaster, fit
+from forecast_intervals import (
+    MIN_RESIDUALS, forecast_intervals, quantile_column, residual_quantiles, simulate_log_returns,
+)
+from price_index import PriceIndex
+
+QUANTILES = (0.025, 0.5, 0.975)
+
+
+@pytest.fixture(scope="module")
+def price_index():
+    return PriceIndex(load_dataset('prices'))
+
+
+@pytest.fixture(scope="module")
+def forecaster(price_index):
+    return Forecaster(fit(price_index.df))
+
+
+def test_quantile_columns():
+    assert [quantile_column(q) for q in QUANTILES] == ['p2.5', 'p50', 'p97.5']
+
+
+def test_paths_resample_whole_days():
+    returns = np.array([[0.01, -0.01], [0.02, -0.02], [0.03, -0.03]])
+    paths = simulate_log_returns(returns, [1, 5], n_paths=200, rng=np.random.default_rng(0))
+    assert paths.shape == (200, 2, 2)
+    # Both symbols move with the same drawn day
+    np.testing.assert_allclose(paths[..., 1], -paths[..., 0])
+    assert set(np.round(paths[:, 0, 0], 6)) <= {0.01, 0.02, 0.03}
+
+
+def test_residual_quantiles_are_read_off_the_errors():
+    errors = np.arange(-50, 51, dtype=float)
+    np.testing.assert_allclose(residual_quantiles(600.0, errors, [0.025, 0.5, 0.975]), [552.5, 600.0, 647.5])
+
+
+def test_interval_table(price_index, forecaster):
+    df = forecast_intervals(price_index, forecaster, quantiles=QUANTILES)
+    columns = [quantile_column(q) for q in QUANTILES]
+    assert len(df) == len(forecaster.horizons) * len(price_index.symbols)
+    assert (np.diff(df[columns].to_numpy(), axis=1) >= 0).all()
+
+    target = df[df['symbol'] == forecaster.artifact['target']]
+    row, _ = forecaster.feature_row(price_index)
+    np.testing.assert_allclose(target['point'], forecaster.predict(row))
+    assert set(target['source']) == {'model + paths'}
+
+    # Seeded from the as-of date
+    again = forecast_intervals(price_index, forecaster, quantiles=QUANTILES)
+    np.testing.assert_array_equal(df[columns].to_numpy(), again[columns].to_numpy())
+
+
+def test_backtest_residuals_replace_paths(price_index, forecaster):
+    horizon = forecaster.horizons[0]
+    residuals = {horizon: np.linspace(-10, 10, MIN_RESIDUALS)}
+    df = forecast_intervals(price_index, forecaster, quantiles=QUANTILES, residuals=residuals)
+    target = df[df['symbol'] == forecaster.artifact['target']].set_index('horizon')
+    assert target.loc[horizon, 'source'] == 'residuals'
+    assert target.loc[horizon, 'p97.5'] - target.loc[horizon, 'point'] == pytest.approx(9.5)
+    assert (target.drop(index=horizon)['source'] == 'model + paths').all()
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from instrumentation import NULL_TIMER, Recorder, _number
+
+
+def test_disabled_recorder_returns_the_null_timer():
+    recorder = Recorder(enabled=False)
+    timer = recorder.start_rerun()
+    assert timer is NULL_TIMER
+    with timer.span("chart"):
+        pass
+    timer.finish()
+    assert recorder.n_reruns == 0
+
+
+def test_phases_spans_and_figures_are_recorded():
+    recorder = Recorder(enabled=True)
+    timer = recorder.start_rerun()
+    timer.page = "Overview"
+    timer.mark("load_data")
+    with timer.span("chart/trend"):
+        time.sleep(0.01)
+    fig = go.Figure(go.Scatter(x=[1, 2, 3], y=[4, 5, 6]))
+    timer.figure("trend", fig)
+    timer.mark("page/Overview")
+    timer.finish()
+
+    df = recorder.rerun_frame()
+    assert list(df['page']) == ["Overview"]
+    assert {'load_data_ms', 'page_ms', 'charts_ms'} <= set(df.columns)
+    assert df['charts_ms'].iloc[0] >= 10
+
+    stages = recorder.stage_frame().set_index('stage')['count']
+    assert stages.to_dict() == {'rerun': 1, 'load_data': 1, 'chart/trend': 1, 'page/Overview': 1}
+    assert recorder.figure_frame()['figure'].tolist() == ["trend"]
+    # The same figure object is serialized once
+    assert recorder.figure_bytes(fig) == recorder.figure_sizes["trend"]
+
+
+def test_cache_hit_ratios():
+    recorder = Recorder(enabled=True)
+    for missed in (True, False, False):
+        recorder.cache_call("load_data")
+        if missed:
+            recorder.cache_miss("load_data")
+    row = recorder.cache_frame().set_index('cache').loc["load_data"]
+    assert (row['hits'], row['misses']) == (2, 1)
+    assert row['hit_ratio'] == 2 / 3
+
+
+def test_prometheus_text(tmp_path):
+    recorder = Recorder(enabled=True, export_path=tmp_path / "dashboard.prom")
+    recorder.cache_call('forecast "v1"')
+    timer = recorder.start_rerun()
+    timer.mark("sidebar")
+    timer.finish()
+
+    text = (tmp_path / "dashboard.prom").read_text()
+    assert "# TYPE steel_dashboard_reruns_total counter\nsteel_dashboard_reruns_total 1\n" in text
+    assert 'steel_dashboard_stage_seconds_count{stage="sidebar"} 1\n' in text
+    assert 'steel_dashboard_cache_requests_total{cache="forecast \\"v1\\"",result="hit"} 1\n' in text
+
+
+@pytest.mark.parametrize("value, text", [
+    (3, "3"), (np.int64(3), "3"), (0.25, "0.25"), (np.float32(0.5), "0.5"),
+    (float('nan'), "NaN"), (np.inf, "+Inf"), (-np.inf, "-Inf"),
+])
+def test_sample_values(value, text):
+    assert _number(value) == text
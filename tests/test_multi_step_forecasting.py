@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import multi_step_forecasting
+from data_store import load_dataset
+from multi_step_forecasting import backtest, summarize
+
+
+@pytest.fixture(scope="module")
+def df_prices():
+    return load_dataset('prices')
+
+
+def test_every_horizon_is_scored(df_prices):
+    df = backtest(df_prices, [1, 7, 30])
+    assert sorted(df['horizon'].unique()) == [1, 7, 30]
+    # Folds are shared: each fold forecasts every horizon from the same origin
+    origins = df['test_date'] - df['horizon'].map(lambda h: np.timedelta64(h, 'D'))
+    assert (origins.groupby(df['fold']).nunique() == 1).all()
+    assert list(summarize(df)['Horizon (days)']) == [1, 7, 30]
+
+
+def test_one_fit_per_fold(df_prices, monkeypatch):
+    targets = []
+    fit = multi_step_forecasting.ElasticNet.fit
+    def record(self, X, y, *args, **kwargs):
+        targets.append(y.shape)
+        return fit(self, X, y, *args, **kwargs)
+    monkeypatch.setattr(multi_step_forecasting.ElasticNet, "fit", record)
+
+    df = backtest(df_prices, [1, 7, 30])
+    assert len(targets) == df['fold'].nunique()
+    assert all(shape[1] == 3 for shape in targets)
+
+
+def test_unscorable_horizon_is_dropped_with_a_warning(df_prices):
+    with pytest.warns(UserWarning, match=r"\[90\]"):
+        df = backtest(df_prices, [1, 7, 90])
+    assert sorted(df['horizon'].unique()) == [1, 7]
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from normalization import RATE_COLUMNS, build_rate_table, normalize_prices
+
+
+def raw(rows):
+    """Raw price rows: (date, mid, currency, unit)"""
+    return pd.DataFrame({
+        'date': pd.to_datetime([date for date, _, _, _ in rows]),
+        'price_low': [mid for _, mid, _, _ in rows],
+        'price_mid': [mid for _, mid, _, _ in rows],
+        'price_high': [mid for _, mid, _, _ in rows],
+        'currency': [currency for _, _, currency, _ in rows],
+        'unit': [unit for _, _, _, unit in rows],
+    })
+
+
+def test_dated_rate_applies_from_its_date(tmp_path):
+    rates_csv = tmp_path / "fx_rates.csv"
+    pd.DataFrame([('2025-03-02', 'AED', 0.25)], columns=RATE_COLUMNS).to_csv(rates_csv, index=False)
+    rates = build_rate_table(rates_csv=rates_csv)
+    df = normalize_prices(raw([('2025-03-01', 2000.0, 'AED', 'mt'), ('2025-03-02', 2000.0, 'AED', 'mt')]), rates)
+    # Before the first dated rate, the fallback rate applies
+    assert list(df['price_mid_usd_mt']) == [pytest.approx(2000 * 0.272), 500.0]
+
+
+def test_unknown_conversion_warns_and_leaves_nan(tmp_path):
+    rates = build_rate_table(rates_csv=tmp_path / "missing.csv")
+    with pytest.warns(UserWarning, match=r"\('GBP', 'mt'\)"):
+        df = normalize_prices(raw([('2025-03-01', 500.0, 'GBP', 'mt'), ('2025-03-01', 600.0, 'USD', 'mt')]), rates)
+    assert df['price_mid_usd_mt'].isna().tolist() == [True, False]
@@ -0,0 +1,54 @@
+import pytest
+
+from pdf_extraction import RAW_COLUMNS, append_csv, extract_all, load_manifest, parse_line, report_date
+
+# Lines as pdfplumber extracts them from the reports under data/raw_pdfs
+FASTMARKETS_LINES = [
+    ("MB-STE-0127 Steel reinforcing bar (rebar) import, cfr Jebel Ali, UAE, $/tonne 19 Aug 2025 605 - 610 "
+     "0 (0.00%) Jul 2025 603.2 - 613.4",
+     ('rebar_uae_import', 605.0, 607.5, 610.0, 'USD', 'mt')),
+    ("MB-STE-0126 Steel reinforcing bar (rebar) domestic, exw UAE, dirhams/tonne 19 Aug 2025 2210 - 2380 "
+     "0 (0.00%) Jul 2025 2218 - 2380",
+     ('rebar_uae_domestic', 2210.0, 2295.0, 2380.0, 'AED', 'mt')),
+    ("MB-STE-0558 Steel billet index export, fob Black Sea, CIS, $/tonne 19 Aug 2025 443 -1 (-0.23%) "
+     "Jul 2025 439.33",
+     ('billet_cis_fob_black_sea', 443.0, 443.0, 443.0, 'USD', 'mt')),
+    ("MB-STE-0009 Steel galvanized coil 1mm export, fob main port China, $/tonne 19 Aug 2025 595 - 615 "
+     "-10 (-1.63%) Jul 2025 577 - 594",
+     ('hdg_china_export', 595.0, 605.0, 615.0, 'USD', 'mt')),
+    ("MB-STE-0417 Steel scrap HMS 1&2 (80:20 mix) US origin, cfr Turkey, $/tonne 19 Aug 2025 345.52 "
+     "0 (0.00%) Jul 2025 345.87",
+     ('scrap_hms_cfr_turkey', 345.52, 345.52, 345.52, 'USD', 'mt')),
+]
+
+
+@pytest.mark.parametrize("line, expected", FASTMARKETS_LINES)
+def test_fastmarkets_table_line(line, expected):
+    assert parse_line(line) == expected
+
+
+def test_compact_range_and_unknown_assessment():
+    assert parse_line("Rebar import cfr Jebel Ali $/t 605-610") == ('rebar_uae_import', 605.0, 607.5, 610.0, 'USD', 'mt')
+    assert parse_line("MB-STE-0146 Steel heavy plate export, fob China main port, $/tonne 19 Aug 2025 505 - 520") is None
+
+
+def test_report_date_from_filename():
+    assert report_date("Fastmarkets Steel prices & news Daily 2025-08-20_250820_143529.pdf") == "2025-08-20"
+    assert report_date("Fastmarkets Steel scrap prices & news Daily 2025-0_250820_143548.pdf") == "2025-08-20"
+    assert report_date("report.pdf", "Published 4 August 2025") == "2025-08-04"
+
+
+def test_first_run_records_reports_already_extracted(tmp_path):
+    pdf_dir = tmp_path / "raw_pdfs"
+    pdf_dir.mkdir()
+    (pdf_dir / "done.pdf").write_bytes(b"%PDF-1.4 done")
+    raw_csv, manifest_csv = tmp_path / "raw.csv", tmp_path / "manifest.csv"
+    append_csv(raw_csv, [('2025-08-20', 'Fastmarkets', 'rebar_uae_import', 605.0, 607.5, 610.0, 'USD', 'mt',
+                          'done.pdf')], RAW_COLUMNS)
+
+    # The only PDF is already in the raw CSV: nothing is re-extracted or appended
+    totals = extract_all(pdf_dir, raw_csv=raw_csv, normalized_csv=tmp_path / "normalized.csv",
+                         manifest_csv=manifest_csv)
+    assert totals == {'pdfs': 0, 'rows': 0, 'failed': 0}
+    assert len(load_manifest(manifest_csv)) == 1
+    assert len(raw_csv.read_text().splitlines()) == 2
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from price_index import PriceIndex
+
+
+def shuffled_prices():
+    """Three symbols over ten days, rows in random order"""
+    dates = pd.date_range('2025-03-01', periods=10)
+    df = pd.DataFrame({
+        'symbol': np.repeat(['rebar', 'hrc', 'billet'], len(dates)),
+        'date': np.tile(dates, 3),
+        'price_mid_usd_mt': np.arange(30, dtype=float),
+    })
+    return df.sample(frac=1, random_state=0)
+
+
+def test_slices_match_boolean_masks():
+    df = shuffled_prices()
+    index = PriceIndex(df)
+    assert index.symbols == ['billet', 'hrc', 'rebar']
+    assert len(index) == len(df)
+
+    for symbol in index.symbols:
+        expected = df[df['symbol'] == symbol].sort_values('date')
+        pd.testing.assert_frame_equal(index.frame(symbol).reset_index(drop=True), expected.reset_index(drop=True))
+        np.testing.assert_array_equal(index.values(symbol), expected['price_mid_usd_mt'].to_numpy())
+        np.testing.assert_array_equal(index.dates(symbol), expected['date'].to_numpy())
+
+
+def test_values_are_views_of_one_column():
+    index = PriceIndex(shuffled_prices())
+    values = index.values('hrc')
+    assert values.base is not None
+    assert np.shares_memory(values, index.column('price_mid_usd_mt'))
+    assert 'hrc' in index and 'scrap' not in index
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from price_revisions import AsOfIndex, end_of_day, load_revisions, record_revisions, segment_paths
+
+
+def prices(rows):
+    """Price table in the layout of the prices dataset: (symbol, date, mid) -> USD/mt columns"""
+    return pd.DataFrame({
+        'symbol': [symbol for symbol, _, _ in rows],
+        'date': pd.to_datetime([date for _, date, _ in rows]),
+        'price_low_usd_mt': [mid - 5 for _, _, mid in rows],
+        'price_mid_usd_mt': [mid for _, _, mid in rows],
+        'price_high_usd_mt': [mid + 5 for _, _, mid in rows],
+    })
+
+
+def mids(df):
+    return {(str(row.symbol), row.date.strftime('%Y-%m-%d')): row.price_mid_usd_mt for row in df.itertuples()}
+
+
+@pytest.fixture
+def root(tmp_path):
+    """Store with an initial recording, a corrected value and a deleted row"""
+    root = tmp_path / "price_revisions"
+    record_revisions(prices([
+        ('rebar', '2025-03-01', 600.0),
+        ('rebar', '2025-03-02', 601.0),
+        ('hrc', '2025-03-01', 500.0),
+    ]), root)
+    # 2025-03-10: rebar on 03-02 is corrected, hrc on 03-01 is withdrawn
+    record_revisions(prices([
+        ('rebar', '2025-03-01', 600.0),
+        ('rebar', '2025-03-02', 611.0),
+    ]), root, known_at='2025-03-10')
+    return root
+
+
+def test_first_recording_is_known_on_its_own_dates(tmp_path):
+    root = tmp_path / "price_revisions"
+    revisions = record_revisions(prices([('rebar', '2025-03-01', 600.0), ('rebar', '2025-03-02', 601.0)]), root)
+    assert list(revisions['known_at']) == list(pd.to_datetime(['2025-03-01', '2025-03-02']))
+
+    index = AsOfIndex(load_revisions(root))
+    assert mids(index.as_of(end_of_day('2025-03-01'))) == {('rebar', '2025-03-01'): 600.0}
+
+
+def test_only_changes_are_appended(root):
+    assert len(segment_paths(root)) == 2
+    revisions = load_revisions(root)
+    assert len(revisions) == 5
+    assert revisions['deleted'].sum() == 1
+
+    # Nothing changed since the last recording: no new segment
+    again = record_revisions(prices([('rebar', '2025-03-01', 600.0), ('rebar', '2025-03-02', 611.0)]), root,
+                             known_at='2025-03-11')
+    assert not len(again)
+    assert len(segment_paths(root)) == 2
+
+
+def test_as_of_sees_corrections_and_deletions(root):
+    index = AsOfIndex(load_revisions(root))
+
+    before = index.as_of(end_of_day('2025-03-09'))
+    assert mids(before) == {
+        ('hrc', '2025-03-01'): 500.0,
+        ('rebar', '2025-03-01'): 600.0,
+        ('rebar', '2025-03-02'): 601.0,
+    }
+    after = index.as_of(end_of_day('2025-03-10'))
+    assert mids(after) == {('rebar', '2025-03-01'): 600.0, ('rebar', '2025-03-02'): 611.0}
+    assert mids(index.latest()) == mids(after)
+
+    # Before anything was known
+    assert not len(index.as_of('2025-02-28'))
+
+
+def test_as_of_filters_symbols_and_dates(root):
+    index = AsOfIndex(load_revisions(root))
+    at = end_of_day('2025-03-09')
+    assert mids(index.as_of(at, symbols=['hrc'])) == {('hrc', '2025-03-01'): 500.0}
+    assert mids(index.as_of(at, start='2025-03-02')) == {('rebar', '2025-03-02'): 601.0}
+    assert not len(index.as_of(at, symbols=['unknown']))
+
+
+def test_revision_history(root):
+    index = AsOfIndex(load_revisions(root))
+    history = index.revisions('rebar', '2025-03-02')
+    assert list(history['price_mid_usd_mt']) == [601.0, 611.0]
+    assert list(history['known_at']) == list(pd.to_datetime(['2025-03-02', '2025-03-10']))
+
+    withdrawn = index.revisions('hrc', '2025-03-01')
+    assert list(withdrawn['deleted']) == [False, True]
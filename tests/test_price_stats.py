@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from price_index import PriceIndex
+from price_stats import PriceStats
+
+
+def prices(values_by_symbol):
+    dates = pd.date_range('2025-01-01', periods=len(next(iter(values_by_symbol.values()))))
+    return pd.DataFrame([
+        {'symbol': symbol, 'date': date, 'price_mid_usd_mt': value}
+        for symbol, values in values_by_symbol.items() for date, value in zip(dates, values)
+    ])
+
+
+def test_all_nan_symbol_has_an_empty_row():
+    stats = PriceStats(PriceIndex(prices({'rebar': [600.0, 610.0, 605.0], 'pmi': [np.nan] * 3})))
+    assert 'pmi' not in stats
+
+    rows = stats.rows(['pmi', 'rebar', 'unknown'])
+    assert list(rows.index) == ['pmi', 'rebar', 'unknown']
+    assert rows.loc['rebar', 'last'] == 605.0
+    assert rows.loc[['pmi', 'unknown'], 'last'].isna().all()
+
+
+def test_appends_match_a_rebuild():
+    df = prices({'rebar': 600 + np.arange(40.0), 'hrc': 500 - np.arange(40.0)})
+    stats = PriceStats(PriceIndex(df[df['date'] < '2025-02-01']))
+    full = PriceIndex(df)
+    for symbol in ['hrc', 'rebar']:
+        new = df[(df['symbol'] == symbol) & (df['date'] >= '2025-02-01')]
+        stats.append(symbol, new['date'].to_numpy(), new['price_mid_usd_mt'].to_numpy(), full.values(symbol))
+
+    expected = PriceStats(full).table
+    pd.testing.assert_frame_equal(stats.table[expected.columns], expected, check_dtype=False)
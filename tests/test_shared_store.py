@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from data_store import load_dataset
+from shared_store import KEEP_VERSIONS, SharedLiveDatasets, attach, publish, read_pointer
+
+
+def frame():
+    return pd.DataFrame({
+        'symbol': pd.Categorical(['rebar', 'hrc', 'rebar']),
+        'source': ['a', 'b', 'a'],
+        'date': pd.to_datetime(['2025-03-01', '2025-03-01', '2025-03-02']),
+        'price': [600.5, 500.25, 601.0],
+        'volume': np.array([1, 2, 3], dtype=np.int64),
+    })
+
+
+def test_published_frames_attach_read_only(tmp_path):
+    pointer = publish(tmp_path, {'prices': frame(), 'missing': None}, "v-test")
+    assert read_pointer(tmp_path) == pointer
+
+    frames = attach(tmp_path, pointer)
+    assert frames['missing'] is None
+    df = frames['prices']
+    assert list(df.columns) == list(frame().columns)
+    for column in df.columns:
+        assert df[column].tolist() == frame()[column].tolist()
+    assert df['date'].dtype == frame()['date'].dtype
+    assert not df['price'].to_numpy().flags.writeable
+
+
+def test_old_versions_are_removed(tmp_path):
+    for i in range(KEEP_VERSIONS + 2):
+        pointer = publish(tmp_path, {'prices': frame()}, f"v{i}")
+    assert pointer['counter'] == KEEP_VERSIONS + 2
+    kept = sorted(entry.name for entry in tmp_path.iterdir() if entry.is_dir())
+    assert kept == [f"v{pointer['counter'] - i}" for i in reversed(range(KEEP_VERSIONS))]
+
+
+def test_workers_share_one_published_version(tmp_path):
+    first = SharedLiveDatasets(tmp_path, names=['prices'])
+    second = SharedLiveDatasets(tmp_path, names=['prices'])
+    assert first.counter == second.counter == 1
+
+    expected = load_dataset('prices').sort_values(['symbol', 'date'], kind='stable').reset_index(drop=True)
+    df = second.snapshot()['prices']
+    np.testing.assert_array_equal(df['price_mid_usd_mt'], expected['price_mid_usd_mt'])
+    assert list(df['symbol'].astype(str)) == list(expected['symbol'].astype(str))
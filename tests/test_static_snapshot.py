@@ -0,0 +1,56 @@
+import json
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import static_snapshot
+from conftest import REPO_ROOT
+from static_snapshot import PAGES, SnapshotBundle, build_snapshot, current_bundle_pointer
+
+
+@pytest.fixture(scope="module")
+def bundle_root(tmp_path_factory):
+    """Bundle built as on a clean checkout: no model artifact yet"""
+    tmp = tmp_path_factory.mktemp("snapshot")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(REPO_ROOT)
+        mp.setattr(static_snapshot, 'MODEL_FILE', tmp / "model.joblib")
+        pointer, built = build_snapshot(tmp / "bundle")
+        assert built
+        yield tmp / "bundle"
+
+
+@pytest.fixture
+def model_file(bundle_root, monkeypatch):
+    monkeypatch.setattr(static_snapshot, 'MODEL_FILE', bundle_root.parent / "model.joblib")
+
+
+def test_first_build_is_current(bundle_root, model_file):
+    pointer = current_bundle_pointer(bundle_root)
+    assert pointer is not None and pointer['counter'] == 1
+
+    again, built = build_snapshot(bundle_root)
+    assert not built and again == pointer
+
+
+def test_bundle_pages(bundle_root, model_file):
+    pointer = current_bundle_pointer(bundle_root)
+    bundle = SnapshotBundle(bundle_root, pointer)
+    assert set(bundle.pages) == set(PAGES)
+    assert "overview/rebar_trend" in bundle.figures
+    # Page files are strict JSON (no NaN) for browsers
+    json.loads((bundle_root / pointer['path'] / "overview.json").read_text(), parse_constant=pytest.fail)
+    assert (bundle_root / "index.html").exists()
+
+
+@pytest.mark.parametrize("page", list(PAGES.values()))
+def test_dashboard_serves_bundle(bundle_root, model_file, monkeypatch, page):
+    monkeypatch.setenv("DASHBOARD_SNAPSHOT_DIR", str(bundle_root))
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    app = AppTest.from_file(str(REPO_ROOT / "dashboard.py"), default_timeout=120)
+    app.run()
+    app.sidebar.radio[0].set_value(page).run()
+    assert not app.exception, [e.value for e in app.exception]
+    assert any("Pre-rendered snapshot" in caption.value for caption in app.caption)
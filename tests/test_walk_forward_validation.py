@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from data_store import load_dataset
+from walk_forward_validation import INITIAL_TRAIN, fold_origins, prepare_arrays, walk_forward
+
+
+@pytest.fixture(scope="module")
+def df_prices():
+    return load_dataset('prices')
+
+
+@pytest.mark.parametrize("horizon", [1, 7, 30])
+def test_folds_train_only_on_known_targets(horizon):
+    origins = fold_origins(300, horizon, initial_train=INITIAL_TRAIN, step=7)
+    # Origin o trains on rows i with i + h <= o
+    assert origins[0] - horizon + 1 == INITIAL_TRAIN
+    assert origins[-1] + horizon < 300
+    assert np.all(np.diff(origins) == 7)
+
+
+def test_prepared_rows_have_every_lag(df_prices):
+    X, price, dates = prepare_arrays(df_prices)
+    assert np.isfinite(X).all()
+    assert len(X) == len(price) == len(dates)
+    assert X.flags['C_CONTIGUOUS']
+
+
+def test_workers_agree_with_one_process(df_prices):
+    serial = walk_forward(df_prices, horizon=7, workers=1)
+    parallel = walk_forward(df_prices, horizon=7, workers=2)
+
+    assert list(serial['test_date']) == list(parallel['test_date'])
+    assert (serial['train_size'] == parallel['train_size']).all()
+    # Warm starts differ at chunk boundaries; fits agree to the solver's tolerance
+    np.testing.assert_allclose(serial['predicted'], parallel['predicted'], rtol=1e-4)
+    assert serial['train_size'].iloc[0] == INITIAL_TRAIN
@@ -0,0 +1,172 @@
+"""
+Walk-Forward Validation
+
+Out-of-sample backtest of the Elastic Net forecaster. Each fold trains on
+every row whose target was known at the forecast origin, predicts `horizon`
+days ahead, then moves the origin forward by `step` rows.
+
+Folds run on a process pool. The folds are split into contiguous chunks, one
+per worker, and within a chunk each fit warm-starts from the previous fold's
+coefficients. The feature matrix is written once to a memory-mapped .npy
+file that every worker opens read-only instead of receiving a pickled copy.
+
+Output has the layout of data/validation/walk_forward_results.csv.
+
+Run with: python walk_forward_validation.py [--horizon 1] [--workers 4]
+"""
+
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import ElasticNet
+
+from data_store import load_dataset
+from feature_engineering import FEATURE_LAGS, build_lag_features, wide_prices
+from forecast_engine import ALPHA, L1_RATIO, TARGET_SYMBOL
+
+OUTPUT_FILE = Path("data/validation/walk_forward_results.csv")
+
+INITIAL_TRAIN = 180
+STEP = 7
+
+
+# ============================================================================
+# SHARED FEATURE MATRIX
+# ============================================================================
+
+def prepare_arrays(df_prices, lags=FEATURE_LAGS, target=TARGET_SYMBOL):
+    """Feature matrix, target price series and dates, trimmed to rows with every lag"""
+    wide = wide_prices(df_prices)
+    features = build_lag_features(wide, lags)
+    valid = features.notna().all(axis=1).to_numpy()
+
+    X = np.ascontiguousarray(features.to_numpy()[valid])
+    price = wide[target].to_numpy()[valid]
+    dates = wide.index[valid]
+    return X, price, dates
+
+
+def fold_origins(n_rows, horizon, initial_train=INITIAL_TRAIN, step=STEP):
+    """
+    Forecast origin rows. Training for origin `o` uses rows i with i + h <= o,
+    so the first origin has exactly `initial_train` training rows.
+    """
+    first = initial_train + horizon - 1
+    return np.arange(first, n_rows - horizon, step)
+
+
+def _standardize(X_train):
+    mean = X_train.mean(axis=0)
+    scale = X_train.std(axis=0)
+    scale[scale == 0] = 1.0
+    return mean, scale
+
+
+# ============================================================================
+# FOLDS
+# ============================================================================
+
+def run_folds(arrays_dir, origins, horizon, alpha=ALPHA, l1_ratio=L1_RATIO):
+    """
+    Fit and score a contiguous run of folds, warm-starting each fit.
+
+    Runs in a worker process; the arrays are opened read-only via mmap.
+    """
+    X = np.load(Path(arrays_dir) / "X.npy", mmap_mode='r')
+    price = np.load(Path(arrays_dir) / "price.npy", mmap_mode='r')
+
+    model = ElasticNet(alpha=alpha, l1_ratio=l1_ratio, max_iter=10000, warm_start=True)
+    results = []
+    for origin in origins:
+        n_train = origin - horizon + 1
+        X_train = X[:n_train]
+        y_train = price[horizon:n_train + horizon] - price[:n_train]
+
+        mean, scale = _standardize(X_train)
+        model.fit((X_train - mean) / scale, y_train)
+
+        change = model.predict(((X[origin] - mean) / scale)[None, :])[0]
+        results.append({
+            'origin': int(origin),
+            'train_size': int(n_train),
+            'predicted': float(price[origin] + change),
+            'n_active_features': int(np.count_nonzero(model.coef_)),
+        })
+    return results
+
+
+def walk_forward(df_prices, horizon=1, initial_train=INITIAL_TRAIN, step=STEP, workers=None,
+                 alpha=ALPHA, l1_ratio=L1_RATIO):
+    """Run the walk-forward backtest and return the results table"""
+    X, price, dates = prepare_arrays(df_prices)
+    origins = fold_origins(len(X), horizon, initial_train, step)
+    if len(origins) == 0:
+        raise ValueError(f"Not enough rows ({len(X)}) for {initial_train} training rows at horizon {horizon}")
+
+    workers = min(workers or os.cpu_count() or 1, len(origins))
+    chunks = [chunk for chunk in np.array_split(origins, workers) if len(chunk)]
+
+    with tempfile.TemporaryDirectory(prefix="walk_forward_") as arrays_dir:
+        np.save(Path(arrays_dir) / "X.npy", X)
+        np.save(Path(arrays_dir) / "price.npy", price)
+
+        if workers == 1:
+            fold_rows = run_folds(arrays_dir, origins, horizon, alpha, l1_ratio)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(run_folds, arrays_dir, chunk, horizon, alpha, l1_ratio) for chunk in chunks]
+                fold_rows = [row for future in futures for row in future.result()]
+
+    return results_table(fold_rows, price, dates, horizon)
+
+
+def results_table(fold_rows, price, dates, horizon):
+    """Fold results in the walk_forward_results.csv layout"""
+    df = pd.DataFrame(fold_rows).sort_values('origin').reset_index(drop=True)
+    origin = df['origin'].to_numpy()
+
+    actual = price[origin + horizon]
+    base = price[origin]
+    error = df['predicted'].to_numpy() - actual
+
+    return pd.DataFrame({
+        'fold': np.arange(1, len(df) + 1),
+        'train_size': df['train_size'],
+        'test_date': dates[origin + horizon],
+        'actual': actual,
+        'predicted': df['predicted'],
+        'error': error,
+        'error_pct': 100 * error / actual,
+        'mae': np.abs(error),
+        'mape': 100 * np.abs(error) / actual,
+        'n_active_features': df['n_active_features'],
+        'actual_direction': actual > base,
+        'pred_direction': df['predicted'].to_numpy() > base,
+        'abs_error': np.abs(error),
+    })
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward validation of the Elastic Net forecaster")
+    parser.add_argument("--horizon", type=int, default=1, help="Forecast horizon in days")
+    parser.add_argument("--initial-train", type=int, default=INITIAL_TRAIN, help="Training rows in the first fold")
+    parser.add_argument("--step", type=int, default=STEP, help="Rows between fold origins")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    df_results = walk_forward(load_dataset('prices'), args.horizon, args.initial_train, args.step, args.workers)
+    df_results.to_csv(args.output, index=False)
+
+    print(f"Saved {len(df_results)} folds to {args.output}")
+    print(f"  MAE:  ${df_results['mae'].mean():.2f}/mt")
+    print(f"  MAPE: {df_results['mape'].mean():.2f}%")